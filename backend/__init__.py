@@ -11,6 +11,7 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import inspect, text
 
 from backend.middleware.error_handler import ErrorHandler
+from backend.utils.lazy_import import format_import_report, timed_import
 
 load_dotenv()
 # Initialize extensions
@@ -192,14 +193,16 @@ def create_app():
     from backend.models.prediction import PredictionHistory
 
     # Register Disease Routes Blueprint
-    from backend.routes.disease_routes import disease_bp
+    with timed_import("disease_routes"):
+        from backend.routes.disease_routes import disease_bp
 
     app.register_blueprint(disease_bp)
     print("'disease_routes' blueprint registered successfully")
 
     # Register ML Routes Blueprint
     try:
-        from backend.routes.ml_routes import ml_bp  # type: ignore
+        with timed_import("ml_routes"):
+            from backend.routes.ml_routes import ml_bp  # type: ignore
 
         app.register_blueprint(ml_bp)
         print("'ml_routes' blueprint registered successfully")
@@ -207,14 +210,16 @@ def create_app():
         print(f"Warning: Could not import 'ml_routes'. Error: {e}")
 
     # Register Auth Routes Blueprint
-    from backend.routes.auth_routes import auth_bp
+    with timed_import("auth_routes"):
+        from backend.routes.auth_routes import auth_bp
 
     app.register_blueprint(auth_bp)
     print("'auth_routes' blueprint registered successfully")
 
     # Register Doctor Dashboard Routes Blueprint
     try:
-        from backend.routes.doctor_routes import doctor_bp
+        with timed_import("doctor_routes"):
+            from backend.routes.doctor_routes import doctor_bp
 
         app.register_blueprint(doctor_bp)
         print("'doctor_routes' blueprint registered successfully")
@@ -222,23 +227,36 @@ def create_app():
         print(f"Warning: Could not import 'doctor_routes'. Error: {e}")
 
     try:
-        from backend.routes.history_routes import history_bp
+        with timed_import("history_routes"):
+            from backend.routes.history_routes import history_bp
 
         app.register_blueprint(history_bp)
         print("[OK] 'history_routes' blueprint registered successfully")
     except ImportError as e:
         print(f"[WARN] Warning: Could not import 'history_routes'. Error: {e}")
 
-    try:
-        from backend.routes.predict_disease_type_routes import predict_disease_type_bp
+    # IMAGE_ROUTES_ENABLED=0 leaves out the image-prediction blueprint, so a
+    # worker pool serving only symptoms, calculator and history never loads
+    # the image models; send /predict* to a pool started with the default.
+    if os.getenv("IMAGE_ROUTES_ENABLED", "1").lower() in ("1", "true", "yes"):
+        try:
+            with timed_import("predict_disease_type_routes"):
+                from backend.routes.predict_disease_type_routes import (
+                    predict_disease_type_bp,
+                )
 
-        app.register_blueprint(predict_disease_type_bp)
-        print("'predict_disease_type_bp_routes' blueprint registered successfully")
-    except ImportError as e:
-        print(f"Warning: Could not import 'predict_disease_type_bp_routes'. Error: {e}")
+            app.register_blueprint(predict_disease_type_bp)
+            print("'predict_disease_type_bp_routes' blueprint registered successfully")
+        except ImportError as e:
+            print(
+                f"Warning: Could not import 'predict_disease_type_bp_routes'. Error: {e}"
+            )
+    else:
+        print("[INFO] Image prediction routes disabled (IMAGE_ROUTES_ENABLED=0)")
 
     try:
-        from backend.routes.general_routes import general_bp
+        with timed_import("general_routes"):
+            from backend.routes.general_routes import general_bp
 
         app.register_blueprint(general_bp)
         print("'general_routes' blueprint registered successfully")
@@ -246,7 +264,8 @@ def create_app():
         print(f"Warning: Could not import 'general_routes'. Error: {e}")
 
     try:
-        from backend.routes.scalability_routes import scalability_bp
+        with timed_import("scalability_routes"):
+            from backend.routes.scalability_routes import scalability_bp
 
         app.register_blueprint(scalability_bp)
         print("'scalability_routes' blueprint registered successfully")
@@ -254,7 +273,8 @@ def create_app():
         print(f"[WARN] Warning: Could not import 'scalability_routes'. Error: {e}")
 
     try:
-        from backend.routes.chat_routes import chat_bp
+        with timed_import("chat_routes"):
+            from backend.routes.chat_routes import chat_bp
 
         app.register_blueprint(chat_bp)
         print("[OK] 'chat_routes' blueprint registered successfully")
@@ -263,7 +283,8 @@ def create_app():
 
     # Keep bias routes (from main branch)
     try:
-        from backend.routes.bias_routes import bias_bp
+        with timed_import("bias_routes"):
+            from backend.routes.bias_routes import bias_bp
 
         app.register_blueprint(bias_bp)
         print("[OK] 'bias_routes' blueprint registered successfully")
@@ -272,13 +293,55 @@ def create_app():
 
     # Register synthetic patient routes
     try:
-        from backend.routes.synthetic_routes import synthetic_bp
+        with timed_import("synthetic_routes"):
+            from backend.routes.synthetic_routes import synthetic_bp
 
         app.register_blueprint(synthetic_bp)
         print("[OK] 'synthetic_routes' blueprint registered successfully")
     except ImportError as e:
         print(f"[WARN] Warning: Could not import 'synthetic_routes'. Error: {e}")
 
+    # Register batch Bayes calculator routes
+    try:
+        with timed_import("bayes_routes"):
+            from backend.routes.bayes_routes import bayes_bp
+
+        app.register_blueprint(bayes_bp)
+        print("[OK] 'bayes_routes' blueprint registered successfully")
+    except ImportError as e:
+        print(f"[WARN] Warning: Could not import 'bayes_routes'. Error: {e}")
+
+    # Request phase timers and latency histograms (METRICS_ENABLED=1)
+    from backend.services import metrics
+
+    metrics.init_app(app)
+    try:
+        with timed_import("metrics_routes"):
+            from backend.routes.metrics_routes import metrics_bp
+
+        app.register_blueprint(metrics_bp)
+        print("[OK] 'metrics_routes' blueprint registered successfully")
+    except ImportError as e:
+        print(f"[WARN] Warning: Could not import 'metrics_routes'. Error: {e}")
+
+    # On-demand profiling of a live worker (PROFILER_TOKEN)
+    from backend.services import profiler
+
+    profiler.init_app(app)
+    try:
+        with timed_import("profiler_routes"):
+            from backend.routes.profiler_routes import profiler_bp
+
+        # Bearer-token API with no cookie session, so CSRF does not apply.
+        csrf.exempt(profiler_bp)
+        app.register_blueprint(profiler_bp)
+        print("[OK] 'profiler_routes' blueprint registered successfully")
+    except ImportError as e:
+        print(f"[WARN] Warning: Could not import 'profiler_routes'. Error: {e}")
+
+    if os.getenv("STARTUP_IMPORT_REPORT", "0").lower() in ("1", "true", "yes"):
+        print(format_import_report())
+
     # Keep centralized error handler (from register-error-handler branch)
     ErrorHandler(app)
 
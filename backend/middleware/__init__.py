@@ -29,6 +29,8 @@ from .logger import (
 from .security import cors_headers
 from .security import log_request as security_log_request
 from .security import (
+    add_rate_limit_headers,
+    consume_rate_limit,
     rate_limit,
     rate_limiter,
     security_validator,
@@ -40,6 +42,8 @@ __all__ = [
     "rate_limiter",
     "security_validator",
     "rate_limit",
+    "consume_rate_limit",
+    "add_rate_limit_headers",
     "validate_request_data",
     "cors_headers",
     "security_log_request",
@@ -1,11 +1,34 @@
 """
 Structured Logging System
 Provides comprehensive logging for debugging, monitoring, and auditing
+
+Records are handed to a bounded in-memory queue; a background
+``QueueListener`` thread formats them and writes the rotating log files and
+the console, so the request thread never touches the disk.  When the queue
+is full, records are dropped and counted instead of blocking the request.
+Successful API requests can be sampled (``API_LOG_SAMPLE_RATE=N`` keeps 1
+in N); errors are always logged.
+
+Rotating handlers are not safe when several processes share one file: each
+gunicorn worker would rotate app.log on its own and lose the others' lines.
+Either set ``LOG_ROTATION=external`` (files are reopened after logrotate
+moves them) or keep in-process rotation with ``LOG_PER_PROCESS=1``, which
+gives each gunicorn worker its own ``app.worker-<slot>.log``.  The slot comes
+from ``LOG_WORKER_SLOT``, which gunicorn.conf.py sets before each fork: a
+replacement worker reuses the slot, and so the files, of the one it replaces.
+Processes without a slot (the master) write the plain ``app.log``.
+gunicorn.conf.py turns per-process files on unless rotation is external.
 """
 
+import atexit
+import copy
+import itertools
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 import time
 from datetime import datetime
 from functools import wraps
@@ -18,16 +41,49 @@ class StructuredLogger:
     Structured logger with JSON formatting and multiple log levels.
     """
 
-    def __init__(self, name="disease_prediction", log_dir="logs"):
+    def __init__(
+        self,
+        name="disease_prediction",
+        log_dir="logs",
+        rotation=None,
+        max_bytes=None,
+        backup_count=None,
+        queue_size=None,
+        api_sample_rate=None,
+        per_process=None,
+    ):
         """
         Initialize structured logger.
 
         Args:
             name: Logger name
             log_dir: Directory for log files
+            rotation: "size" (default), "time" or "external" (``LOG_ROTATION``)
+            max_bytes: Size at which a file rotates (``LOG_MAX_BYTES``)
+            backup_count: Rotated files kept per log (``LOG_BACKUP_COUNT``)
+            queue_size: Records buffered before dropping (``LOG_QUEUE_SIZE``)
+            api_sample_rate: Log 1 in N successful API requests
+                (``API_LOG_SAMPLE_RATE``)
+            per_process: Suffix file names with the gunicorn worker slot
+                (``LOG_PER_PROCESS``); ignored for external rotation
         """
         self.name = name
         self.log_dir = log_dir
+        self.rotation = (rotation or os.getenv("LOG_ROTATION", "size")).lower()
+        if per_process is None:
+            per_process = os.getenv("LOG_PER_PROCESS", "0").lower() in ("1", "true")
+        self.per_process = per_process and self.rotation != "external"
+        self.max_bytes = int(max_bytes or os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+        self.backup_count = int(
+            backup_count
+            if backup_count is not None
+            else os.getenv("LOG_BACKUP_COUNT", 5)
+        )
+        self.api_sample_rate = max(
+            1, int(api_sample_rate or os.getenv("API_LOG_SAMPLE_RATE", 1))
+        )
+        self._api_counter = itertools.count()
+        self._sampled_out = 0
 
         # Create logs directory if it doesn't exist
         if not os.path.exists(log_dir):
@@ -40,12 +96,62 @@ class StructuredLogger:
         # Remove existing handlers
         self.logger.handlers = []
 
-        # Add handlers
+        # Add handlers (run by the listener thread, not the caller)
+        self.handlers = []
         self._add_console_handler()
         self._add_file_handlers()
 
+        self.queue = queue.Queue(
+            maxsize=int(queue_size or os.getenv("LOG_QUEUE_SIZE", 10000))
+        )
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.logger.addHandler(self.queue_handler)
+        self._start_listener()
+        atexit.register(self.close)
+        # The listener thread does not survive fork(); restart it in each
+        # gunicorn worker when the app is preloaded in the master.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
         print(f"✅ StructuredLogger initialized: {name}")
 
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def _after_fork(self):
+        # The parent's listener may have held the queue's mutex at fork time,
+        # which would leave it locked forever in the child.
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.queue_handler.queue = self.queue
+        if self.per_process:
+            # The child must not write (or rotate) the parent's files.
+            for handler in self.handlers[1:]:
+                handler.close()
+            del self.handlers[1:]
+            self._add_file_handlers()
+        self._start_listener()
+
+    def close(self):
+        """Flush queued records and stop the listener thread."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in self.handlers:
+                handler.flush()
+
+    def get_stats(self):
+        """Queue depth and the number of records dropped or sampled out."""
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": dict(self.queue_handler.dropped),
+            "api_sampled_out": self._sampled_out,
+            "api_sample_rate": self.api_sample_rate,
+        }
+
     def _add_console_handler(self):
         """Add console handler with colored output."""
         console_handler = logging.StreamHandler()
@@ -57,27 +163,38 @@ class StructuredLogger:
         )
         console_handler.setFormatter(formatter)
 
-        self.logger.addHandler(console_handler)
+        self.handlers.append(console_handler)
+
+    def _file_handler(self, filename):
+        slot = os.getenv("LOG_WORKER_SLOT") if self.per_process else None
+        if slot is not None:
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem}.worker-{slot}{ext}"
+        path = os.path.join(self.log_dir, filename)
+        if self.rotation == "external":
+            return logging.handlers.WatchedFileHandler(path, delay=True)
+        if self.rotation == "time":
+            return logging.handlers.TimedRotatingFileHandler(
+                path,
+                when=os.getenv("LOG_ROTATE_WHEN", "midnight"),
+                backupCount=self.backup_count,
+                delay=True,
+            )
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=self.max_bytes, backupCount=self.backup_count, delay=True
+        )
 
     def _add_file_handlers(self):
         """Add file handlers for different log levels."""
-        # All logs
-        all_handler = logging.FileHandler(os.path.join(self.log_dir, "app.log"))
-        all_handler.setLevel(logging.DEBUG)
-        all_handler.setFormatter(self._get_json_formatter())
-        self.logger.addHandler(all_handler)
-
-        # Error logs
-        error_handler = logging.FileHandler(os.path.join(self.log_dir, "error.log"))
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(self._get_json_formatter())
-        self.logger.addHandler(error_handler)
-
-        # API logs
-        api_handler = logging.FileHandler(os.path.join(self.log_dir, "api.log"))
-        api_handler.setLevel(logging.INFO)
-        api_handler.setFormatter(self._get_json_formatter())
-        self.logger.addHandler(api_handler)
+        for filename, level in (
+            ("app.log", logging.DEBUG),  # All logs
+            ("error.log", logging.ERROR),  # Error logs
+            ("api.log", logging.INFO),  # API logs
+        ):
+            handler = self._file_handler(filename)
+            handler.setLevel(level)
+            handler.setFormatter(self._get_json_formatter())
+            self.handlers.append(handler)
 
     def _get_json_formatter(self):
         """Get JSON formatter for structured logging."""
@@ -147,6 +264,12 @@ class StructuredLogger:
             duration: Request duration in seconds
             **kwargs: Additional data
         """
+        if status_code < 400 and self.api_sample_rate > 1:
+            if next(self._api_counter) % self.api_sample_rate:
+                self._sampled_out += 1
+                return
+            kwargs["sample_rate"] = self.api_sample_rate
+
         self.info(
             f"API Request: {method} {endpoint}",
             endpoint=endpoint,
@@ -266,10 +389,45 @@ class JsonFormatter(logging.Formatter):
         # Add exception info if present
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
 
         return json.dumps(log_data)
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue that drops records when it is full
+    instead of blocking, counting the drops per level.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = {}
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Keep the extra fields for JsonFormatter; only resolve the message
+        # and exception text so the record is safe to format later.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped[record.levelname] = (
+                    self.dropped.get(record.levelname, 0) + 1
+                )
+
+
 # Global logger instance
 _global_logger = None
 
@@ -4,7 +4,6 @@ import re
 import sqlite3
 import threading
 import time
-from collections import defaultdict
 from datetime import datetime
 from functools import wraps
 
@@ -16,17 +15,64 @@ except ImportError:
     redis = None
 
 
+def gcra_check(tat, now, max_requests, window):
+    """
+    One step of the generic cell rate algorithm (GCRA) shared by all backends.
+
+    A bucket of ``max_requests`` per ``window`` seconds is stored as its
+    theoretical arrival time ``tat`` (None for a new or refilled bucket).
+    It admits a burst of ``max_requests`` and then one request every
+    ``window / max_requests`` seconds.
+
+    Returns ``(allowed, retry_after, remaining, new_tat)``; ``new_tat`` is
+    what the backend should store when the request is allowed.
+    """
+    if max_requests <= 0:
+        return False, int(window) + 1, 0, tat
+
+    interval = window / max_requests
+    # Seconds the bucket would stay "in debt" after this request.  The
+    # tolerance absorbs float rounding of epoch-sized timestamps.
+    debt = max((now if tat is None else tat) - now, 0.0) + interval
+    if debt > window + 1e-6:
+        return False, int(debt - window) + 1, 0, tat
+
+    remaining = int((window - debt) / interval + 1e-6)
+    return True, 0, remaining, now + debt
+
+
 class InMemoryBackend:
     """
     Thread-safe in-memory rate limit backend.
-    Uses a background thread to prune stale entries periodically.
+
+    Each (identifier, endpoint_type) bucket is a single GCRA theoretical
+    arrival time (see ``gcra_check``), so a check is O(1) however busy the
+    caller is.  Buckets are spread over lock-striped shards so a burst from
+    one client never holds a lock that other clients need, and a bucket is
+    dropped by the background cleanup thread once it has fully refilled, so
+    memory is bounded by the number of recently active identifiers.
     """
 
-    def __init__(self, cleanup_interval=60):
-        self._requests = defaultdict(list)
-        self._lock = threading.Lock()
+    def __init__(self, cleanup_interval=60, shards=16):
+        self._shard_count = max(1, int(shards))
+        self._shards = [{} for _ in range(self._shard_count)]
+        self._locks = [threading.Lock() for _ in range(self._shard_count)]
         self._cleanup_interval = cleanup_interval
         self._stop_cleanup = threading.Event()
+        self._start_cleanup_thread()
+        # Threads do not survive fork(); restart pruning in each gunicorn
+        # worker when the app is preloaded in the master.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A lock held by another thread at fork time would never be released.
+        self._locks = [threading.Lock() for _ in range(self._shard_count)]
+        self._start_cleanup_thread()
+
+    def _start_cleanup_thread(self):
+        if self._stop_cleanup.is_set():
+            return
         self._cleanup_thread = threading.Thread(
             target=self._periodic_cleanup, daemon=True
         )
@@ -39,52 +85,63 @@ class InMemoryBackend:
             except Exception as e:
                 print(f"Error in InMemoryBackend periodic cleanup: {e}")
 
+    def _shard_index(self, identifier):
+        return hash(identifier) % self._shard_count
+
+    def __contains__(self, identifier):
+        index = self._shard_index(identifier)
+        with self._locks[index]:
+            return identifier in self._shards[index]
+
     def prune_stale_entries(self):
         current_time = time.time()
-        # Keep buffer of 5 minutes (300 seconds) max window
-        max_window = 300
-        with self._lock:
-            for identifier in list(self._requests.keys()):
-                cutoff = current_time - max_window
-                self._requests[identifier] = [
-                    (ts, ep) for ts, ep in self._requests[identifier] if ts > cutoff
-                ]
-                if not self._requests[identifier]:
-                    del self._requests[identifier]
+        for shard, lock in zip(self._shards, self._locks):
+            # One shard at a time, so only 1/shards of callers ever wait.
+            with lock:
+                for identifier in list(shard):
+                    buckets = shard[identifier]
+                    for endpoint_type in [
+                        ep for ep, tat in buckets.items() if tat <= current_time
+                    ]:
+                        del buckets[endpoint_type]
+                    if not buckets:
+                        del shard[identifier]
+
+    def clear(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
 
     def check_rate_limit(self, identifier, endpoint_type, max_requests, window):
         current_time = time.time()
-        cutoff_time = current_time - window
-
-        with self._lock:
-            # Clean old requests
-            self._requests[identifier] = [
-                (ts, ep) for ts, ep in self._requests[identifier] if ts > cutoff_time
-            ]
-
-            # Count requests in window
-            current_requests = len(self._requests[identifier])
-
-            # Check if limit exceeded
-            if current_requests >= max_requests:
-                oldest_request = min(self._requests[identifier], key=lambda x: x[0])
-                retry_after = int(window - (current_time - oldest_request[0])) + 1
-                return False, retry_after, 0
-
-            # Add current request
-            self._requests[identifier].append((current_time, endpoint_type))
-            remaining = max_requests - current_requests - 1
+        index = self._shard_index(identifier)
+
+        with self._locks[index]:
+            shard = self._shards[index]
+            buckets = shard.get(identifier)
+            tat = buckets.get(endpoint_type) if buckets else None
+            allowed, retry_after, remaining, new_tat = gcra_check(
+                tat, current_time, max_requests, window
+            )
+            if allowed:
+                if buckets is None:
+                    buckets = shard[identifier] = {}
+                buckets[endpoint_type] = new_tat
 
-            return True, 0, remaining
+        return allowed, retry_after, remaining
 
     def get_stats(self):
-        with self._lock:
-            total_identifiers = len(self._requests)
-            total_requests = sum(len(reqs) for reqs in self._requests.values())
+        total_identifiers = 0
+        total_buckets = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total_identifiers += len(shard)
+                total_buckets += sum(len(buckets) for buckets in shard.values())
 
         return {
             "total_identifiers": total_identifiers,
-            "total_requests": total_requests,
+            "total_buckets": total_buckets,
+            "shards": self._shard_count,
         }
 
     def stop(self):
@@ -94,105 +151,310 @@ class InMemoryBackend:
 class RedisBackend:
     """
     Distributed Redis rate limit backend using TTL-based keys and an atomic Lua script.
+
+    Each (identifier, endpoint_type) bucket is one string key holding its
+    GCRA theoretical arrival time; the script mirrors ``gcra_check`` and
+    lets the key expire once the bucket has refilled.
+
+    Stats never walk the keyspace: the script also feeds an hourly
+    HyperLogLog of identifiers and of buckets plus allowed/rejected
+    counters, so ``get_stats`` is a handful of O(1) reads.
+
+    With ``lease_size`` > 1 a check may reserve several tokens in one
+    script call and hand them out locally for up to ``lease_ttl`` seconds,
+    so a hot identifier only reaches Redis once per lease.  Leased tokens
+    are already charged to the shared bucket, so a lease never lets a
+    worker exceed the limit; unused tokens simply expire.  A lease is capped
+    at a tenth of the limit so one worker cannot take a small bucket's whole
+    allowance.
     """
 
+    # Pre-GCRA workers kept ZSETs under "rate_limit:<id>:<type>"; GET on those
+    # raises WRONGTYPE, so the string keys live in their own namespace.
+    KEY_PREFIX = "rate_limit:gcra:"
+    STATS_PREFIX = "rate_limit_stats:"
+    STATS_TTL = 2 * 3600
+
     LUA_RATE_LIMIT = """
     local key = KEYS[1]
     local now = tonumber(ARGV[1])
     local window = tonumber(ARGV[2])
     local max_requests = tonumber(ARGV[3])
-    local endpoint_type = ARGV[4]
-
-    local cutoff = now - window
-    redis.call('ZREMRANGEBYSCORE', key, '-inf', cutoff)
-    local current_requests = redis.call('ZCARD', key)
-
-    if current_requests >= max_requests then
-        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
-        local retry_after = 0
-        if oldest[2] then
-            retry_after = math.max(0, math.floor(window - (now - tonumber(oldest[2])))) + 1
-        else
-            retry_after = math.max(0, math.floor(window)) + 1
-        end
-        return {0, retry_after, 0}
-    else
-        redis.call('ZADD', key, now, now .. ":" .. endpoint_type)
-        redis.call('EXPIRE', key, math.ceil(window))
-        local remaining = max_requests - current_requests - 1
-        return {1, 0, remaining}
+    local lease = tonumber(ARGV[4])
+    local stats_ttl = tonumber(ARGV[7])
+
+    local function count(name)
+        redis.call('INCR', name)
+        redis.call('EXPIRE', name, stats_ttl)
     end
+
+    if max_requests <= 0 then
+        count(KEYS[5])
+        return {0, math.floor(window) + 1, 0, 0}
+    end
+
+    local interval = window / max_requests
+    local tat = tonumber(redis.call('GET', key)) or now
+    local base = math.max(tat - now, 0)
+    local available = math.floor((window - base) / interval + 1e-6)
+
+    if available < 1 then
+        count(KEYS[5])
+        return {0, math.floor(base + interval - window) + 1, 0, 0}
+    end
+
+    local granted = math.min(lease, available)
+    local debt = base + granted * interval
+    redis.call('SET', key, string.format('%.6f', now + debt), 'PX', math.ceil(debt * 1000))
+
+    redis.call('PFADD', KEYS[2], ARGV[5])
+    redis.call('PFADD', KEYS[3], ARGV[6])
+    redis.call('EXPIRE', KEYS[2], stats_ttl)
+    redis.call('EXPIRE', KEYS[3], stats_ttl)
+    count(KEYS[4])
+    return {1, 0, available - granted, granted}
     """
 
-    def __init__(self, redis_url="redis://localhost:6379/0"):
+    def __init__(
+        self,
+        redis_url="redis://localhost:6379/0",
+        lease_size=1,
+        lease_ttl=1.0,
+        **pool_kwargs,
+    ):
+        """
+        ``pool_kwargs`` (e.g. ``max_connections``, ``socket_timeout``,
+        ``socket_connect_timeout``, ``health_check_interval``) are passed
+        to the redis connection pool.
+        """
         if redis is None:
             raise ImportError(
                 "The 'redis' package is required to use the Redis rate limit backend."
             )
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.redis_client = redis.from_url(
+            redis_url, decode_responses=True, **pool_kwargs
+        )
         self._lua_script = self.redis_client.register_script(self.LUA_RATE_LIMIT)
+        self.lease_size = max(1, int(lease_size))
+        self.lease_ttl = lease_ttl
+        # (identifier, endpoint_type) -> [tokens, expires_at, remaining]
+        self._leases = {}
+        self._lease_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            # A forked worker must not spend the parent's leased tokens.
+            os.register_at_fork(after_in_child=self._reset_leases)
+
+    def _reset_leases(self):
+        self._leases = {}
+        self._lease_lock = threading.Lock()
+
+    def _stats_keys(self, current_time):
+        hour = int(current_time // 3600)
+        return [
+            f"{self.STATS_PREFIX}identifiers:{hour}",
+            f"{self.STATS_PREFIX}buckets:{hour}",
+            f"{self.STATS_PREFIX}allowed:{hour}",
+            f"{self.STATS_PREFIX}rejected:{hour}",
+        ]
+
+    def _take_leased(self, bucket, current_time):
+        with self._lease_lock:
+            lease = self._leases.get(bucket)
+            if lease is None:
+                return None
+            if lease[0] <= 0 or lease[1] <= current_time:
+                del self._leases[bucket]
+                return None
+            lease[0] -= 1
+            return True, 0, lease[2] + lease[0]
 
     def check_rate_limit(self, identifier, endpoint_type, max_requests, window):
-        key = f"rate_limit:{identifier}:{endpoint_type}"
+        key = f"{self.KEY_PREFIX}{identifier}:{endpoint_type}"
         current_time = time.time()
-
-        allowed, retry_after, remaining = self._lua_script(
-            keys=[key], args=[current_time, window, max_requests, endpoint_type]
+        bucket = (identifier, endpoint_type)
+
+        lease_size = min(self.lease_size, max(1, max_requests // 10))
+        if lease_size > 1:
+            leased = self._take_leased(bucket, current_time)
+            if leased is not None:
+                return leased
+
+        allowed, retry_after, remaining, granted = self._lua_script(
+            keys=[key] + self._stats_keys(current_time),
+            args=[
+                current_time,
+                window,
+                max_requests,
+                lease_size,
+                identifier,
+                f"{identifier}:{endpoint_type}",
+                self.STATS_TTL,
+            ],
+        )
+        allowed, retry_after, remaining, granted = (
+            bool(allowed),
+            int(retry_after),
+            int(remaining),
+            int(granted),
         )
 
-        return bool(allowed), int(retry_after), int(remaining)
+        if granted > 1:
+            # This request uses one token; keep the rest for this worker.
+            lease_ttl = min(self.lease_ttl, window)
+            with self._lease_lock:
+                if len(self._leases) > 10000:
+                    self._prune_leases(current_time)
+                self._leases[bucket] = [
+                    granted - 1,
+                    current_time + lease_ttl,
+                    remaining,
+                ]
+            remaining += granted - 1
+
+        return allowed, retry_after, remaining
+
+    def _prune_leases(self, current_time):
+        for bucket in [
+            b for b, lease in self._leases.items() if lease[1] <= current_time
+        ]:
+            del self._leases[bucket]
+
+    def prune_stale_entries(self):
+        # Bucket keys expire on their own once their bucket has refilled.
+        with self._lease_lock:
+            self._prune_leases(time.time())
+
+    def clear(self):
+        with self._lease_lock:
+            self._leases.clear()
+        for pattern in (f"{self.KEY_PREFIX}*", f"{self.STATS_PREFIX}*"):
+            keys = list(self.redis_client.scan_iter(pattern, count=1000))
+            if keys:
+                self.redis_client.delete(*keys)
 
     def get_stats(self):
+        """
+        Approximate counts for the current hour: distinct identifiers and
+        buckets that were allowed a request (HyperLogLog, ~1% error), plus
+        allowed and rejected checks.
+        """
+        identifiers_key, buckets_key, allowed_key, rejected_key = self._stats_keys(
+            time.time()
+        )
         try:
-            keys = self.redis_client.keys("rate_limit:*")
-            total_identifiers = len(set(k.split(":")[1] for k in keys))
-            total_requests = sum(self.redis_client.zcard(k) for k in keys)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.pfcount(identifiers_key)
+            pipe.pfcount(buckets_key)
+            pipe.get(allowed_key)
+            pipe.get(rejected_key)
+            total_identifiers, total_buckets, allowed, rejected = pipe.execute()
         except Exception:
-            total_identifiers = 0
-            total_requests = 0
+            total_identifiers = total_buckets = allowed = rejected = 0
+
+        with self._lease_lock:
+            leased_buckets = len(self._leases)
 
         return {
-            "total_identifiers": total_identifiers,
-            "total_requests": total_requests,
+            "total_identifiers": int(total_identifiers or 0),
+            "total_buckets": int(total_buckets or 0),
+            "allowed": int(allowed or 0),
+            "rejected": int(rejected or 0),
+            "leased_buckets": leased_buckets,
         }
 
+    def stop(self):
+        self.redis_client.close()
+
 
 class SQLiteBackend:
     """
     SQLite-based rate limit backend.
     Uses WAL mode for high concurrency support among Gunicorn workers.
+
+    Each thread keeps one open connection (pragmas are applied when it is
+    opened) and a check is a single ``BEGIN IMMEDIATE`` transaction that
+    reads and, if allowed, upserts one row per (identifier, endpoint_type)
+    holding the bucket's GCRA theoretical arrival time (see
+    ``gcra_check``).  The SQL strings are constants, so ``sqlite3``'s
+    per-connection statement cache reuses the prepared statements.  Rows
+    whose bucket has refilled are deleted only by the background cleanup
+    thread.
     """
 
+    BUSY_TIMEOUT_MS = 30000
+
+    _SELECT_SQL = (
+        "SELECT tat FROM rate_limits WHERE identifier = ? AND endpoint_type = ?"
+    )
+    _UPSERT_SQL = (
+        "INSERT INTO rate_limits (identifier, endpoint_type, tat) VALUES (?, ?, ?) "
+        "ON CONFLICT (identifier, endpoint_type) DO UPDATE SET tat = excluded.tat"
+    )
+
     def __init__(self, db_path="backend/rate_limit.db", cleanup_interval=60):
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self._init_db()
         self._cleanup_interval = cleanup_interval
         self._stop_cleanup = threading.Event()
+        self._start_cleanup_thread()
+        # Threads do not survive fork(); restart pruning in each gunicorn
+        # worker when the app is preloaded in the master.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Connections opened in the parent must not be used by the child.
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._start_cleanup_thread()
+
+    def _start_cleanup_thread(self):
+        if self._stop_cleanup.is_set():
+            return
         self._cleanup_thread = threading.Thread(
             target=self._periodic_cleanup, daemon=True
         )
         self._cleanup_thread.start()
 
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
-        conn.execute("PRAGMA journal_mode=WAL")
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly below.
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
         return conn
 
     def _init_db(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with self._get_connection() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS rate_limits (
-                    identifier TEXT,
-                    endpoint_type TEXT,
-                    timestamp REAL
-                )
-            """)
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_rate_limits "
-                "ON rate_limits (identifier, endpoint_type, timestamp)"
-            )
-            conn.commit()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = self._get_connection()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(rate_limits)")]
+        if columns and "tat" not in columns:
+            # Pre-GCRA log of request timestamps; the state is short-lived,
+            # so start the buckets afresh.
+            conn.execute("DROP TABLE rate_limits")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                identifier TEXT NOT NULL,
+                endpoint_type TEXT NOT NULL,
+                tat REAL NOT NULL,
+                PRIMARY KEY (identifier, endpoint_type)
+            ) WITHOUT ROWID
+        """)
 
     def _periodic_cleanup(self):
         while not self._stop_cleanup.wait(self._cleanup_interval):
@@ -202,70 +464,68 @@ class SQLiteBackend:
                 print(f"Error in SQLiteBackend periodic cleanup: {e}")
 
     def prune_stale_entries(self):
-        cutoff = time.time() - 300  # 5 minutes buffer
-        with self._get_connection() as conn:
-            conn.execute("DELETE FROM rate_limits WHERE timestamp < ?", (cutoff,))
-            conn.commit()
+        self._get_connection().execute(
+            "DELETE FROM rate_limits WHERE tat <= ?", (time.time(),)
+        )
 
     def check_rate_limit(self, identifier, endpoint_type, max_requests, window):
-        current_time = time.time()
-        cutoff_time = current_time - window
-
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            # Clean old records for this identifier
-            cursor.execute(
-                "DELETE FROM rate_limits WHERE identifier = ? AND timestamp < ?",
-                (identifier, cutoff_time),
-            )
-
-            # Count requests in window
-            cursor.execute(
-                "SELECT COUNT(*) FROM rate_limits "
-                "WHERE identifier = ? AND endpoint_type = ? AND timestamp > ?",
-                (identifier, endpoint_type, cutoff_time),
-            )
-            current_requests = cursor.fetchone()[0]
-
-            if current_requests >= max_requests:
-                cursor.execute(
-                    "SELECT MIN(timestamp) FROM rate_limits "
-                    "WHERE identifier = ? AND endpoint_type = ? AND timestamp > ?",
-                    (identifier, endpoint_type, cutoff_time),
-                )
-                oldest_timestamp = cursor.fetchone()[0]
-                if oldest_timestamp:
-                    retry_after = int(window - (current_time - oldest_timestamp)) + 1
-                else:
-                    retry_after = int(window) + 1
-                return False, retry_after, 0
-
-            # Insert current request
-            cursor.execute(
-                "INSERT INTO rate_limits (identifier, endpoint_type, timestamp) "
-                "VALUES (?, ?, ?)",
-                (identifier, endpoint_type, current_time),
+        conn = self._get_connection()
+        # Take the write lock up front so concurrent workers cannot both
+        # read the same bucket and then both update it.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current_time = time.time()
+            row = conn.execute(self._SELECT_SQL, (identifier, endpoint_type)).fetchone()
+            allowed, retry_after, remaining, new_tat = gcra_check(
+                row[0] if row else None, current_time, max_requests, window
             )
-            conn.commit()
+            if allowed:
+                conn.execute(self._UPSERT_SQL, (identifier, endpoint_type, new_tat))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
 
-            remaining = max_requests - current_requests - 1
-            return True, 0, remaining
+        return allowed, retry_after, remaining
 
     def get_stats(self):
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(DISTINCT identifier) FROM rate_limits")
-            total_identifiers = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM rate_limits")
-            total_requests = cursor.fetchone()[0]
+        cursor = self._get_connection().cursor()
+        cursor.execute("SELECT COUNT(DISTINCT identifier) FROM rate_limits")
+        total_identifiers = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM rate_limits")
+        total_buckets = cursor.fetchone()[0]
 
         return {
             "total_identifiers": total_identifiers,
-            "total_requests": total_requests,
+            "total_buckets": total_buckets,
         }
 
     def stop(self):
         self._stop_cleanup.set()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+def _redis_pool_kwargs():
+    """Connection pool settings for the rate limiter's Redis client from env."""
+    kwargs = {}
+    for env_name, option, cast in (
+        ("REDIS_MAX_CONNECTIONS", "max_connections", int),
+        ("REDIS_SOCKET_TIMEOUT", "socket_timeout", float),
+        ("REDIS_CONNECT_TIMEOUT", "socket_connect_timeout", float),
+        ("REDIS_HEALTH_CHECK_INTERVAL", "health_check_interval", int),
+    ):
+        value = os.getenv(env_name)
+        if value:
+            kwargs[option] = cast(value)
+    return kwargs
 
 
 class RateLimiter:
@@ -274,16 +534,19 @@ class RateLimiter:
     Implements per-IP and per-endpoint rate limiting using pluggable backends.
     """
 
+    # Rate limit configurations
+    LIMITS = {
+        "default": {"requests": 100, "window": 60},  # 100 req/min
+        "prediction": {"requests": 30, "window": 60},  # 30 req/min
+        "ml_analysis": {"requests": 20, "window": 60},  # 20 req/min
+        "report": {"requests": 10, "window": 60},  # 10 req/min
+        "gemini": {"requests": 5, "window": 3600},  # 5 req/hour for Gemini API
+        "profiler": {"requests": 10, "window": 3600},  # 10 profiles/hour
+    }
+
     def __init__(self):
         """Initialize rate limiter with configured backend selection."""
-        # Rate limit configurations
-        self._limits = {
-            "default": {"requests": 100, "window": 60},  # 100 req/min
-            "prediction": {"requests": 30, "window": 60},  # 30 req/min
-            "ml_analysis": {"requests": 20, "window": 60},  # 20 req/min
-            "report": {"requests": 10, "window": 60},  # 10 req/min
-            "gemini": {"requests": 5, "window": 3600},  # 5 req/hour for Gemini API
-        }
+        self._limits = {name: dict(limit) for name, limit in self.LIMITS.items()}
 
         # Pluggable backend selection
         backend_type = os.getenv("RATE_LIMIT_BACKEND", "in_memory").lower()
@@ -291,7 +554,12 @@ class RateLimiter:
         if backend_type == "redis":
             try:
                 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-                self.backend = RedisBackend(redis_url=redis_url)
+                self.backend = RedisBackend(
+                    redis_url=redis_url,
+                    lease_size=int(os.getenv("RATE_LIMIT_LEASE_SIZE", "1")),
+                    lease_ttl=float(os.getenv("RATE_LIMIT_LEASE_TTL", "1.0")),
+                    **_redis_pool_kwargs(),
+                )
                 print(f"[OK] RateLimiter using Redis backend ({redis_url})")
             except Exception as e:
                 print(
@@ -380,26 +648,75 @@ class SecurityValidator:
     Prevents common attacks like XSS, SQL injection, etc.
     """
 
-    # Dangerous patterns
-    XSS_PATTERNS = [
-        r"<script[^>]*>.*?</script>",
-        r"javascript:",
-        r"on\w+\s*=",
-        r"<iframe[^>]*>",
-    ]
-
-    SQL_PATTERNS = [
-        r"(\bUNION\b.*\bSELECT\b)",
-        r"(\bSELECT\b.*\bFROM\b)",
-        r"(\bINSERT\b.*\bINTO\b)",
-        r"(\bDROP\b.*\bTABLE\b)",
-        r"(\bDELETE\b.*\bFROM\b)",
-    ]
+    # Longest value scanned; anything longer is rejected outright.
+    MAX_INPUT_LENGTH = 16 * 1024
+
+    # Every threat pattern needs one of these (lower-case) literals, so
+    # most inputs are cleared by a few substring checks without any regex.
+    PREFILTER_LITERALS = (
+        "<",
+        "=",
+        "javascript:",
+        "union",
+        "select",
+        "insert",
+        "drop",
+        "delete",
+    )
+
+    # One pass over the input finds, in a single alternation:
+    #   xss  - an opening <script or <iframe tag, or a javascript: URL
+    #   sql  - a SQL keyword (paired up per line below)
+    #   attr - a word followed by "=" (an on...= event handler if it
+    #          contains "on" followed by more letters)
+    # Nothing in it can backtrack across the input: tags are matched on
+    # their opening alone, and attr only starts at word boundaries.
+    THREAT_RE = re.compile(
+        r"(?P<xss><\s*(?:script|iframe)|javascript:)"
+        r"|\b(?P<sql>union|select|insert|drop|delete|from|into|table)\b"
+        r"|\b(?P<attr>\w+)\s*="
+        r"|(?P<newline>\n)",
+        re.IGNORECASE,
+    )
+
+    # SQL keyword -> keywords that must precede it on the same line
+    # (UNION..SELECT, SELECT..FROM, INSERT..INTO, DROP..TABLE, DELETE..FROM).
+    SQL_PAIRS = {
+        "select": ("union",),
+        "from": ("select", "delete"),
+        "into": ("insert",),
+        "table": ("drop",),
+    }
 
     def __init__(self):
         """Initialize security validator."""
         print("[OK] SecurityValidator initialized")
 
+    def _find_threat(self, text):
+        """Return "xss", "sql" or None for ``text``."""
+        lowered = text.lower()
+        if not any(literal in lowered for literal in self.PREFILTER_LITERALS):
+            return None
+
+        sql_found = False
+        seen_keywords = set()
+        for match in self.THREAT_RE.finditer(lowered):
+            kind = match.lastgroup
+            if kind == "xss":
+                return "xss"
+            if kind == "attr":
+                # on\w+\s*= : "on" followed by at least one word character.
+                if "on" in match.group("attr")[:-1]:
+                    return "xss"
+            elif kind == "sql":
+                keyword = match.group("sql")
+                if any(k in seen_keywords for k in self.SQL_PAIRS.get(keyword, ())):
+                    sql_found = True
+                seen_keywords.add(keyword)
+            else:
+                seen_keywords.clear()
+        return "sql" if sql_found else None
+
     def validate_input(self, data, field_name="input"):
         """
         Validate input data for security threats.
@@ -416,15 +733,14 @@ class SecurityValidator:
 
         data_str = str(data)
 
-        # Check for XSS
-        for pattern in self.XSS_PATTERNS:
-            if re.search(pattern, data_str, re.IGNORECASE):
-                return False, f"Potential XSS attack detected in {field_name}"
+        if len(data_str) > self.MAX_INPUT_LENGTH:
+            return False, f"Input too long in {field_name}"
 
-        # Check for SQL injection
-        for pattern in self.SQL_PATTERNS:
-            if re.search(pattern, data_str, re.IGNORECASE):
-                return False, f"Potential SQL injection detected in {field_name}"
+        threat = self._find_threat(data_str)
+        if threat == "xss":
+            return False, f"Potential XSS attack detected in {field_name}"
+        if threat == "sql":
+            return False, f"Potential SQL injection detected in {field_name}"
 
         return True, None
 
@@ -516,6 +832,44 @@ rate_limiter = RateLimiter()
 security_validator = SecurityValidator()
 
 
+def consume_rate_limit(endpoint_type="default"):
+    """
+    Charge one request against a rate limit from inside a view.
+
+    For views that only sometimes reach the limited resource (for example,
+    when a cache hit avoids an upstream API call), so that only the
+    expensive path is charged.
+
+    Returns:
+        Tuple of (429 response or None, remaining)
+    """
+    allowed, retry_after, remaining = rate_limiter.check_rate_limit(endpoint_type)
+    if allowed:
+        return None, remaining
+
+    response = jsonify(
+        {
+            "error": "Rate limit exceeded",
+            "message": f"Too many requests. Please try again in {retry_after} seconds.",
+            "retry_after": retry_after,
+        }
+    )
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    response.headers["X-RateLimit-Remaining"] = "0"
+    return response, 0
+
+
+def add_rate_limit_headers(response, endpoint_type, remaining):
+    """Add X-RateLimit-* headers to a Flask response object."""
+    if hasattr(response, "headers"):
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        response.headers["X-RateLimit-Limit"] = str(
+            rate_limiter._limits[endpoint_type]["requests"]
+        )
+    return response
+
+
 def rate_limit(endpoint_type="default"):
     """
     Decorator for rate limiting endpoints.
@@ -534,34 +888,13 @@ def rate_limit(endpoint_type="default"):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Check rate limit
-            allowed, retry_after, remaining = rate_limiter.check_rate_limit(
-                endpoint_type
-            )
-
-            if not allowed:
-                response = jsonify(
-                    {
-                        "error": "Rate limit exceeded",
-                        "message": f"Too many requests. Please try again in {retry_after} seconds.",
-                        "retry_after": retry_after,
-                    }
-                )
-                response.status_code = 429
-                response.headers["Retry-After"] = str(retry_after)
-                response.headers["X-RateLimit-Remaining"] = "0"
-                return response
+            limited, remaining = consume_rate_limit(endpoint_type)
+            if limited is not None:
+                return limited
 
             # Add rate limit headers
             response = f(*args, **kwargs)
-
-            # Add headers if response is a Flask response object
-            if hasattr(response, "headers"):
-                response.headers["X-RateLimit-Remaining"] = str(remaining)
-                response.headers["X-RateLimit-Limit"] = str(
-                    rate_limiter._limits[endpoint_type]["requests"]
-                )
-
-            return response
+            return add_rate_limit_headers(response, endpoint_type, remaining)
 
         return decorated_function
 
@@ -4,6 +4,8 @@ from typing import Dict, List, Optional
 
 import numpy as np
 
+from backend.services.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -1190,6 +1192,7 @@ class DiseaseMLModel:
 
         return " ".join(parts)
 
+    @timed("model")
     def predict_disease_probability(
         self,
         disease: str,
@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import io
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from backend.middleware import rate_limit
+from backend.services.metrics import phase
+from backend.utils import bayes_engine
+from backend.utils.calculator import BayesCalculator
+
+bayes_bp = Blueprint("bayes", __name__)
+_calculator = BayesCalculator()
+
+MAX_SEQUENCE_TESTS = 50
+
+GRID_DEFAULT_RESOLUTION = 41
+GRID_MAX_RESOLUTION = 101
+
+
+@bayes_bp.route("/api/bayes/batch", methods=["POST"])
+@rate_limit("ml_analysis")
+def bayes_batch():
+    """
+    Compute posteriors for every row of an uploaded CSV.
+
+    Send the CSV as the multipart field "file" or as a text/csv body.
+    Required columns: prior (or prior_probability / prevalence), sensitivity
+    and false_positive_rate (or specificity); test_result is optional.
+    The response is the same CSV with posterior and error columns added,
+    streamed back a chunk at a time.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        # Copied out of the upload (at most MAX_CONTENT_LENGTH), which is
+        # closed when the view returns, before the response has streamed.
+        source = io.BytesIO(upload.read())
+    elif request.mimetype in ("text/csv", "text/plain") and request.content_length:
+        source = io.BytesIO(request.get_data())
+    else:
+        return jsonify({"error": "Upload a CSV file in the 'file' field"}), 400
+
+    chunks = bayes_engine.iter_csv_results(source, bayes_engine.BATCH_CHUNK_ROWS)
+    try:
+        with phase("bayes"):
+            first = next(chunks, None)
+    except bayes_engine.pd.errors.EmptyDataError:
+        return jsonify({"error": "CSV file is empty"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if first is None or first.empty:
+        return jsonify({"error": "CSV file has no rows"}), 400
+
+    def generate():
+        yield first.to_csv(index=False)
+        while True:
+            with phase("bayes"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk.to_csv(index=False, header=False)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=bayes_results.csv"},
+    )
+
+
+@bayes_bp.route("/api/bayes/sequence", methods=["POST"])
+@rate_limit("default")
+def bayes_sequence():
+    """
+    Posterior after several test results, with the update after each one.
+
+    Expected JSON payload:
+    {
+        "prior": 0.1,
+        "tests": [
+            {"name": "ELISA", "result": "positive", "sensitivity": 0.9, "specificity": 0.95},
+            {"result": "negative", "sensitivity": 0.8, "specificity": 0.9, "group": "imaging"}
+        ],
+        "group_mode": "max"
+    }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON payload provided"}), 400
+
+    tests = data.get("tests")
+    if data.get("prior") is None or not isinstance(tests, list) or not tests:
+        return jsonify({"error": "prior and a non-empty tests list are required"}), 400
+    if len(tests) > MAX_SEQUENCE_TESTS:
+        return (
+            jsonify({"error": f"At most {MAX_SEQUENCE_TESTS} tests per request"}),
+            400,
+        )
+    if not all(isinstance(test, dict) for test in tests):
+        return jsonify({"error": "Each test must be an object"}), 400
+
+    try:
+        result = _calculator.calculate_with_test_sequence(
+            data["prior"], tests, data.get("group_mode", "max")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@bayes_bp.route("/api/bayes/grid")
+def bayes_grid():
+    """
+    Quantized posterior surface for the calculator to interpolate locally.
+
+    Query parameters:
+        resolution: points per axis, 2-101 (default 41)
+        test_result: "positive" (default) or "negative"
+        bits: 16 (default) or 8
+        format: "json" (default, base64 data) or "binary" (raw bytes,
+                metadata in X-Grid-* headers)
+
+    Axes are prior, sensitivity and false_positive_rate; point i of each is
+    (i / (resolution - 1)) ** 2 ("quadratic" spacing).  Values are
+    little-endian unsigned integers with prior varying slowest; divide by
+    ``scale`` for the posterior.
+    """
+    resolution = request.args.get("resolution", GRID_DEFAULT_RESOLUTION, type=int)
+    bits = request.args.get("bits", 16, type=int)
+    test_result = request.args.get("test_result", "positive").lower()
+    if resolution is None or not 2 <= resolution <= GRID_MAX_RESOLUTION:
+        return (
+            jsonify(
+                {"error": f"resolution must be between 2 and {GRID_MAX_RESOLUTION}"}
+            ),
+            400,
+        )
+    if bits not in bayes_engine.GRID_DTYPES:
+        return jsonify({"error": "bits must be 8 or 16"}), 400
+    if test_result not in ("positive", "negative"):
+        return jsonify({"error": 'test_result must be "positive" or "negative"'}), 400
+
+    with phase("bayes"):
+        data = bayes_engine.posterior_grid(resolution, test_result == "positive", bits)
+    meta = {
+        "resolution": resolution,
+        "bits": bits,
+        "scale": (1 << bits) - 1,
+        "axes": list(bayes_engine.GRID_AXES),
+        "spacing": "quadratic",
+        "test_result": test_result,
+    }
+    etag = hashlib.sha256(data).hexdigest()[:32]
+
+    if request.args.get("format") == "binary":
+        response = Response(data, mimetype="application/octet-stream")
+        response.headers.update(
+            {
+                "X-Grid-Resolution": str(resolution),
+                "X-Grid-Bits": str(bits),
+                "X-Grid-Scale": str(meta["scale"]),
+                "X-Grid-Axes": ",".join(bayes_engine.GRID_AXES),
+                "X-Grid-Spacing": "quadratic",
+            }
+        )
+    else:
+        response = jsonify(
+            {
+                **meta,
+                "encoding": "base64",
+                "data": base64.b64encode(data).decode("ascii"),
+            }
+        )
+
+    # The surface never changes for given parameters.
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
@@ -1,7 +1,13 @@
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from backend.middleware import rate_limit
 
-from backend.utils.gemini_helper import generate_chat_response
+from backend.utils.gemini_helper import (
+    generate_chat_response,
+    get_client,
+    stream_chat_response,
+)
 
 chat_bp = Blueprint("chat", __name__)
 
@@ -47,3 +53,67 @@ def chat():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+def _sse(data: dict, event: str = None) -> str:
+    """Format one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@chat_bp.route("/api/chat/stream", methods=["POST"])
+@rate_limit("gemini")
+def chat_stream():
+    """
+    Streaming variant of /api/chat using server-sent events.
+
+    Same payload as /api/chat. The response is ``text/event-stream``:
+    ``data: {"delta": "..."}`` for each chunk of the reply, then
+    ``event: done``, or ``event: error`` with ``{"error", "response"}``.
+    """
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    messages = data.get("messages")
+
+    if not messages or not isinstance(messages, list):
+        return jsonify({"error": "Message cannot be empty"}), 400
+
+    try:
+        get_client()
+    except ValueError as ve:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": str(ve),
+                    "response": "Configuration Error: API key missing.",
+                }
+            ),
+            500,
+        )
+
+    def events():
+        # Flush headers right away, before Gemini sends its first chunk.
+        yield ": stream open\n\n"
+        try:
+            for text in stream_chat_response(messages):
+                yield _sse({"delta": text})
+        except Exception as e:
+            yield _sse(
+                {
+                    "error": str(e),
+                    "response": "I'm having trouble connecting right now. Please try again later.",
+                },
+                event="error",
+            )
+            return
+        yield _sse({}, event="done")
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,5 @@
-import csv
 import io
 import html
-import os
 import re
 from datetime import datetime
 
@@ -13,11 +11,21 @@ from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
-from backend.middleware import rate_limit
+from backend.middleware import add_rate_limit_headers, consume_rate_limit
 from backend.models.ml_model import ml_model
 from backend.services.history_service import save_history
+from backend.services.preset_repository import presets
+from backend.services.recommendation_cache import (
+    get_recommendation_cache,
+    make_recommendation_key,
+    recommendation_flight,
+    round_probability,
+)
 from backend.utils.calculator import bayesian_survival
-from backend.utils.gemini_helper import generate_recommendations
+from backend.utils.gemini_helper import (
+    RECOMMENDATION_PROMPT_VERSION,
+    generate_recommendations,
+)
 from backend.utils.tts_helper import generate_tts_audio
 from backend.utils.validators import AILanguageSchema
 from marshmallow import ValidationError
@@ -47,23 +55,14 @@ def _sanitize_name(value: str) -> str:
     return value[:MAX_DISEASE_NAME_LENGTH]
 
 
-def get_project_root():
-    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-
 def load_diseases():
-    csv_path = os.path.join(get_project_root(), "hospital_data.csv")
-    diseases = []
     try:
-        with open(csv_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            diseases = [row["disease"] for row in reader]
-        print(f"Loaded {len(diseases)} diseases from CSV")
+        return presets.names()
     except FileNotFoundError:
-        print(f"Error: hospital_data.csv not found at {csv_path}")
+        print(f"Error: hospital_data.csv not found at {presets.csv_path}")
     except Exception as e:
         print(f"Error loading diseases: {e}")
-    return diseases
+    return []
 
 
 @disease_bp.route("/")
@@ -91,31 +90,26 @@ def preset():
         return jsonify({"error": "Invalid disease name"}), 400
 
     try:
-        csv_path = os.path.join(get_project_root(), "hospital_data.csv")
-
-        with open(csv_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if row["disease"].lower() == disease_name.lower():
-                    p_d = float(row["prior_probability"])
-                    sensitivity = float(row["sensitivity"])
-                    false_pos = 1.0 - float(row["specificity"])
-
-                    try:
-                        p_d_given_pos = bayesian_survival(p_d, sensitivity, false_pos)
-                    except ValueError as e:
-                        return jsonify({"error": str(e)}), 400
-
-                    return jsonify(
-                        {
-                            "p_d_given_pos": round(p_d_given_pos, 4),
-                            "prior": p_d,
-                            "sensitivity": sensitivity,
-                            "falsePositive": false_pos,
-                        }
-                    )
-
-        return jsonify({"error": "Disease not found in preset data"}), 404
+        row = presets.get(disease_name)
+        if row is None:
+            return jsonify({"error": "Disease not found in preset data"}), 404
+
+        p_d = row["prior"]
+        sensitivity = row["sensitivity"]
+        false_pos = row["false_positive"]
+        try:
+            p_d_given_pos = bayesian_survival(p_d, sensitivity, false_pos)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(
+            {
+                "p_d_given_pos": round(p_d_given_pos, 4),
+                "prior": p_d,
+                "sensitivity": sensitivity,
+                "falsePositive": false_pos,
+            }
+        )
 
     except FileNotFoundError:
         return jsonify({"error": "Hospital data file not found"}), 500
@@ -217,8 +211,9 @@ def contact():
 
 
 @disease_bp.route("/gemini-recommendations", methods=["POST"])
-@rate_limit("gemini")
 def gemini_recommendations():
+    # Rate limited inside: only requests that reach Gemini spend the
+    # "gemini" budget; cache hits and coalesced duplicates are free.
     data = request.json
     try:
         disease_name = _sanitize_name(data.get("disease_name") or "")
@@ -249,15 +244,60 @@ def gemini_recommendations():
                 400,
             )
 
-        result = generate_recommendations(
-            disease_name=disease_name or None,
-            prior_probability=prior_probability,
-            posterior_probability=posterior_probability,
-            test_result=test_result,
-            language=language,
+        prior_key = round_probability(prior_probability)
+        posterior_key = round_probability(posterior_probability)
+        key = make_recommendation_key(
+            disease_name,
+            prior_key,
+            posterior_key,
+            test_result,
+            language,
+            RECOMMENDATION_PROMPT_VERSION,
         )
-
-        return jsonify(result)
+        cache = get_recommendation_cache()
+        echo = {
+            "prior_probability": prior_probability,
+            "posterior_probability": posterior_probability,
+        }
+
+        cached = cache.get(key)
+        if cached is not None:
+            return jsonify({**cached, **echo, "cached": True})
+
+        def fetch():
+            # A call for this key may have finished since the lookup above.
+            hit = cache.get(key)
+            if hit is not None:
+                return hit, None, None
+            limited, remaining = consume_rate_limit("gemini")
+            if limited is not None:
+                return None, limited, None
+            result = generate_recommendations(
+                disease_name=disease_name or None,
+                prior_probability=prior_key,
+                posterior_probability=posterior_key,
+                test_result=test_result,
+                language=language,
+            )
+            if result.get("success"):
+                cache.set(key, result)
+            return result, None, remaining
+
+        while True:
+            (result, limited, remaining), shared = recommendation_flight.do(key, fetch)
+            if limited is None:
+                break
+            if not shared:
+                return limited
+            # The request we joined was over its own client's limit; try
+            # again on ours.
+        if shared:
+            remaining = None  # served by another request's upstream call
+
+        response = jsonify({**result, **echo, "cached": remaining is None})
+        if remaining is not None:
+            add_rate_limit_headers(response, "gemini", remaining)
+        return response
 
     except ValueError as e:
         return (
@@ -0,0 +1,26 @@
+import hmac
+import os
+
+from flask import Blueprint, Response, abort, request
+
+from backend.services import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+def prometheus_metrics():
+    """Latency histograms in the Prometheus text format (METRICS_ENABLED=1)."""
+    if not metrics.is_enabled():
+        abort(404)
+
+    # Optional shared secret for scrapers outside the private network.
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(401)
+
+    return Response(
+        metrics.collect(), mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,24 +1,50 @@
 # Suppress numpy warnings
+import base64
+import io
 import os
 import tempfile  # NEW: needed to save upload to disk for Grad-CAM
+import threading
 import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import tensorflow as tf
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, make_response, request, url_for
 from flask_login import current_user, login_required
-from PIL import Image
 from backend.middleware import rate_limit
 
 from backend.services.history_service import save_history
-from backend.utils.gradcam import generate_gradcam_overlay  # NEW
-from backend.utils.gradcam import generate_tflite_scorecam_overlay
+from backend.services.inference_batcher import (
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MAX_LATENCY_MS,
+    MicroBatcher,
+)
+from backend.services.metrics import phase, timed
+from backend.services.interpreter_pool import (
+    DEFAULT_NUM_THREADS,
+    DEFAULT_POOL_SIZE,
+    InterpreterPool,
+)
+from backend.services.prediction_cache import get_prediction_cache, make_cache_key
+from backend.utils.gradcam import (  # NEW
+    compute_gradcam_heatmap,
+    compute_tflite_scorecam_heatmap,
+    encode_image,
+    heatmap_to_uint8,
+    render_heatmap_images,
+)
+from backend.utils.augmentation import MAX_TTA_VIEWS, aggregate_tta, build_tta_batch
+from backend.utils.image_preprocessing import load_resnet50_input
+from backend.utils.lazy_import import LazyModule
 
 from functools import wraps
 from flask import jsonify, request
 from flask_login import current_user
 
-# Import TensorFlow models
+# TensorFlow is imported when the first model is loaded (first image request,
+# or preload_models under gunicorn), so workers that never serve /predict do
+# not pay its import time or memory.
+tf = LazyModule("tensorflow")
 
 
 warnings.filterwarnings("ignore", category=FutureWarning, message=".*np.object.*")
@@ -35,13 +61,26 @@ predict_disease_type_bp = Blueprint("disease-type", __name__)
 # CONFIG
 BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Eye model serving format: "keras" (default) or "tflite" for an artifact
+# produced by convert_eye_model.py.  Grad-CAM always uses the Keras model
+# ("keras_path"), which is then only loaded when a heatmap is generated.
+EYE_MODEL_FORMAT = os.getenv("EYE_MODEL_FORMAT", "keras").lower()
+EYE_KERAS_PATH = os.path.join(
+    BACKEND_DIR, "models", "resnet50_models", "eye_disease_resnet50_fp16.keras"
+)
+EYE_TFLITE_PATH = os.getenv(
+    "EYE_TFLITE_PATH",
+    os.path.join(
+        BACKEND_DIR, "models", "resnet50_models", "eye_disease_resnet50_dynamic.tflite"
+    ),
+)
+
 # Add any new disease types models here
 MODEL_CONFIG = {
     "eyes": {
-        "format": "keras",
-        "path": os.path.join(
-            BACKEND_DIR, "models", "resnet50_models", "eye_disease_resnet50_fp16.keras"
-        ),
+        "format": EYE_MODEL_FORMAT,
+        "path": EYE_TFLITE_PATH if EYE_MODEL_FORMAT == "tflite" else EYE_KERAS_PATH,
+        "keras_path": EYE_KERAS_PATH,
         "class_names": [
             "Cataract",
             "Diabetic Retinopathy",
@@ -73,13 +112,29 @@ MODEL_CONFIG = {
 }
 
 # Model caches
+# TFLITE_MODEL_CACHE maps model type -> InterpreterPool; interpreters are not
+# thread-safe, so each forward pass checks one out exclusively.  Pool size and
+# threads per interpreter come from TFLITE_POOL_SIZE / TFLITE_NUM_THREADS, or
+# per model via "pool_size" / "num_threads" in MODEL_CONFIG.
 KERAS_MODEL_CACHE = {}
 TFLITE_MODEL_CACHE = {}
 CACHE_INITIALIZED = False
 
+# One MicroBatcher per model type, created on first inference.
+# Batch size and latency budget come from INFERENCE_MAX_BATCH_SIZE /
+# INFERENCE_MAX_LATENCY_MS, or per model via "max_batch_size" /
+# "max_latency_ms" in MODEL_CONFIG.
+INFERENCE_BATCHERS = {}
+
 # Confidence threshold for eliminating low-confidence predictions (can be adjusted or made dynamic)
 CONFIDENCE_THRESHOLD = 0.60
 
+# Test-time augmentation (opt-in per request with "tta"): number of views
+# scored in one batch, and the share of views that must agree with the final
+# class before the result is flagged as low confidence.
+TTA_DEFAULT_VIEWS = int(os.getenv("TTA_VIEWS", "6"))
+TTA_MIN_AGREEMENT = float(os.getenv("TTA_MIN_AGREEMENT", "0.6"))
+
 
 def _initialize_model_cache():
     """
@@ -109,7 +164,9 @@ def _initialize_model_cache():
 # loads keras model in the KERAS_MODEL_CACHE (for eye disease prediction)
 def load_keras_model(model_type):
     if model_type not in KERAS_MODEL_CACHE:
-        path = MODEL_CONFIG[model_type]["path"]
+        config = MODEL_CONFIG[model_type]
+        # A TFLite-served model keeps its Keras original for Grad-CAM.
+        path = config["path"] if config["format"] == "keras" else config["keras_path"]
         print(f"[MODEL_LOAD] Loading Keras model from disk: {model_type} ({path})")
 
         if not os.path.exists(path):
@@ -122,7 +179,23 @@ def load_keras_model(model_type):
     return KERAS_MODEL_CACHE[model_type]
 
 
-# loads tflite model in the TFLITE_MODEL_CACHE(for skin disease prediction)
+def _create_tflite_interpreter(model_type):
+    """Build one allocated interpreter for ``model_type``'s pool."""
+    config = MODEL_CONFIG[model_type]
+    interpreter = tf.lite.Interpreter(
+        model_path=config["path"],
+        num_threads=config.get("num_threads", DEFAULT_NUM_THREADS),
+    )
+    interpreter.allocate_tensors()
+    return {
+        "interpreter": interpreter,
+        "input_details": interpreter.get_input_details(),
+        "output_details": interpreter.get_output_details(),
+        "batch_size": 1,
+    }
+
+
+# loads the tflite interpreter pool in the TFLITE_MODEL_CACHE (for skin disease prediction)
 def load_tflite_model(model_type):
     if model_type not in TFLITE_MODEL_CACHE:
         path = MODEL_CONFIG[model_type]["path"]
@@ -131,59 +204,138 @@ def load_tflite_model(model_type):
         if not os.path.exists(path):
             raise FileNotFoundError(f"Model not found: {path}")
 
-        interpreter = tf.lite.Interpreter(model_path=path)
-        interpreter.allocate_tensors()
+        pool = InterpreterPool(
+            factory=lambda: _create_tflite_interpreter(model_type),
+            size=MODEL_CONFIG[model_type].get("pool_size", DEFAULT_POOL_SIZE),
+            name=model_type,
+        )
+        # Build the first interpreter now so a broken model fails at load time.
+        pool.prefill(1)
 
-        TFLITE_MODEL_CACHE[model_type] = {
-            "interpreter": interpreter,
-            "input_details": interpreter.get_input_details(),
-            "output_details": interpreter.get_output_details(),
-        }
+        TFLITE_MODEL_CACHE.setdefault(model_type, pool)
         print(f"[MODEL_LOAD] TFLite model loaded and cached: {model_type}")
     else:
         print(f"[MODEL_CACHE_HIT] TFLite model {model_type} served from cache")
     return TFLITE_MODEL_CACHE[model_type]
 
 
-# preprocesses image for model input
-def preprocess_image(file, model_type):
-    config = MODEL_CONFIG[model_type]
-    size = config["img_size"]
+# Per-thread model input buffers, reused by successive requests on a thread.
+_INPUT_BUFFERS = threading.local()
 
-    img = Image.open(file).convert("RGB")
-    img = img.resize(size)
 
-    img_array = np.array(img, dtype=np.float32)
-    img_array = np.expand_dims(img_array, axis=0)
+def _input_buffer(model_type):
+    """Return this thread's reusable (1, H, W, 3) float32 input for ``model_type``."""
+    buffers = getattr(_INPUT_BUFFERS, "by_type", None)
+    if buffers is None:
+        buffers = _INPUT_BUFFERS.by_type = {}
+    if model_type not in buffers:
+        width, height = MODEL_CONFIG[model_type]["img_size"]
+        buffers[model_type] = np.empty((1, height, width, 3), dtype=np.float32)
+    return buffers[model_type]
+
+
+# preprocesses image for model input
+@timed("preprocess")
+def preprocess_image(file, model_type, out=None):
+    """
+    Decode, resize and ResNet-normalise an upload (works for both models).
 
-    # ResNet-style normalization (works for both models)
-    img_array = tf.keras.applications.resnet50.preprocess_input(img_array)
+    JPEGs are downscaled during decoding and EXIF orientation is applied; see
+    backend/utils/image_preprocessing.py.  Pass ``out`` to write into an
+    existing (1, H, W, 3) float32 buffer instead of allocating one.
+    """
+    img_array, _ = load_resnet50_input(
+        file, MODEL_CONFIG[model_type]["img_size"], out=out
+    )
     return img_array
 
 
-# runs and predicts output for keras model
-def run_keras_inference(model_type, img_array):
+def _keras_forward(model_type, batch):
+    """Run one batched forward pass through the cached Keras model."""
     model = load_keras_model(model_type)
-    preds = model.predict(img_array)[0]
-    return preds
+    # Calling the model directly skips the per-call tf.data / callback setup
+    # that Model.predict() performs, which dominates for small batches.
+    return np.asarray(model(batch, training=False))
 
 
-# runs and predicts output for tflite model
-def run_tflite_inference(model_type, img_array):
-    model_data = load_tflite_model(model_type)
-    interpreter = model_data["interpreter"]
-    input_details = model_data["input_details"]
-    output_details = model_data["output_details"]
+def _tflite_forward(model_type, batch):
+    """Run one batched forward pass on an interpreter checked out of the pool."""
+    pool = load_tflite_model(model_type)
 
     # Handle INT8 vs float model
     if MODEL_CONFIG[model_type].get("dtype") == "uint8":
-        img_array = img_array.astype(np.uint8)
+        batch = batch.astype(np.uint8)
+
+    with pool.checkout() as model_data:
+        interpreter = model_data["interpreter"]
+        input_index = model_data["input_details"][0]["index"]
+        output_index = model_data["output_details"][0]["index"]
+
+        # TFLite models are exported with a fixed batch dimension of 1, so
+        # resize the input tensor whenever the batch size changes.
+        if model_data["batch_size"] != batch.shape[0]:
+            interpreter.resize_tensor_input(input_index, list(batch.shape))
+            interpreter.allocate_tensors()
+            model_data["batch_size"] = batch.shape[0]
+
+        interpreter.set_tensor(input_index, batch)
+        interpreter.invoke()
+
+        # Copy out before checkin: get_tensor may alias the interpreter's buffer.
+        return np.array(interpreter.get_tensor(output_index))
+
+
+def _get_batcher(model_type):
+    """Return the MicroBatcher that fronts ``model_type``'s forward pass."""
+    batcher = INFERENCE_BATCHERS.get(model_type)
+    if batcher is None:
+        if MODEL_CONFIG[model_type]["format"] == "keras":
+            forward = _keras_forward
+            workers = 1
+        else:
+            forward = _tflite_forward
+            # One batch in flight per pooled interpreter.
+            workers = MODEL_CONFIG[model_type].get("pool_size", DEFAULT_POOL_SIZE)
+        batcher = MicroBatcher(
+            run_batch=lambda batch: forward(model_type, batch),
+            max_batch_size=MODEL_CONFIG[model_type].get(
+                "max_batch_size", DEFAULT_MAX_BATCH_SIZE
+            ),
+            max_latency_ms=MODEL_CONFIG[model_type].get(
+                "max_latency_ms", DEFAULT_MAX_LATENCY_MS
+            ),
+            name=model_type,
+            workers=workers,
+        )
+        batcher = INFERENCE_BATCHERS.setdefault(model_type, batcher)
+    return batcher
+
+
+def get_interpreter_pool_stats():
+    """Checkout and wait metrics for every TFLite interpreter pool."""
+    return {
+        model_type: pool.get_stats() for model_type, pool in TFLITE_MODEL_CACHE.items()
+    }
+
 
-    interpreter.set_tensor(input_details[0]["index"], img_array)
-    interpreter.invoke()
+def get_batching_stats():
+    """Queue depth and batch fill metrics for every active batcher."""
+    return {
+        model_type: batcher.get_stats()
+        for model_type, batcher in INFERENCE_BATCHERS.items()
+    }
 
-    preds = interpreter.get_tensor(output_details[0]["index"])[0]
-    return preds
+
+# runs and predicts output for keras model
+@timed("model")
+def run_keras_inference(model_type, img_array):
+    return _get_batcher(model_type).submit(img_array[0])
+
+
+# runs and predicts output for tflite model
+@timed("model")
+def run_tflite_inference(model_type, img_array):
+    return _get_batcher(model_type).submit(img_array[0])
 
 
 # Magic bytes for the image formats the models accept.
@@ -210,6 +362,276 @@ def _validate_image_magic(stream) -> bool:
         return True
     return False
 
+def _model_version(model_type):
+    """
+    Identify the weights behind ``model_type`` for cache keys.
+
+    Uses an explicit "version" from MODEL_CONFIG when present, otherwise the
+    model file's size and mtime, so replacing the file invalidates old entries.
+    """
+    config = MODEL_CONFIG[model_type]
+    if config.get("version"):
+        return str(config["version"])
+    try:
+        stat = os.stat(config["path"])
+    except OSError:
+        return "missing"
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _classify(model_type, preds):
+    """Turn one image's class probabilities into the prediction fields."""
+    config = MODEL_CONFIG[model_type]
+
+    # 3. Get predicted class and confidence
+    idx = int(np.argmax(preds))
+    confidence = float(preds[idx])
+    predicted_class = config["class_names"][idx]
+
+    print(f"Prediction: {predicted_class}, " f"Confidence: {confidence:.4f}")
+
+    # Flag low-confidence predictions instead of treating them as invalid requests.
+    low_confidence = confidence < CONFIDENCE_THRESHOLD
+
+    warning_message = None
+    if low_confidence:
+        warning_message = (
+            "Prediction confidence is low. "
+            "Please upload a clearer medical image for a more reliable result."
+        )
+
+    return {
+        "class_index": idx,
+        "prediction": predicted_class,
+        "confidence": confidence,
+        "low_confidence": low_confidence,
+        "warning": warning_message,
+    }
+
+
+def _explain(model_type, class_index, img_path=None, preprocessed=None):
+    """
+    Build the Grad-CAM / Score-CAM heatmap for ``class_index``.
+
+    ``img_path`` must be a server-side file; uploads that are only held in
+    memory pass their decoded ``preprocessed`` arrays instead.
+
+    Returns the cacheable ``heatmap`` / ``image`` / ``explanation_method``
+    fields; all None if generation failed.
+    """
+    config = MODEL_CONFIG[model_type]
+
+    # 4. NEW: Generate Grad-CAM / Score-CAM heatmap
+    # Only the low-resolution uint8 heatmap and the resized input are kept;
+    # colouring, blending and encoding happen per response format.
+    heatmap = None
+    image = None
+    explanation_method = None
+
+    try:
+        if config["format"] == "keras" or config.get("keras_path"):
+            # Eye model → Grad-CAM using the cached Keras model (also when the
+            # predictions come from a converted TFLite artifact)
+            keras_model = load_keras_model(model_type)
+            raw_heatmap, original_img = compute_gradcam_heatmap(
+                model=keras_model,
+                img_path=img_path,
+                class_index=class_index,
+                target_size=config["img_size"],
+                preprocessed=preprocessed,
+            )
+            explanation_method = "grad-cam"
+
+        else:
+            # Skin model → Score-CAM using the .tflite file path
+            raw_heatmap, original_img = compute_tflite_scorecam_heatmap(
+                tflite_path=config["path"],
+                img_path=img_path,
+                class_index=class_index,
+                target_size=config["img_size"],
+                preprocessed=preprocessed,
+            )
+            explanation_method = "score-cam"
+
+        heatmap = _pack_array(heatmap_to_uint8(raw_heatmap))
+        image = _pack_array(original_img)
+
+    except Exception as cam_err:
+        import traceback
+
+        print(f"[Grad-CAM] Warning: heatmap generation failed: {cam_err}")
+        traceback.print_exc()
+
+    return {
+        "heatmap": heatmap,
+        "image": image,
+        "explanation_method": explanation_method,
+    }
+
+
+def _run_prediction(img_path, model_type, tta_views=0):
+    """
+    Classify the image at ``img_path`` and build its explanation heatmap.
+
+    With ``tta_views`` > 1 the image is scored as that many augmented views
+    in a single batched forward pass; see backend/utils/augmentation.py.
+    """
+    config = MODEL_CONFIG[model_type]
+
+    if tta_views > 1:
+        return _run_tta_prediction(img_path, model_type, tta_views)
+
+    # 1. Preprocess image
+    # The buffer is free again once inference returns, because the
+    # batcher copies inputs into its own stacked batch.
+    img_array = preprocess_image(img_path, model_type, out=_input_buffer(model_type))
+
+    # 2. Run inference model to get predictions
+    if config["format"] == "keras":
+        preds = run_keras_inference(model_type, img_array)
+    else:
+        preds = run_tflite_inference(model_type, img_array)
+
+    result = _classify(model_type, preds)
+    result.update(_explain(model_type, result.pop("class_index"), img_path))
+    return result
+
+
+def _run_tta_prediction(img_path, model_type, tta_views):
+    """Score ``tta_views`` augmented views as one batch and combine them."""
+    with phase("preprocess"):
+        img_array, rgb = load_resnet50_input(
+            img_path, MODEL_CONFIG[model_type]["img_size"]
+        )
+
+    preds = _batch_forward(model_type, build_tta_batch(rgb, tta_views))
+    tta = aggregate_tta(preds)
+
+    result = _classify(model_type, tta.pop("probabilities"))
+    result["tta"] = {
+        "views": tta["views"],
+        "agreement": round(tta["agreement"], 4),
+        "variance": round(tta["variance"], 6),
+    }
+    # Views that disagree are a second uncertainty signal, independent of
+    # how confident the averaged prediction looks.
+    if tta["agreement"] < TTA_MIN_AGREEMENT and not result["low_confidence"]:
+        result["low_confidence"] = True
+        result["warning"] = (
+            "The model's prediction changes across slightly rotated or flipped "
+            "copies of this image. Please upload a clearer medical image for a "
+            "more reliable result."
+        )
+
+    # The heatmap explains the unaugmented view, reusing the decoded image.
+    result.update(
+        _explain(
+            model_type,
+            result.pop("class_index"),
+            img_path,
+            preprocessed=(img_array, rgb),
+        )
+    )
+    return result
+
+
+def _requested_tta_views():
+    """
+    Parse the "tta" form/query field into a view count (0 = off).
+
+    "1", "true" or "yes" use TTA_VIEWS; a number from 2 to MAX_TTA_VIEWS
+    picks the view count.  Raises ValueError for anything else.
+    """
+    value = (request.form.get("tta") or request.args.get("tta") or "").lower()
+    if value in ("", "0", "false", "no"):
+        return 0
+    if value in ("1", "true", "yes"):
+        return max(2, min(TTA_DEFAULT_VIEWS, MAX_TTA_VIEWS))
+    views = int(value)
+    if not 2 <= views <= MAX_TTA_VIEWS:
+        raise ValueError(value)
+    return views
+
+
+# Heatmap delivery formats accepted in the "heatmap_format" request field:
+#   png  – base64 PNG overlay + heatmap inline in the JSON (default, legacy)
+#   raw  – the low-resolution uint8 heatmap only; the client colourises and
+#          blends it itself, so the server skips colormap, blend and encode
+#   url  – URLs to /predict/heatmap/<key>/<kind>, rendered on first fetch
+#          and cacheable by the browser.  The entry lives in the prediction
+#          cache, so multi-worker deployments need a shared CACHE_TYPE.
+HEATMAP_FORMATS = ("png", "raw", "url")
+HEATMAP_KINDS = ("overlay", "heatmap")
+HEATMAP_IMAGE_TYPES = {"webp": "image/webp", "png": "image/png"}
+HEATMAP_MAX_AGE = 3600
+
+
+def _requested_heatmap_format():
+    return (
+        request.form.get("heatmap_format")
+        or request.args.get("heatmap_format")
+        or "png"
+    ).lower()
+
+
+def _invalid_heatmap_format(heatmap_format):
+    return (
+        jsonify(
+            {
+                "error": f"Invalid heatmap_format '{heatmap_format}'. Use one of: {list(HEATMAP_FORMATS)}"
+            }
+        ),
+        400,
+    )
+
+
+def _pack_array(arr):
+    """Store a uint8 array as bytes + shape (cache-friendly, pickles cheaply)."""
+    arr = np.ascontiguousarray(arr, dtype=np.uint8)
+    return {"shape": list(arr.shape), "data": arr.tobytes()}
+
+
+def _unpack_array(packed):
+    return np.frombuffer(packed["data"], dtype=np.uint8).reshape(packed["shape"])
+
+
+@timed("serialize")
+def _render_heatmap(result, kind, image_type="png"):
+    """Colourise and blend a cached result's heatmap; returns encoded bytes."""
+    overlay, coloured = render_heatmap_images(
+        _unpack_array(result["heatmap"]), _unpack_array(result["image"])
+    )
+    return encode_image(overlay if kind == "overlay" else coloured, image_type)
+
+
+def _heatmap_payload(result, heatmap_format, cache_key):
+    """Build the heatmap fields of a /predict response in the requested format."""
+    payload = {
+        "gradcam_overlay": None,
+        "gradcam_heatmap": None,
+        "explanation_method": result["explanation_method"],
+    }
+    if result["heatmap"] is None:
+        return payload
+
+    if heatmap_format == "raw":
+        payload["gradcam_raw"] = {
+            "shape": result["heatmap"]["shape"],
+            "dtype": "uint8",
+            "data": base64.b64encode(result["heatmap"]["data"]).decode("ascii"),
+        }
+    elif heatmap_format == "url":
+        for kind in HEATMAP_KINDS:
+            payload[f"gradcam_{kind}_url"] = url_for(
+                "disease-type.predict_heatmap", cache_key=cache_key, kind=kind
+            )
+    else:
+        for kind in HEATMAP_KINDS:
+            encoded = base64.b64encode(_render_heatmap(result, kind)).decode("utf-8")
+            payload[f"gradcam_{kind}"] = f"data:image/png;base64,{encoded}"
+    return payload
+
+
 # Custom decorator to require login for API routes, returning JSON error if not authenticated
 def api_login_required(view):
     @wraps(view)
@@ -279,6 +701,22 @@ def predict():
 
     print("model_type: ", model_type)
 
+    heatmap_format = _requested_heatmap_format()
+    if heatmap_format not in HEATMAP_FORMATS:
+        return _invalid_heatmap_format(heatmap_format)
+
+    try:
+        tta_views = _requested_tta_views()
+    except ValueError:
+        return (
+            jsonify(
+                {
+                    "error": f"Invalid tta value. Use true/false or a view count from 2 to {MAX_TTA_VIEWS}."
+                }
+            ),
+            400,
+        )
+
     if model_type not in MODEL_CONFIG:
         return (
             jsonify(
@@ -289,92 +727,44 @@ def predict():
             400,
         )
 
-    print(model_type not in MODEL_CONFIG)
-
     try:
-        from werkzeug.utils import secure_filename
-
-        # NEW: Save the upload to a temp file on disk so Grad-CAM can read
-        # it by path (PIL.open from a stream can only be read once).
-        suffix = ".jpg"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            image_file.save(tmp)
-            tmp_path = tmp.name
-
-        try:
-            with tmp:
-                image_file.save(tmp)
-
-            # 1. Preprocess image
-            img_array = preprocess_image(tmp_path, model_type)
-
-            # 2. Run inference model to get predictions
-            if MODEL_CONFIG[model_type]["format"] == "keras":
-                preds = run_keras_inference(model_type, img_array)
-            else:
-                preds = run_tflite_inference(model_type, img_array)
-
-            # 3. Get predicted class and confidence
-            idx = int(np.argmax(preds))
-            confidence = float(preds[idx])
-            predicted_class = MODEL_CONFIG[model_type]["class_names"][idx]
-
-            print(f"Prediction: {predicted_class}, " f"Confidence: {confidence:.4f}")
-
-            # Flag low-confidence predictions instead of treating them as invalid requests.
-            low_confidence = confidence < CONFIDENCE_THRESHOLD
-
-            warning_message = None
-            if low_confidence:
-                warning_message = (
-                    "Prediction confidence is low. "
-                    "Please upload a clearer medical image for a more reliable result."
-                )
-
-            # 4. NEW: Generate Grad-CAM / Score-CAM heatmap
-            gradcam_overlay = None
-            gradcam_heatmap = None
-            explanation_method = None
+        image_bytes = image_file.stream.read()
+        image_file.stream.seek(0)
+
+        # Identical uploads scored by the same model build are served from
+        # the content-hash cache without decoding, inference or Grad-CAM.
+        cache = get_prediction_cache()
+        model_version = _model_version(model_type)
+        if tta_views:
+            model_version += f"+tta{tta_views}"
+        cache_key = make_cache_key(image_bytes, model_type, model_version)
+        result = cache.get(cache_key)
+        cached = result is not None
+
+        if not cached:
+            # NEW: Save the upload to a temp file on disk so Grad-CAM can read
+            # it by path (PIL.open from a stream can only be read once).
+            suffix = ".jpg"
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp.write(image_bytes)
+                tmp_path = tmp.name
 
             try:
-                config = MODEL_CONFIG[model_type]
-
-                if config["format"] == "keras":
-                    # Eye model → Grad-CAM using the cached Keras model
-                    keras_model = load_keras_model(model_type)
-                    gradcam_overlay, gradcam_heatmap = generate_gradcam_overlay(
-                        model=keras_model,
-                        img_path=tmp_path,
-                        class_index=idx,
-                        target_size=config["img_size"],
-                    )
-                    explanation_method = "grad-cam"
-
-                else:
-                    # Skin model → Score-CAM using the .tflite file path
-                    gradcam_overlay, gradcam_heatmap = generate_tflite_scorecam_overlay(
-                        tflite_path=config["path"],
-                        img_path=tmp_path,
-                        class_index=idx,
-                        target_size=config["img_size"],
-                    )
-                    explanation_method = "score-cam"
+                result = _run_prediction(tmp_path, model_type, tta_views=tta_views)
+            finally:
+                # Always clean up the temp file
+                if os.path.exists(tmp_path):
+                    try:
+                        os.unlink(tmp_path)
+                    except Exception as e:
+                        print(f"Failed to delete temp file {tmp_path}: {e}")
 
-            except Exception as cam_err:
-                import traceback
+            cache.set(cache_key, result)
 
-                print(f"[Grad-CAM] Warning: heatmap generation failed: {cam_err}")
-                traceback.print_exc()
+        predicted_class = result["prediction"]
+        confidence = result["confidence"]
 
-        finally:
-            # Always clean up the temp file
-            if os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except Exception as e:
-                    print(f"Failed to delete temp file {tmp_path}: {e}")
-
-        # 5. Persist prediction history (unchanged)
+        # 5. Persist prediction history (recorded for cache hits as well)
         save_history(
             user_id=current_user.id if current_user.is_authenticated else None,
             prediction_type=model_type,
@@ -397,11 +787,242 @@ def predict():
                     "prediction": predicted_class,
                     "confidence": round(confidence * 100, 2),
                     "type": model_type,
-                    "low_confidence": low_confidence,
-                    "warning": warning_message,
-                    "gradcam_overlay": gradcam_overlay,
-                    "gradcam_heatmap": gradcam_heatmap,
-                    "explanation_method": explanation_method,
+                    "low_confidence": result["low_confidence"],
+                    "warning": result["warning"],
+                    "tta": result.get("tta"),
+                    **_heatmap_payload(result, heatmap_format, cache_key),
+                    "cached": cached,
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# /predict/batch limits.  The whole multipart body must also fit
+# MAX_CONTENT_LENGTH (10 MB), which Flask enforces before the view runs.
+PREDICT_BATCH_MAX_IMAGES = int(os.getenv("PREDICT_BATCH_MAX_IMAGES", "16"))
+PREDICT_BATCH_DECODE_WORKERS = int(
+    os.getenv("PREDICT_BATCH_DECODE_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+# Shared decode pool, created on the first batch request (after any fork).
+_DECODE_POOL = None
+_DECODE_POOL_LOCK = threading.Lock()
+
+
+def _decode_pool():
+    global _DECODE_POOL
+    if _DECODE_POOL is None:
+        with _DECODE_POOL_LOCK:
+            if _DECODE_POOL is None:
+                _DECODE_POOL = ThreadPoolExecutor(
+                    max_workers=PREDICT_BATCH_DECODE_WORKERS,
+                    thread_name_prefix="predict-decode",
+                )
+    return _DECODE_POOL
+
+
+def _decode_upload(item):
+    """Decode one batch item; errors are returned, not raised."""
+    try:
+        return load_resnet50_input(
+            io.BytesIO(item["bytes"]), MODEL_CONFIG[item["type"]]["img_size"]
+        )
+    except Exception as e:
+        return e
+
+
+@timed("model")
+def _batch_forward(model_type, batch):
+    """One forward pass over an already stacked batch, bypassing the batcher."""
+    if MODEL_CONFIG[model_type]["format"] == "keras":
+        return _keras_forward(model_type, batch)
+    return _tflite_forward(model_type, batch)
+
+
+@predict_disease_type_bp.route("/predict/batch", methods=["POST"])
+@rate_limit("prediction")
+@api_login_required
+def predict_batch():
+    """
+    Classify several uploads in one request (e.g. a screening session).
+
+    Files are sent as repeated "images" fields.  "type" applies to every
+    file, or "types" may be repeated once per file.  Set "heatmaps=1" for
+    explanation heatmaps in "heatmap_format".  Results come back in upload
+    order; an unreadable file gets an "error" entry without failing the
+    rest of the batch.
+    """
+    files = request.files.getlist("images") or request.files.getlist("image")
+    if not files:
+        return jsonify({"error": "No images provided"}), 400
+    if len(files) > PREDICT_BATCH_MAX_IMAGES:
+        return (
+            jsonify(
+                {
+                    "error": f"Too many images: {len(files)}. The limit is {PREDICT_BATCH_MAX_IMAGES} per batch."
+                }
+            ),
+            400,
+        )
+
+    model_types = [t.lower() for t in request.form.getlist("types")]
+    if not model_types:
+        model_types = [(request.form.get("type") or "eyes").lower()] * len(files)
+    if len(model_types) != len(files):
+        return jsonify({"error": "Provide one 'types' value per image"}), 400
+    unknown = sorted(set(model_types) - set(MODEL_CONFIG))
+    if unknown:
+        return (
+            jsonify(
+                {
+                    "error": f"Invalid type {unknown}. Use one of: {list(MODEL_CONFIG.keys())}"
+                }
+            ),
+            400,
+        )
+
+    want_heatmaps = request.form.get("heatmaps", "").lower() in ("1", "true", "yes")
+    heatmap_format = _requested_heatmap_format()
+    if heatmap_format not in HEATMAP_FORMATS:
+        return _invalid_heatmap_format(heatmap_format)
+
+    try:
+        cache = get_prediction_cache()
+        entries = []
+        for index, (image_file, model_type) in enumerate(zip(files, model_types)):
+            entry = {
+                "index": index,
+                "filename": getattr(image_file, "filename", None),
+                "type": model_type,
+            }
+            entries.append(entry)
+
+            if not _validate_image_magic(image_file.stream):
+                entry["error"] = "Not a recognised image (JPEG, PNG, or WebP)."
+                continue
+            entry["bytes"] = image_file.stream.read()
+            if len(entry["bytes"]) > _MAX_UPLOAD_BYTES:
+                entry["error"] = "File size exceeds the 10 MB limit."
+                continue
+
+            entry["cache_key"] = make_cache_key(
+                entry["bytes"], model_type, _model_version(model_type)
+            )
+            cached = cache.get(entry["cache_key"])
+            # A cached entry without a heatmap cannot satisfy heatmaps=1.
+            if cached is not None and (cached["heatmap"] or not want_heatmaps):
+                entry["result"] = cached
+                entry["cached"] = True
+
+        # Decode the cache misses in parallel (Pillow releases the GIL).
+        pending = [
+            entry
+            for entry in entries
+            if "bytes" in entry and "result" not in entry and "error" not in entry
+        ]
+        with phase("preprocess"):
+            decoded_items = list(_decode_pool().map(_decode_upload, pending))
+        for entry, decoded in zip(pending, decoded_items):
+            if isinstance(decoded, Exception):
+                entry["error"] = f"Could not decode image: {decoded}"
+            else:
+                entry["decoded"] = decoded
+
+        # One forward pass per model type.
+        by_type = {}
+        for entry in pending:
+            if "decoded" in entry:
+                by_type.setdefault(entry["type"], []).append(entry)
+
+        for model_type, group in by_type.items():
+            batch = np.concatenate([entry["decoded"][0] for entry in group])
+            preds = _batch_forward(model_type, batch)
+            for entry, row in zip(group, preds):
+                result = _classify(model_type, row)
+                class_index = result.pop("class_index")
+                if want_heatmaps:
+                    result.update(
+                        # Never hand the client-supplied filename to the
+                        # explainers as a path; the decoded arrays suffice.
+                        _explain(
+                            model_type,
+                            class_index,
+                            preprocessed=entry["decoded"],
+                        )
+                    )
+                    cache.set(entry["cache_key"], result)
+                else:
+                    result.update(
+                        {"heatmap": None, "image": None, "explanation_method": None}
+                    )
+                entry["result"] = result
+                entry["cached"] = False
+
+        response_items = []
+        for entry in entries:
+            item = {
+                "index": entry["index"],
+                "filename": entry["filename"],
+                "type": entry["type"],
+            }
+            if "error" in entry:
+                item["error"] = entry["error"]
+            else:
+                result = entry["result"]
+                item.update(
+                    {
+                        "prediction": result["prediction"],
+                        "confidence": round(result["confidence"] * 100, 2),
+                        "low_confidence": result["low_confidence"],
+                        "warning": result["warning"],
+                        "cached": entry["cached"],
+                    }
+                )
+                if want_heatmaps:
+                    item.update(
+                        _heatmap_payload(result, heatmap_format, entry["cache_key"])
+                    )
+            response_items.append(item)
+
+        # 5. One history entry for the whole batch
+        succeeded = [item for item in response_items if "error" not in item]
+        if succeeded:
+            batch_types = sorted({item["type"] for item in succeeded})
+            predictions = Counter(item["prediction"] for item in succeeded)
+            save_history(
+                user_id=current_user.id if current_user.is_authenticated else None,
+                prediction_type=(
+                    batch_types[0] if len(batch_types) == 1 else "image_batch"
+                ),
+                disease=predictions.most_common(1)[0][0],
+                inputs={
+                    "type": batch_types,
+                    "image_count": len(files),
+                    "image_filenames": [item["filename"] for item in response_items],
+                },
+                results={
+                    "predictions": [
+                        {
+                            "filename": item["filename"],
+                            "type": item["type"],
+                            "prediction": item["prediction"],
+                            "confidence_pct": item["confidence"],
+                        }
+                        for item in succeeded
+                    ],
+                    "failed": len(response_items) - len(succeeded),
+                },
+            )
+
+        return (
+            jsonify(
+                {
+                    "results": response_items,
+                    "count": len(response_items),
+                    "failed": len(response_items) - len(succeeded),
                 }
             ),
             200,
@@ -409,3 +1030,44 @@ def predict():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@predict_disease_type_bp.route("/predict/heatmap/<cache_key>/<kind>", methods=["GET"])
+@api_login_required
+def predict_heatmap(cache_key, kind):
+    """Serve a rendered overlay or heatmap for a cached prediction."""
+    image_type = request.args.get("format", "webp").lower()
+    if kind not in HEATMAP_KINDS or image_type not in HEATMAP_IMAGE_TYPES:
+        return jsonify({"error": "Unknown heatmap kind or format"}), 400
+
+    # Keys are content hashes, so only someone who uploaded the image can
+    # know one; an evicted entry means the client should re-run /predict.
+    result = get_prediction_cache().get(cache_key)
+    if result is None or result.get("heatmap") is None:
+        return jsonify({"error": "Heatmap not found or expired"}), 404
+
+    etag = f"{cache_key}-{kind}-{image_type}"
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(_render_heatmap(result, kind, image_type))
+        response.headers["Content-Type"] = HEATMAP_IMAGE_TYPES[image_type]
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"private, max-age={HEATMAP_MAX_AGE}, immutable"
+    return response
+
+
+@predict_disease_type_bp.route("/predict/stats", methods=["GET"])
+@api_login_required
+def predict_stats():
+    """Micro-batching and interpreter pool metrics per model type."""
+    return (
+        jsonify(
+            {
+                "batching": get_batching_stats(),
+                "interpreter_pools": get_interpreter_pool_stats(),
+                "prediction_cache": get_prediction_cache().get_stats(),
+            }
+        ),
+        200,
+    )
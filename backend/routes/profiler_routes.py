@@ -0,0 +1,107 @@
+import io
+import os
+import pstats
+from functools import wraps
+
+from flask import Blueprint, abort, jsonify, request, send_file
+
+from backend.middleware import rate_limit
+from backend.services import profiler
+
+profiler_bp = Blueprint("profiler", __name__)
+
+
+def admin_required(f):
+    """Bearer PROFILER_TOKEN; 404 while profiling is disabled."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not profiler.is_enabled():
+            abort(404)
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not profiler.check_admin_token(supplied):
+            return jsonify({"error": "Unauthorized"}), 401
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def _send_result(path):
+    if path.endswith(".prof") and request.args.get("format") != "raw":
+        # Readable summary; ?format=raw returns the file for snakeviz/pstats.
+        sort = request.args.get("sort", "cumulative")
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            return jsonify({"error": f"Unknown sort key '{sort}'"}), 400
+        stream = io.StringIO()
+        stats = pstats.Stats(path, stream=stream)
+        stats.sort_stats(sort).print_stats(request.args.get("limit", 40, type=int))
+        return stream.getvalue(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+
+@profiler_bp.route("/api/profiler/sample", methods=["POST"])
+@admin_required
+@rate_limit("profiler")
+def start_sample():
+    """
+    Sample the stacks of this worker for a few seconds.
+
+    Query or JSON parameters:
+        seconds: how long to sample (default 10, capped at PROFILER_MAX_SECONDS)
+        interval_ms: time between samples (default 5, 1-100)
+        format: "collapsed" (default) or "speedscope"
+        wait: block until done and return the file instead of its id
+    """
+    params = {**request.args.to_dict(), **(request.get_json(silent=True) or {})}
+    try:
+        seconds = float(params.get("seconds", profiler.DEFAULT_SECONDS))
+        interval_ms = float(params.get("interval_ms", profiler.DEFAULT_INTERVAL_MS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if not 0 < seconds <= profiler.max_seconds():
+        return (
+            jsonify({"error": f"seconds must be in (0, {profiler.max_seconds():g}]"}),
+            400,
+        )
+    if not 1 <= interval_ms <= 100:
+        return jsonify({"error": "interval_ms must be between 1 and 100"}), 400
+
+    try:
+        profile_id, thread = profiler.start_sampling(
+            seconds, interval_ms, params.get("format", "collapsed")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except profiler.ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+
+    if str(params.get("wait", "")).lower() in ("1", "true", "yes"):
+        thread.join()
+        status, path = profiler.find_result(profile_id)
+        if status == "done":
+            return _send_result(path)
+        return jsonify({"error": "Profiling failed", "profile_id": profile_id}), 500
+
+    return (
+        jsonify(
+            {
+                "profile_id": profile_id,
+                "pid": os.getpid(),
+                "seconds": seconds,
+                "result_url": f"/api/profiler/results/{profile_id}",
+            }
+        ),
+        202,
+    )
+
+
+@profiler_bp.route("/api/profiler/results/<profile_id>")
+@admin_required
+def get_result(profile_id):
+    """Fetch a sampling profile or the cProfile stats of one request."""
+    status, path = profiler.find_result(profile_id)
+    if status == "running":
+        return jsonify({"profile_id": profile_id, "status": "running"}), 202
+    if status == "missing":
+        return jsonify({"error": "Profile not found"}), 404
+    return _send_result(path)
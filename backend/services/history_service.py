@@ -16,6 +16,7 @@ from typing import Any, Mapping, Optional
 
 from backend import db
 from backend.models.patient_history import PatientHistory
+from backend.services.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +47,7 @@ def _classify_risk(probability: Optional[float]) -> Optional[str]:
     return "high"
 
 
+@timed("history")
 def save_history(
     user_id: Optional[int],
     *,
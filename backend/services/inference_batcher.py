@@ -0,0 +1,238 @@
+"""
+Dynamic micro-batching for the image classifiers.
+
+Each ``/predict`` request produces a single (H, W, 3) tensor.  Running the
+model once per request wastes most of the per-call overhead of Keras and
+TFLite, and concurrent gunicorn threads end up contending for the same
+cached model.  ``MicroBatcher`` sits in front of a batched forward pass:
+
+    batcher = MicroBatcher(run_batch=lambda batch: model(batch).numpy(),
+                           max_batch_size=8, max_latency_ms=5)
+    preds = batcher.submit(img_array[0])   # blocks until the batch has run
+
+Requests are queued and a worker thread (one by default) collects up to
+``max_batch_size`` inputs or waits at most ``max_latency_ms`` after the
+first one arrives, runs one forward pass over the stacked batch and scatters
+the rows back to the waiting callers.
+
+With ``max_batch_size <= 1`` the batcher is a pass-through that runs the
+forward pass in the caller's thread, so batching can be switched off via the
+environment without touching the route code.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+DEFAULT_MAX_LATENCY_MS = float(os.getenv("INFERENCE_MAX_LATENCY_MS", "5"))
+
+
+class MicroBatcher:
+    """Collects single inputs into batches for one model."""
+
+    def __init__(
+        self,
+        run_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_latency_ms: float = DEFAULT_MAX_LATENCY_MS,
+        name: str = "model",
+        workers: int = 1,
+    ):
+        """
+        Args:
+            run_batch: Callable taking a stacked (B, ...) array and returning
+                an array whose first axis has length B.
+            max_batch_size: Upper bound on items per forward pass.
+            max_latency_ms: How long the worker waits for more items after
+                the first one of a batch arrives.
+            name: Label used in logs and stats.
+            workers: Number of threads forming and running batches.  More
+                than one only helps when ``run_batch`` can execute
+                concurrently, e.g. over a pool of TFLite interpreters.
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max(0.0, float(max_latency_ms)) / 1000.0
+        self.name = name
+        self.workers = max(1, int(workers))
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_threads: list = []
+        self._worker_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+        # Metrics
+        self._submitted = 0
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._max_queue_depth = 0
+        self._queue_wait_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, item: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Queue a single input (without batch axis) and block for its output row.
+
+        Exceptions raised by ``run_batch`` are re-raised in every caller whose
+        item was part of the failed batch.
+        """
+        if not self.enabled:
+            with self._lock:
+                self._submitted += 1
+                self._batches += 1
+                self._items += 1
+            return self.run_batch(np.expand_dims(item, axis=0))[0]
+
+        future: Future = Future()
+        with self._lock:
+            self._ensure_worker()
+            self._submitted += 1
+            self._queue.put((item, future, time.perf_counter()))
+            depth = self._queue.qsize()
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+
+        return future.result(timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "name": self.name,
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "workers": self.workers,
+                "max_latency_ms": round(self.max_latency * 1000, 3),
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "submitted": self._submitted,
+                "batches": batches,
+                "items": items,
+                "errors": self._errors,
+                "avg_batch_size": round(items / batches, 3) if batches else 0.0,
+                "batch_fill_ratio": (
+                    round(items / (batches * self.max_batch_size), 4)
+                    if batches
+                    else 0.0
+                ),
+                "avg_queue_wait_ms": (
+                    round(self._queue_wait_total / items * 1000, 3) if items else 0.0
+                ),
+            }
+
+    def stop(self):
+        """
+        Stop the worker threads.  Queued inputs that no worker picked up fail
+        with RuntimeError; a later ``submit()`` starts fresh workers.
+        """
+        with self._lock:
+            self._stop.set()
+            pending = self._queue
+            self._queue = queue.Queue()
+            self._worker_threads = []
+            self._worker_pid = None
+
+        while True:
+            try:
+                _, future, _ = pending.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError(f"MicroBatcher[{self.name}] stopped"))
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        # Called with self._lock held.  Threads do not survive fork(), so a
+        # batcher created in the gunicorn master must start its own worker
+        # again inside each child process.
+        pid = os.getpid()
+        if self._worker_threads and self._worker_pid == pid:
+            return
+        # Each generation of workers gets its own queue and stop event, so
+        # threads from before stop() or fork() never touch the new ones.
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._worker_threads = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(self._queue, self._stop),
+                name=f"micro-batcher-{self.name}-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        self._worker_pid = pid
+        for thread in self._worker_threads:
+            thread.start()
+
+    def _collect_batch(self, work: "queue.Queue", first) -> list:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(work.get(timeout=remaining))
+                else:
+                    # Past the latency budget: still take whatever is already
+                    # waiting rather than leaving it for another pass.
+                    batch.append(work.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self, work: "queue.Queue", stop: threading.Event):
+        while not stop.is_set():
+            try:
+                first = work.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._run(self._collect_batch(work, first))
+
+    def _run(self, batch: list):
+        started = time.perf_counter()
+        futures = [future for _, future, _ in batch]
+        try:
+            outputs = self.run_batch(np.stack([item for item, _, _ in batch]))
+            if len(outputs) != len(batch):
+                raise ValueError(
+                    f"run_batch returned {len(outputs)} rows for a batch of {len(batch)}"
+                )
+        except Exception as exc:
+            logger.warning("MicroBatcher[%s] batch failed: %s", self.name, exc)
+            with self._lock:
+                self._errors += 1
+            for future in futures:
+                future.set_exception(exc)
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._queue_wait_total += sum(started - queued for _, _, queued in batch)
+
+        for row, future in zip(outputs, futures):
+            future.set_result(row)
@@ -0,0 +1,140 @@
+"""
+Bounded pool of TFLite interpreters.
+
+A ``tf.lite.Interpreter`` keeps its input/output buffers inside the object,
+so two threads calling ``set_tensor`` / ``invoke`` / ``get_tensor`` on the
+same instance can read each other's results.  Guarding a single interpreter
+with a lock is correct but serialises every skin prediction onto one core.
+
+``InterpreterPool`` hands out exclusive interpreters instead:
+
+    pool = InterpreterPool(factory=lambda: make_interpreter(path), size=4)
+    with pool.checkout() as model_data:
+        model_data["interpreter"].invoke()
+
+Interpreters are created lazily up to ``size``; once the pool is exhausted
+callers block until one is checked back in.  Wait times are recorded so an
+undersized pool shows up in the stats rather than as unexplained latency.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_POOL_SIZE = int(os.getenv("TFLITE_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+DEFAULT_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "1"))
+
+
+class InterpreterPool:
+    """Checkout/checkin pool of interpreter objects built by ``factory``."""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = DEFAULT_POOL_SIZE,
+        name: str = "model",
+    ):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.name = name
+
+        # LIFO keeps recently used interpreters (and their warm caches) busy.
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def prefill(self, count: Optional[int] = None) -> int:
+        """Eagerly create up to ``count`` interpreters (default: the full pool)."""
+        target = self.size if count is None else min(self.size, count)
+        while True:
+            with self._lock:
+                if self._created >= target:
+                    return self._created
+                self._created += 1
+            try:
+                self._idle.put(self._factory())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Borrow an interpreter for the duration of the ``with`` block."""
+        item = self._acquire(timeout)
+        try:
+            yield item
+        finally:
+            self._idle.put(item)
+
+    def _acquire(self, timeout: Optional[float]):
+        started = time.perf_counter()
+        try:
+            item = self._idle.get_nowait()
+        except queue.Empty:
+            item = None
+
+        if item is None:
+            create = False
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+            if create:
+                try:
+                    item = self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    item = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise TimeoutError(
+                        f"No TFLite interpreter for '{self.name}' became free "
+                        f"within {timeout}s (pool size {self.size})"
+                    )
+                waited = time.perf_counter() - started
+                with self._lock:
+                    self._waits += 1
+                    self._wait_total += waited
+                    self._wait_max = max(self._wait_max, waited)
+
+        with self._lock:
+            self._checkouts += 1
+        return item
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "name": self.name,
+                "size": self.size,
+                "created": self._created,
+                "idle": idle,
+                "in_use": self._created - idle,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (
+                    round(self._wait_total / self._waits * 1000, 3)
+                    if self._waits
+                    else 0.0
+                ),
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
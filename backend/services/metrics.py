@@ -0,0 +1,418 @@
+"""
+Request phase timers, latency histograms and a Prometheus export.
+
+Disabled unless ``METRICS_ENABLED=1``.  When enabled:
+
+  • every request is timed into ``http_request_duration_seconds``
+    (labelled by route rule, method and status);
+  • code wrapped in ``phase("model")`` or decorated with ``@timed("model")``
+    adds its time to ``request_phase_duration_seconds`` under the current
+    route.  The phases used are preprocess, model, explain, bayes, history
+    and serialize (every jsonify() body);
+  • with ``SERVER_TIMING=1`` the phase totals of a request are also sent
+    back in a ``Server-Timing`` header, so browser dev tools show them;
+  • ``GET /metrics`` renders everything in the Prometheus text format.
+
+Under gunicorn each worker keeps its own histograms in memory and writes a
+snapshot to ``METRICS_DIR/metrics_<pid>.json`` every
+``METRICS_FLUSH_INTERVAL`` seconds (and at exit); ``/metrics`` adds the
+snapshots of the other workers to its own live values, so any worker can
+answer a scrape.  When a worker exits, gunicorn.conf.py folds its file into
+``metrics_retired.json`` so counts never go backwards while the number of
+files stays bounded by the live workers.  The master clears the directory
+when it starts, so earlier runs sharing it are not merged in.
+
+With metrics disabled, ``@timed`` costs one flag check per call and
+``phase()`` returns a shared no-op context manager.
+"""
+
+from __future__ import annotations
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_METRIC = "http_request_duration_seconds"
+PHASE_METRIC = "request_phase_duration_seconds"
+HELP = {
+    REQUEST_METRIC: "Request latency by route, method and status.",
+    PHASE_METRIC: "Time spent in each request phase by route.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "0").lower() in ("1", "true", "yes")
+
+
+_enabled = _env_flag("METRICS_ENABLED")
+_server_timing = _env_flag("SERVER_TIMING")
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool, server_timing: Optional[bool] = None):
+    """Turn collection (and optionally the Server-Timing header) on or off."""
+    global _enabled, _server_timing
+    _enabled = bool(enabled)
+    if server_timing is not None:
+        _server_timing = bool(server_timing)
+
+
+class HistogramStore:
+    """Thread-safe histograms keyed by (metric name, labels)."""
+
+    def __init__(self, buckets: Iterable[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (name, labels) -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, Labels], list] = {}
+
+    def observe(self, name: str, labels: Labels, value: float):
+        index = bisect_left(self.buckets, value)
+        key = (name, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "labels": list(labels),
+                    "counts": list(counts),
+                    "sum": total,
+                }
+                for (name, labels), (counts, total) in self._series.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def merge_snapshots(snapshots: Iterable[List[dict]]) -> Dict[Tuple[str, Labels], list]:
+    """Sum per-process snapshots into {(name, labels): [counts, sum]}."""
+    merged: Dict[Tuple[str, Labels], list] = {}
+    for snapshot in snapshots:
+        for entry in snapshot:
+            key = (entry["name"], tuple(tuple(pair) for pair in entry["labels"]))
+            series = merged.get(key)
+            if series is None:
+                merged[key] = [list(entry["counts"]), entry["sum"]]
+            else:
+                series[0] = [a + b for a, b in zip(series[0], entry["counts"])]
+                series[1] += entry["sum"]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus(
+    merged: Dict[Tuple[str, Labels], list], buckets: Iterable[float] = BUCKETS
+) -> str:
+    """Render merged histograms in the Prometheus text exposition format."""
+    bounds = [repr(float(b)) for b in buckets] + ["+Inf"]
+    lines = []
+    for name in sorted({name for name, _ in merged}):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for (series_name, labels), (counts, total) in sorted(merged.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+STORE = HistogramStore()
+
+
+class MultiprocessExporter:
+    """Periodically writes this process's snapshot to a shared directory."""
+
+    def __init__(self, store: HistogramStore, metrics_dir: str, interval: float = 1.0):
+        self.store = store
+        self.metrics_dir = metrics_dir
+        self.interval = interval
+        self._stop = threading.Event()
+        os.makedirs(metrics_dir, exist_ok=True)
+        self._start()
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _path(self, pid: Optional[int] = None) -> str:
+        return os.path.join(self.metrics_dir, f"metrics_{pid or os.getpid()}.json")
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        # Observations made before the fork belong to the parent's file.
+        self.store.reset()
+        self._start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[METRICS] Failed to write snapshot: {e}")
+
+    def flush(self):
+        snapshot = self.store.snapshot()
+        if not snapshot:
+            return
+        _write_snapshot(self._path(), snapshot)
+
+    def other_snapshots(self) -> List[List[dict]]:
+        own = self._path()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.metrics_dir, "metrics_*.json")):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Being replaced right now; the next scrape picks it up.
+                continue
+        return snapshots
+
+    def stop(self):
+        self._stop.set()
+
+
+RETIRED_SNAPSHOT = "metrics_retired.json"
+
+
+def _read_snapshot(path: str) -> List[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _write_snapshot(path: str, snapshot: List[dict]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def clear_snapshots(metrics_dir: Optional[str]):
+    """Delete every worker snapshot in ``metrics_dir`` (gunicorn master start)."""
+    if not metrics_dir or not os.path.isdir(metrics_dir):
+        return
+    for path in glob.glob(os.path.join(metrics_dir, "metrics_*.json*")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def retire_snapshot(metrics_dir: Optional[str], pid: int):
+    """Fold an exited worker's snapshot into ``metrics_retired.json``."""
+    if not metrics_dir:
+        return
+    path = os.path.join(metrics_dir, f"metrics_{pid}.json")
+    if not os.path.exists(path):
+        return
+    retired_path = os.path.join(metrics_dir, RETIRED_SNAPSHOT)
+    merged = merge_snapshots([_read_snapshot(retired_path), _read_snapshot(path)])
+    _write_snapshot(
+        retired_path,
+        [
+            {
+                "name": name,
+                "labels": [list(pair) for pair in labels],
+                "counts": counts,
+                "sum": total,
+            }
+            for (name, labels), (counts, total) in merged.items()
+        ],
+    )
+    os.remove(path)
+
+
+_exporter: Optional[MultiprocessExporter] = None
+
+
+def configure_multiprocess(metrics_dir: Optional[str], interval: float = 1.0):
+    """Share metrics through ``metrics_dir`` (None: this process only)."""
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+    if metrics_dir:
+        _exporter = MultiprocessExporter(STORE, metrics_dir, interval)
+
+
+def collect() -> str:
+    """Prometheus text for this process plus every other worker's snapshot."""
+    snapshots = [STORE.snapshot()]
+    if _exporter is not None:
+        snapshots.extend(_exporter.other_snapshots())
+    return render_prometheus(merge_snapshots(snapshots), STORE.buckets)
+
+
+def _route_label() -> str:
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+class _PhaseTimer:
+    __slots__ = ("name", "started", "nested")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.nested = False
+        if has_request_context():
+            active = g.get("_metrics_active")
+            if active is not None:
+                if self.name in active:
+                    # Already timed by an enclosing phase of the same name.
+                    self.nested = True
+                    return self
+                active.add(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.nested:
+            return False
+        elapsed = time.perf_counter() - self.started
+        route = "background"
+        if has_request_context():
+            phases = g.get("_metrics_phases")
+            if phases is not None:
+                phases[self.name] = phases.get(self.name, 0.0) + elapsed
+                g._metrics_active.discard(self.name)
+            route = _route_label()
+        STORE.observe(
+            PHASE_METRIC, (("endpoint", route), ("phase", self.name)), elapsed
+        )
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str):
+    """Context manager timing a block as request phase ``name``."""
+    return _PhaseTimer(name) if _enabled else _NULL_PHASE
+
+
+def timed(name: str):
+    """Decorator timing every call of a function as request phase ``name``."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _PhaseTimer(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that times response serialization."""
+
+    def dumps(self, obj, **kwargs):
+        if not _enabled:
+            return super().dumps(obj, **kwargs)
+        with _PhaseTimer("serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def _before_request():
+    if _enabled:
+        g._metrics_started = time.perf_counter()
+        g._metrics_phases = {}
+        g._metrics_active = set()
+
+
+def _after_request(response):
+    started = g.get("_metrics_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    STORE.observe(
+        REQUEST_METRIC,
+        (
+            ("endpoint", _route_label()),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        ),
+        elapsed,
+    )
+    if _server_timing:
+        entries = [
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in g._metrics_phases.items()
+        ]
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def init_app(app):
+    """Install the request hooks and the timed JSON provider on ``app``."""
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if _enabled and _exporter is None and os.getenv("METRICS_DIR"):
+        configure_multiprocess(
+            os.getenv("METRICS_DIR"),
+            float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0")),
+        )
@@ -0,0 +1,288 @@
+"""
+Conversion of the Keras eye model into optimised TFLite artifacts.
+
+The eye model ships as a full ResNet50 ``.keras`` file and runs through
+TensorFlow's eager runtime, which is heavy for single-image CPU inference.
+This module converts it to TFLite so ``/predict`` can serve it through the
+same interpreter pool and micro-batcher as the skin model:
+
+  • ``dynamic`` – dynamic-range quantisation: int8 weights, float
+    activations.  ~4× smaller, no calibration data needed.
+  • ``int8``    – full integer quantisation calibrated on a representative
+    set of preprocessed images.  Input and output stay float32, so the
+    serving code does not change.
+  • ``float16`` – float16 weights, for a smaller file with near-identical
+    outputs.
+  • ``none``    – plain float32 TFLite.
+
+Every conversion should be checked with ``compare_predictions`` (top-1
+agreement and probability drift against the Keras model on a sample set)
+and ``benchmark_latency`` before switching ``EYE_MODEL_FORMAT=tflite``.
+``convert_eye_model.py`` at the repository root runs all three steps.
+
+Grad-CAM needs gradients, so it keeps using the Keras model, loaded on
+demand by the image routes.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from backend.utils.image_preprocessing import load_resnet50_input, resnet50_preprocess
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("dynamic", "int8", "float16", "none")
+# Accepted values of EYE_MODEL_FORMAT (checked at startup by config_validator).
+EYE_MODEL_FORMATS = ("keras", "tflite")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Calibration batches used for int8 when the caller passes more images.
+MAX_CALIBRATION_IMAGES = 200
+
+
+def load_sample_images(
+    sample_dir: str,
+    img_size=(224, 224),
+    limit: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Load and ResNet-preprocess every image under ``sample_dir``.
+
+    Returns a float32 array of shape (N, H, W, 3), ready for either model.
+    """
+    paths: List[str] = []
+    for root, _, files in os.walk(sample_dir):
+        paths.extend(
+            os.path.join(root, name)
+            for name in sorted(files)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    paths.sort()
+    if limit is not None:
+        paths = paths[:limit]
+    if not paths:
+        raise FileNotFoundError(f"No sample images found in {sample_dir}")
+
+    return np.concatenate([load_resnet50_input(p, img_size)[0] for p in paths])
+
+
+def synthetic_samples(
+    count: int = 16, img_size=(224, 224), seed: int = 0
+) -> np.ndarray:
+    """
+    Random preprocessed images, for smoke-testing a conversion.
+
+    Parity on noise says little about clinical accuracy; use real samples
+    via ``load_sample_images`` before deploying a quantised model.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = img_size
+    batch = np.empty((count, height, width, 3), dtype=np.float32)
+    for i in range(count):
+        rgb = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        resnet50_preprocess(rgb, out=batch[i])
+    return batch
+
+
+def convert_keras_to_tflite(
+    model,
+    output_path: str,
+    quantization: str = "dynamic",
+    representative_images: Optional[np.ndarray] = None,
+) -> Dict:
+    """
+    Convert a Keras model (or path to one) and write the TFLite flatbuffer.
+
+    ``representative_images`` (preprocessed, (N, H, W, 3) float32) is
+    required for ``int8``.  Returns a summary with the output size.
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(
+            f"Unknown quantization '{quantization}'. Use one of: {list(QUANTIZATION_MODES)}"
+        )
+    if isinstance(model, str):
+        model = tf.keras.models.load_model(model, compile=False)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        if representative_images is None or len(representative_images) == 0:
+            raise ValueError("int8 quantization needs representative_images")
+        calibration = representative_images[:MAX_CALIBRATION_IMAGES]
+
+        def representative_dataset():
+            for image in calibration:
+                yield [image[np.newaxis].astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Keep float32 input/output so preprocessing and the routes are shared
+        # with the float models; (de)quantisation happens inside the graph.
+        converter.inference_input_type = tf.float32
+        converter.inference_output_type = tf.float32
+
+    started = time.perf_counter()
+    flatbuffer = converter.convert()
+    elapsed = time.perf_counter() - started
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(flatbuffer)
+
+    logger.info(
+        "Converted model | quantization=%s | size=%.1f MB | %.1fs | %s",
+        quantization,
+        len(flatbuffer) / (1024 * 1024),
+        elapsed,
+        output_path,
+    )
+    return {
+        "path": output_path,
+        "quantization": quantization,
+        "size_mb": round(len(flatbuffer) / (1024 * 1024), 2),
+        "convert_seconds": round(elapsed, 2),
+    }
+
+
+def keras_predictor(model) -> Callable[[np.ndarray], np.ndarray]:
+    """Batch predict function for a Keras model (or path to one)."""
+    import tensorflow as tf
+
+    if isinstance(model, str):
+        model = tf.keras.models.load_model(model, compile=False)
+    return lambda batch: np.asarray(model(batch, training=False))
+
+
+def tflite_predictor(
+    tflite_path: str, num_threads: int = 1
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Batch predict function for a TFLite file, resizing the input as needed."""
+    import tensorflow as tf
+
+    interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]["index"]
+    output_index = interpreter.get_output_details()[0]["index"]
+    state = {"batch_size": 1}
+
+    def predict(batch: np.ndarray) -> np.ndarray:
+        if state["batch_size"] != batch.shape[0]:
+            interpreter.resize_tensor_input(input_index, list(batch.shape))
+            interpreter.allocate_tensors()
+            state["batch_size"] = batch.shape[0]
+        interpreter.set_tensor(input_index, batch.astype(np.float32))
+        interpreter.invoke()
+        return np.array(interpreter.get_tensor(output_index))
+
+    return predict
+
+
+def _predict_all(predict: Callable, images: np.ndarray, batch_size: int) -> np.ndarray:
+    return np.concatenate(
+        [predict(images[i : i + batch_size]) for i in range(0, len(images), batch_size)]
+    )
+
+
+def compare_predictions(
+    reference: Callable[[np.ndarray], np.ndarray],
+    candidate: Callable[[np.ndarray], np.ndarray],
+    images: np.ndarray,
+    batch_size: int = 8,
+    class_names: Optional[Sequence[str]] = None,
+) -> Dict:
+    """
+    Accuracy-parity report of ``candidate`` against ``reference``.
+
+    Reports top-1 agreement, probability drift and, with ``class_names``,
+    the classes where the two models disagree.
+    """
+    ref = _predict_all(reference, images, batch_size)
+    cand = _predict_all(candidate, images, batch_size)
+    ref_top1 = ref.argmax(axis=1)
+    cand_top1 = cand.argmax(axis=1)
+    diff = np.abs(ref - cand)
+
+    report = {
+        "samples": int(len(images)),
+        "top1_agreement": round(float((ref_top1 == cand_top1).mean()), 4),
+        "max_abs_diff": round(float(diff.max()), 6),
+        "mean_abs_diff": round(float(diff.mean()), 6),
+        "max_confidence_drift": round(
+            float(np.abs(ref.max(axis=1) - cand[np.arange(len(cand)), ref_top1]).max()),
+            6,
+        ),
+    }
+    if class_names is not None:
+        disagreements: Dict[str, int] = {}
+        for r, c in zip(ref_top1, cand_top1):
+            if r != c:
+                key = f"{class_names[r]} -> {class_names[c]}"
+                disagreements[key] = disagreements.get(key, 0) + 1
+        report["disagreements"] = disagreements
+    return report
+
+
+def benchmark_latency(
+    predict: Callable[[np.ndarray], np.ndarray],
+    images: np.ndarray,
+    batch_sizes: Iterable[int] = (1, 8),
+    runs: int = 20,
+    warmup: int = 3,
+) -> Dict[int, Dict[str, float]]:
+    """Per-batch-size latency percentiles (ms) and throughput for ``predict``."""
+    report: Dict[int, Dict[str, float]] = {}
+    for batch_size in batch_sizes:
+        reps = -(-batch_size // len(images))
+        batch = np.concatenate([images] * reps)[:batch_size]
+        for _ in range(warmup):
+            predict(batch)
+
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            predict(batch)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings_arr = np.array(timings)
+        p50 = float(np.percentile(timings_arr, 50))
+        report[batch_size] = {
+            "p50_ms": round(p50, 2),
+            "p95_ms": round(float(np.percentile(timings_arr, 95)), 2),
+            "mean_ms": round(float(timings_arr.mean()), 2),
+            "images_per_sec": round(batch_size * 1000 / p50, 1) if p50 else 0.0,
+        }
+    return report
+
+
+def format_report(
+    name: str, latency: Dict[int, Dict[str, float]], parity: Optional[Dict] = None
+) -> str:
+    """Render one model's latency (and parity) results as text lines."""
+    lines = [name]
+    for batch_size, stats in latency.items():
+        lines.append(
+            f"  batch={batch_size:<3} p50={stats['p50_ms']:.2f}ms "
+            f"p95={stats['p95_ms']:.2f}ms {stats['images_per_sec']:.1f} img/s"
+        )
+    if parity is not None:
+        lines.append(
+            f"  top1_agreement={parity['top1_agreement']:.2%} "
+            f"max_abs_diff={parity['max_abs_diff']:.4f} "
+            f"mean_abs_diff={parity['mean_abs_diff']:.5f}"
+        )
+    return "\n".join(lines)
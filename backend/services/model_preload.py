@@ -0,0 +1,130 @@
+"""
+Process-level model preloading for gunicorn.
+
+Without preloading every gunicorn worker lazily loads its own copy of the
+ResNet50 Keras model and the TFLite interpreters on the first image request,
+so resident memory grows linearly with the worker count.
+
+``preload_models()`` loads both image models and the symptom model in the
+gunicorn master.  Forked workers then share those pages copy-on-write; as
+long as the weights are only read, the kernel never duplicates them.
+``gc.freeze()`` moves everything allocated so far into the permanent
+generation so the garbage collector does not touch (and therefore dirty)
+those objects in the children.
+
+No inference runs in the master: TensorFlow's intra-op thread pools are
+created on first use and do not survive fork(), so each worker builds its
+own pools on its first request.
+
+See ``gunicorn.conf.py`` at the repository root for the hooks that call
+into this module.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import resource
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def preload_models(freeze: bool = True) -> Dict[str, float]:
+    """
+    Load the symptom model and, unless IMAGE_ROUTES_ENABLED=0, the image
+    models into the current process.
+
+    Intended to run once in the gunicorn master before workers fork.
+    Returns per-model load times in seconds; models that fail to load are
+    reported by ``_initialize_model_cache`` and skipped rather than aborting
+    startup (the image routes then fail per request, as before).
+    """
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    from backend.models.ml_model import ml_model
+
+    ml_model.get_available_diseases()
+    timings["symptom_model"] = time.perf_counter() - started
+
+    # Image models (and TensorFlow) stay out of pools started with
+    # IMAGE_ROUTES_ENABLED=0, which never serve /predict.
+    if os.getenv("IMAGE_ROUTES_ENABLED", "1").lower() in ("1", "true", "yes"):
+        started = time.perf_counter()
+        from backend.routes import predict_disease_type_routes as image_routes
+
+        image_routes._initialize_model_cache()
+        timings["image_models"] = time.perf_counter() - started
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    logger.info(
+        "Model preload complete | %s | %s",
+        " | ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()),
+        format_memory(read_memory_usage()),
+    )
+    return timings
+
+
+def read_memory_usage(pid: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """
+    Return the memory footprint of ``pid`` (default: this process) in MB.
+
+    ``rss_mb`` counts shared copy-on-write pages in full for every worker;
+    ``pss_mb`` (proportional set size, Linux only) splits them between the
+    processes sharing them, so summing PSS across workers gives the real
+    footprint.  Values are None where the platform does not expose them.
+    """
+    pid = pid or os.getpid()
+    usage: Dict[str, Optional[float]] = {
+        "rss_mb": None,
+        "pss_mb": None,
+        "shared_mb": None,
+    }
+
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                fields = rest.split()
+                if not fields:
+                    continue
+                kb = float(fields[0])
+                if key == "Rss":
+                    usage["rss_mb"] = kb / 1024
+                elif key == "Pss":
+                    usage["pss_mb"] = kb / 1024
+                elif key in ("Shared_Clean", "Shared_Dirty"):
+                    usage["shared_mb"] = (usage["shared_mb"] or 0.0) + kb / 1024
+    except OSError:
+        pass
+
+    if usage["rss_mb"] is None and pid == os.getpid():
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["rss_mb"] = peak / (1024 * 1024) if peak > 1 << 30 else peak / 1024
+
+    return {k: round(v, 1) if v is not None else None for k, v in usage.items()}
+
+
+def format_memory(usage: Dict[str, Optional[float]]) -> str:
+    return " | ".join(
+        f"{key}={value}" for key, value in usage.items() if value is not None
+    )
+
+
+def report_worker_memory(worker_id=None) -> Dict[str, Optional[float]]:
+    """Log this worker's RSS/PSS; called from gunicorn's post_worker_init."""
+    usage = read_memory_usage()
+    logger.info(
+        "Worker %s (pid %d) started | %s",
+        worker_id if worker_id is not None else "-",
+        os.getpid(),
+        format_memory(usage),
+    )
+    return usage
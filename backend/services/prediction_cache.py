@@ -0,0 +1,202 @@
+"""
+Content-addressed cache for image predictions and their heatmaps.
+
+Clinicians re-submit the same image often (retries, side-by-side
+comparisons, the same file open in two tabs).  The model output for a given
+upload only depends on the image bytes, the model type and the model
+weights, so ``/predict`` keys its results on
+
+    blake2b(image bytes) + model_type + model_version
+
+and serves repeats without decoding, inference or Grad-CAM.
+
+Two tiers:
+
+  • A per-process LRU bounded by *bytes*, not entries — a base64 PNG
+    overlay pair is a few hundred KB, so an entry count says little about
+    memory.
+  • Optionally the app's Flask-Caching ``cache`` when it is backed by a
+    shared store (e.g. ``CACHE_TYPE=RedisCache``), so workers and instances
+    reuse each other's results.  Process-local backends such as
+    SimpleCache are skipped because they would only duplicate the LRU.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_SHARED_TTL = int(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+# Flask-Caching backends that live inside a single process.
+_LOCAL_CACHE_TYPES = {"NullCache", "SimpleCache", "null", "simple"}
+
+
+def make_cache_key(image_bytes: bytes, model_type: str, model_version: str) -> str:
+    """Return a hex key for an upload scored by a specific model build."""
+    digest = hashlib.blake2b(image_bytes, digest_size=20)
+    digest.update(b"\0" + model_type.encode() + b"\0" + model_version.encode())
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory held by a cached result, dominated by strings."""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class PredictionCache:
+    """Byte-bounded LRU with an optional shared second tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        shared_ttl: int = DEFAULT_SHARED_TTL,
+        key_prefix: str = "image_prediction:",
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+
+        self._entries: "OrderedDict[str, tuple[Dict, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+
+        value = self._shared_get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._shared_hits += 1
+        self._local_set(key, value)
+        return value
+
+    def set(self, key: str, value: Dict):
+        if not self.enabled:
+            return
+        self._local_set(key, value)
+        self._shared_set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._shared_hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "shared_hits": self._shared_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": (
+                    round((self._hits + self._shared_hits) / lookups, 4)
+                    if lookups
+                    else 0.0
+                ),
+            }
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _local_set(self, key: str, value: Dict):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # A single oversized result would flush the whole cache.
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def _shared_cache(self):
+        try:
+            from flask import current_app
+
+            from backend import cache
+
+            cache_type = current_app.config.get("CACHE_TYPE", "SimpleCache")
+        except (ImportError, RuntimeError):
+            return None
+        if cache_type in _LOCAL_CACHE_TYPES:
+            return None
+        return cache
+
+    def _shared_get(self, key: str) -> Optional[Dict]:
+        shared = self._shared_cache()
+        if shared is None:
+            return None
+        try:
+            return shared.get(self.key_prefix + key)
+        except Exception as exc:
+            logger.warning("prediction cache: shared get failed: %s", exc)
+            return None
+
+    def _shared_set(self, key: str, value: Dict):
+        shared = self._shared_cache()
+        if shared is None:
+            return
+        try:
+            shared.set(self.key_prefix + key, value, timeout=self.shared_ttl)
+        except Exception as exc:
+            logger.warning("prediction cache: shared set failed: %s", exc)
+
+
+# Singleton instance
+_prediction_cache = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Get or create the process-wide prediction cache."""
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache()
+    return _prediction_cache
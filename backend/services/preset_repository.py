@@ -0,0 +1,169 @@
+"""
+Disease presets (prior, sensitivity, false-positive rate) shared by the
+calculator page, ``POST /preset`` and the input validators.
+
+The table is loaded once into a dict keyed by normalized disease name and
+served from memory.  Each lookup compares the source's version with the
+loaded one and reloads when it changed:
+
+  • ``PRESET_SOURCE=csv`` (default): hospital_data.csv, versioned by its
+    mtime and size, so an edited file is picked up on the next request;
+  • ``PRESET_SOURCE=db``: the ``diseases`` table filled by seed_diseases.py,
+    re-read every ``PRESET_DB_REFRESH`` seconds (default 300).
+
+A reload builds a complete new table and swaps it in with one assignment;
+readers never see a half-loaded table.  If a reload fails the previous
+table stays in use.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.utils.bayes_engine import resolve_columns
+
+logger = logging.getLogger(__name__)
+
+NAME_COLUMNS = ("disease", "name")
+
+_PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+DEFAULT_CSV_PATH = os.path.join(_PROJECT_ROOT, "hospital_data.csv")
+
+
+def normalize_name(name: str) -> str:
+    """Case- and whitespace-insensitive key for a disease name."""
+    return " ".join(str(name).split()).casefold()
+
+
+def _preset(name, prior, sensitivity, false_positive) -> dict:
+    return {
+        "disease": name,
+        "prior": float(prior),
+        "sensitivity": float(sensitivity),
+        "false_positive": float(false_positive),
+    }
+
+
+def read_csv_presets(path: str) -> List[dict]:
+    """Parse a preset CSV (hospital_data.csv or the older seed format)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames or []
+        columns = resolve_columns(header)
+        lookup = {column.strip().lower(): column for column in header}
+        name_column = next((lookup[n] for n in NAME_COLUMNS if n in lookup), None)
+        if name_column is None:
+            raise ValueError(f"{path} has no disease name column")
+
+        presets = []
+        for row in reader:
+            name = (row.get(name_column) or "").strip()
+            if not name:
+                continue
+            if columns["false_positive_rate"] is not None:
+                false_positive = float(row[columns["false_positive_rate"]])
+            else:
+                false_positive = 1.0 - float(row[columns["specificity"]])
+            presets.append(
+                _preset(
+                    name,
+                    row[columns["prior"]],
+                    row[columns["sensitivity"]],
+                    false_positive,
+                )
+            )
+        return presets
+
+
+def _read_database() -> List[dict]:
+    from backend.models.disease import Disease
+
+    return [
+        _preset(
+            row.disease.strip(), row.prevalence, row.sensitivity, row.false_positive
+        )
+        for row in Disease.query.order_by(Disease.id).all()
+    ]
+
+
+class PresetRepository:
+    """In-memory preset table that follows its source."""
+
+    def __init__(
+        self,
+        csv_path: str = DEFAULT_CSV_PATH,
+        source: str = "csv",
+        db_refresh: float = 300.0,
+    ):
+        self.csv_path = csv_path
+        self.source = source
+        self.db_refresh = db_refresh
+        self._table: Optional[Dict[str, dict]] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _source_version(self):
+        if self.source == "db":
+            return int(time.monotonic() // self.db_refresh)
+        stat = os.stat(self.csv_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> Dict[str, dict]:
+        rows = (
+            _read_database() if self.source == "db" else read_csv_presets(self.csv_path)
+        )
+        table = {}
+        for preset in rows:
+            table.setdefault(normalize_name(preset["disease"]), preset)
+        return table
+
+    def _current(self) -> Dict[str, dict]:
+        try:
+            version = self._source_version()
+        except OSError:
+            if self._table is None:
+                raise
+            return self._table  # file gone: keep serving the last table
+        if version == self._version and self._table is not None:
+            return self._table
+
+        with self._lock:
+            if version == self._version and self._table is not None:
+                return self._table
+            try:
+                table = self._load()
+            except Exception as e:
+                if self._table is None:
+                    raise
+                # Not retried until the source changes again.
+                self._version = version
+                logger.warning("Keeping previous disease presets, reload failed: %s", e)
+                return self._table
+            self._table, self._version = table, version
+            logger.info("Loaded %d disease presets (%s)", len(table), self.source)
+            return table
+
+    def get(self, name: str) -> Optional[dict]:
+        """Preset for ``name`` (any case/spacing), or None."""
+        return self._current().get(normalize_name(name))
+
+    def names(self) -> List[str]:
+        """Disease names in source order."""
+        return [preset["disease"] for preset in self._current().values()]
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+
+presets = PresetRepository(
+    csv_path=os.getenv("PRESET_CSV_PATH", DEFAULT_CSV_PATH),
+    source=os.getenv("PRESET_SOURCE", "csv").lower(),
+    db_refresh=float(os.getenv("PRESET_DB_REFRESH", "300")),
+)
@@ -0,0 +1,311 @@
+"""
+On-demand profiling of a live worker.
+
+Disabled unless ``PROFILER_TOKEN`` is set; the token is read on every
+request, so nothing here needs a restart beyond having it in the
+environment.  Two modes:
+
+  • Sampling: ``start_sampling()`` runs a background thread that records the
+    stack of every other thread in the process every few milliseconds for N
+    seconds, then writes a collapsed-stack file (flamegraph.pl, speedscope)
+    or a speedscope JSON file to ``PROFILER_DIR``.  The request that starts
+    it returns straight away, so a single-threaded gunicorn worker goes on
+    serving traffic while it is being sampled.
+  • Per request: a request carrying a valid ``X-Profile`` header runs under
+    cProfile; the stats are saved to ``PROFILER_DIR`` and their id is sent
+    back in ``X-Profile-Id``.  The header is ``<unix time>:<signature>``
+    where the signature is an HMAC-SHA256 of ``"<time>:<METHOD>:<path>"``
+    keyed with ``PROFILER_TOKEN`` (see ``sign_request``), valid for
+    ``PROFILE_SIGNATURE_TTL`` seconds.
+
+Results are plain files, so any worker on the host can serve them.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from flask import g, request
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SIGNATURE_TTL = 60
+
+DEFAULT_SECONDS = 10.0
+DEFAULT_INTERVAL_MS = 5.0
+FORMATS = {"collapsed": ".collapsed", "speedscope": ".speedscope.json"}
+RESULT_SUFFIXES = tuple(FORMATS.values()) + (".prof",)
+
+_PROFILE_ID_RE = re.compile(r"^(sample|request)-\d+-\d+-[0-9a-f]{8}$")
+
+
+class ProfilerBusy(RuntimeError):
+    """A sampling run is already in progress in this process."""
+
+
+def _token() -> str:
+    return os.getenv("PROFILER_TOKEN", "")
+
+
+def is_enabled() -> bool:
+    return bool(_token())
+
+
+def max_seconds() -> float:
+    return float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+
+def profile_dir() -> str:
+    path = os.getenv("PROFILER_DIR") or os.path.join(
+        tempfile.gettempdir(), "disease-prediction-profiles"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def check_admin_token(supplied: str) -> bool:
+    """Constant-time comparison of a bearer token with PROFILER_TOKEN."""
+    token = _token()
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def sign_request(method: str, path: str, timestamp: Optional[int] = None) -> str:
+    """Value of the X-Profile header that profiles one ``method path`` call."""
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    message = f"{timestamp}:{method.upper()}:{path}".encode()
+    digest = hmac.new(_token().encode(), message, hashlib.sha256).hexdigest()
+    return f"{timestamp}:{digest}"
+
+
+def verify_signature(header: str, method: str, path: str) -> bool:
+    if not is_enabled() or ":" not in header:
+        return False
+    timestamp, _ = header.split(":", 1)
+    if (
+        not timestamp.isdigit()
+        or abs(time.time() - int(timestamp)) > PROFILE_SIGNATURE_TTL
+    ):
+        return False
+    expected = sign_request(method, path, int(timestamp))
+    return hmac.compare_digest(header.encode(), expected.encode())
+
+
+def _new_profile_id(kind: str) -> str:
+    return f"{kind}-{os.getpid()}-{int(time.time())}-{secrets.token_hex(4)}"
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def find_result(profile_id: str) -> Tuple[str, Optional[str]]:
+    """Return ("done", path), ("running", None) or ("missing", None)."""
+    if not _PROFILE_ID_RE.match(profile_id):
+        return "missing", None
+    base = os.path.join(profile_dir(), profile_id)
+    for suffix in RESULT_SUFFIXES:
+        if os.path.exists(base + suffix):
+            return "done", base + suffix
+    if os.path.exists(base + ".pending"):
+        return "running", None
+    return "missing", None
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------------------------
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames in the collapsed format.
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(
+        ";", ":"
+    )
+
+
+class SamplingProfiler:
+    """Counts the stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+
+    def sample_once(self, skip_thread: Optional[int] = None):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == skip_thread:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(f"thread:{names.get(thread_id, thread_id)}")
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float):
+        own = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+            self.sample_once(skip_thread=own)
+            next_tick += self.interval
+        self.duration = time.perf_counter() - started
+
+    def to_collapsed(self) -> str:
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+    def to_speedscope(self, name: str = "profile") -> dict:
+        """speedscope file format, one sampled profile per thread."""
+        frames, frame_index = [], {}
+        per_thread: Dict[str, list] = {}
+        for stack, count in self.stacks.items():
+            indices = []
+            for label in stack[1:]:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            per_thread.setdefault(stack[0], []).append((indices, count))
+
+        profiles = []
+        for thread, entries in sorted(per_thread.items()):
+            weights = [count * self.interval for _, count in entries]
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": [indices for indices, _ in entries],
+                    "weights": weights,
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "disease-prediction sampling profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+_sampling_lock = threading.Lock()
+
+
+def start_sampling(
+    seconds: float = DEFAULT_SECONDS,
+    interval_ms: float = DEFAULT_INTERVAL_MS,
+    fmt: str = "collapsed",
+) -> Tuple[str, threading.Thread]:
+    """
+    Sample this process in a background thread.
+
+    Returns (profile_id, thread); the result file appears in PROFILER_DIR
+    when the thread finishes.  Raises ProfilerBusy if a run is in progress
+    and ValueError for an unknown format.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (use {', '.join(FORMATS)})")
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusy("A sampling profile is already running in this worker")
+
+    profile_id = _new_profile_id("sample")
+    base = os.path.join(profile_dir(), profile_id)
+    pending = base + ".pending"
+    _write_atomic(pending, b"")
+
+    def run():
+        try:
+            profiler = SamplingProfiler(interval=interval_ms / 1000)
+            profiler.run(seconds)
+            if fmt == "speedscope":
+                data = json.dumps(profiler.to_speedscope(profile_id)).encode()
+            else:
+                data = profiler.to_collapsed().encode()
+            _write_atomic(base + FORMATS[fmt], data)
+            print(
+                f"[PROFILER] {profile_id}: {profiler.samples} samples "
+                f"over {profiler.duration:.1f}s"
+            )
+        except Exception as e:
+            print(f"[PROFILER] {profile_id} failed: {e}")
+        finally:
+            if os.path.exists(pending):
+                os.remove(pending)
+            _sampling_lock.release()
+
+    thread = threading.Thread(target=run, name=f"profiler-{profile_id}", daemon=True)
+    thread.start()
+    return profile_id, thread
+
+
+# ---------------------------------------------------------------------------
+# Per-request cProfile
+# ---------------------------------------------------------------------------
+
+
+def _before_request():
+    header = request.headers.get(PROFILE_HEADER)
+    if not header or not verify_signature(header, request.method, request.path):
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is already active on this thread.
+        return
+    g._cprofile = profile
+
+
+def _after_request(response):
+    profile = g.pop("_cprofile", None)
+    if profile is None:
+        return response
+    profile.disable()
+    profile_id = _new_profile_id("request")
+    profile.dump_stats(os.path.join(profile_dir(), profile_id + ".prof"))
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+def _teardown_request(exc):
+    # after_request is skipped when a view raises; don't leave it running.
+    profile = g.pop("_cprofile", None)
+    if profile is not None:
+        profile.disable()
+
+
+def init_app(app):
+    """Install the per-request profiling hooks on ``app``."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
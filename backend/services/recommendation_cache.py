@@ -0,0 +1,127 @@
+"""
+Result cache and request coalescing for Gemini recommendations.
+
+``/gemini-recommendations`` sends the model a prompt built only from the
+disease name, prior, posterior, test result and language.  Identical inputs
+therefore get interchangeable answers.  Results are keyed on
+
+    disease + prior + posterior (rounded) + test_result + language + prompt version
+
+and kept in a :class:`PredictionCache`.  It is the same byte-bounded LRU
+that ``/predict`` uses, with a shared tier when Flask-Caching is backed by
+Redis.  Probabilities are rounded to ``GEMINI_CACHE_PRECISION`` decimals
+(default 3, i.e. 0.1 percentage points).  The route builds the prompt from
+the rounded values too, so a cached answer always quotes the numbers in its
+key.
+
+Requests for a key that is already being generated wait for that call
+instead of starting their own (:class:`SingleFlight`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.services.prediction_cache import PredictionCache
+
+DEFAULT_PRECISION = int(os.getenv("GEMINI_CACHE_PRECISION", "3"))
+DEFAULT_MAX_BYTES = int(os.getenv("GEMINI_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+DEFAULT_SHARED_TTL = int(os.getenv("GEMINI_CACHE_TTL", "86400"))
+
+
+def round_probability(value: float, precision: int = DEFAULT_PRECISION) -> float:
+    """Round a probability to the cache key's precision."""
+    return round(float(value), precision)
+
+
+def make_recommendation_key(
+    disease_name: Optional[str],
+    prior_probability: float,
+    posterior_probability: float,
+    test_result: str,
+    language: str,
+    prompt_version: int,
+) -> str:
+    """Return a hex key for one set of (already rounded) recommendation inputs."""
+    parts = (
+        " ".join((disease_name or "").split()).casefold(),
+        repr(float(prior_probability)),
+        repr(float(posterior_probability)),
+        test_result.lower(),
+        language.lower(),
+        str(prompt_version),
+    )
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=20).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def pending(self, key: str) -> bool:
+        """Whether a call for ``key`` is currently running."""
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return ``(fn(), shared)``.
+
+        ``shared`` is True when the value came from another caller's
+        in-flight call.  Exceptions raised by ``fn`` reach every waiter.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+
+recommendation_flight = SingleFlight()
+
+# Singleton instance
+_recommendation_cache = None
+
+
+def get_recommendation_cache() -> PredictionCache:
+    """Get or create the process-wide recommendation cache."""
+    global _recommendation_cache
+    if _recommendation_cache is None:
+        _recommendation_cache = PredictionCache(
+            max_bytes=DEFAULT_MAX_BYTES,
+            shared_ttl=DEFAULT_SHARED_TTL,
+            key_prefix="gemini_recommendation:",
+        )
+    return _recommendation_cache
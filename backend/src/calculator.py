@@ -1,5 +1,7 @@
 import pandas as pd
 
+from backend.utils.bayes_engine import posterior
+
 
 def validate_probability(value, name="probability", strict_validation=True):
     if strict_validation:
@@ -35,12 +37,7 @@ def bayesian_survival(prior, sensitivity, specificity):
     sensitivity = validate_probability(sensitivity, "sensitivity")
     specificity = validate_probability(specificity, "specificity")
 
-    likelihood = (sensitivity * prior) + ((1 - specificity) * (1 - prior))
-
-    if likelihood == 0:
-        return 0.0
-
-    return (sensitivity * prior) / likelihood
+    return float(posterior(prior, sensitivity, 1 - specificity, zero_division=0.0))
 
 
 class BayesCalculator:
@@ -70,18 +67,12 @@ class BayesCalculator:
             "false_positive_rate",
         )
 
-        numerator = likelihood * prior
-        denominator = numerator + (false_positive_rate * (1 - prior))
-
-        if denominator == 0:
-            posterior = 0.0
-        else:
-            posterior = numerator / denominator
-
         return {
             "prior": prior,
             "likelihood": likelihood,
-            "posterior": posterior,
+            "posterior": float(
+                posterior(prior, likelihood, false_positive_rate, zero_division=0.0)
+            ),
             "false_positive_rate": false_positive_rate,
         }
 
@@ -103,25 +94,20 @@ class BayesCalculator:
         specificity = validate_probability(specificity, "specificity")
 
         false_positive_rate = 1 - specificity
-
-        if test_result.lower() == "positive":
-            numerator = sensitivity * prior
-            denominator = numerator + (false_positive_rate * (1 - prior))
-        else:
-            numerator = (1 - sensitivity) * prior
-            denominator = numerator + (specificity * (1 - prior))
-
-        if denominator == 0:
-            posterior = 0.0
-        else:
-            posterior = numerator / denominator
+        value = posterior(
+            prior,
+            sensitivity,
+            false_positive_rate,
+            positive=test_result.lower() == "positive",
+            zero_division=0.0,
+        )
 
         return {
             "prior": prior,
             "sensitivity": sensitivity,
             "specificity": specificity,
             "false_positive_rate": false_positive_rate,
-            "posterior": posterior,
+            "posterior": float(value),
             "test_result": test_result,
         }
 
@@ -169,14 +155,13 @@ def clean_data(df, strict=False):
 def add_posterior_column(df):
     """Add posterior probability column to dataframe"""
     df = df.copy()
-
-    numerator = df["sensitivity"] * df["prior"]
-    denominator = numerator + ((1 - df["specificity"]) * (1 - df["prior"]))
-
-    # Avoid division by zero: where denominator == 0, set posterior = 0
-    df["posterior"] = numerator / denominator
-    df.loc[denominator == 0, "posterior"] = 0.0
-
+    # Where the denominator is zero the posterior is reported as 0.
+    df["posterior"] = posterior(
+        df["prior"].to_numpy(),
+        df["sensitivity"].to_numpy(),
+        1 - df["specificity"].to_numpy(),
+        zero_division=0.0,
+    )
     return df
 
 
@@ -1,4 +1,9 @@
 import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from unittest.mock import patch
 from dotenv import load_dotenv
@@ -33,8 +38,8 @@ def clear_test_isolation_state():
 
         if hasattr(rate_limiter, "backend"):
             backend = rate_limiter.backend
-            if hasattr(backend, "_requests"):
-                backend._requests.clear()
+            if hasattr(backend, "clear"):
+                backend.clear()
             elif hasattr(backend, "db_path"):
                 import sqlite3
 
@@ -60,3 +65,84 @@ def mock_external_services():
         mock_tts.return_value = io.BytesIO(b"fake audio")
         mock_history.return_value = None
         yield
+
+
+class GeminiStub:
+    """
+    Local stand-in for the Gemini REST API: ``generateContent`` and
+    ``streamGenerateContent`` (alt=sse).  Tests tune it per model.
+    """
+
+    def __init__(self):
+        self.delay = {}  # model -> seconds before answering
+        self.fail = set()  # models answering 500
+        self.replies = {}  # model -> text chunks; default "advice from <model>"
+        self.chunk_delay = 0.0  # pause after each streamed chunk
+        self.fail_after = None  # stream a malformed chunk at this index
+        self.requests = []  # (path, body)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                model = self.path.rsplit("/", 1)[-1].split(":")[0]
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append((self.path, body))
+                time.sleep(stub.delay.get(model, 0))
+                if model in stub.fail:
+                    self.send_error(500)
+                    return
+                chunks = stub.replies.get(model, [f"advice from {model}"])
+                if ":streamGenerateContent" in self.path:
+                    self._stream(chunks)
+                else:
+                    self._answer("".join(chunks))
+
+            def _answer(self, text):
+                payload = json.dumps(_candidate(text)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, chunks):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i, text in enumerate(chunks):
+                    if stub.fail_after is not None and i == stub.fail_after:
+                        self.wfile.write(b"data: {not json\r\n\r\n")
+                        self.wfile.flush()
+                        return
+                    chunk = json.dumps(_candidate(text))
+                    self.wfile.write(f"data: {chunk}\r\n\r\n".encode())
+                    self.wfile.flush()
+                    time.sleep(stub.chunk_delay)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def models_called(self):
+        with self._lock:
+            return [path.rsplit("/", 1)[-1].split(":")[0] for path, _ in self.requests]
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+@pytest.fixture
+def gemini_stub(monkeypatch):
+    """A running :class:`GeminiStub` that the Gemini client is pointed at."""
+    server = GeminiStub()
+    monkeypatch.setenv("GEMINI_API_KEY", "stub-key")
+    monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", server.url)
+    yield server
+    server.server.shutdown()
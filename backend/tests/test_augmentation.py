@@ -0,0 +1,95 @@
+import io
+from unittest import mock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.services.prediction_cache import PredictionCache
+from backend.utils.augmentation import MAX_TTA_VIEWS, aggregate_tta, build_tta_batch
+from backend.utils.image_preprocessing import resnet50_preprocess
+
+
+def _rgb():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(32, 32, 3), dtype=np.uint8)
+
+
+def test_tta_batch_starts_with_the_plain_view_and_caps_views():
+    rgb = _rgb()
+    batch = build_tta_batch(rgb, 4)
+    assert batch.shape == (4, 32, 32, 3)
+    np.testing.assert_array_equal(batch[0], resnet50_preprocess(rgb))
+    np.testing.assert_array_equal(batch[1], resnet50_preprocess(rgb[:, ::-1].copy()))
+    assert build_tta_batch(rgb, 50).shape[0] == MAX_TTA_VIEWS
+
+
+def test_aggregate_averages_logits_and_reports_agreement():
+    preds = np.array(
+        [
+            [0.7, 0.2, 0.1],
+            [0.6, 0.3, 0.1],
+            [0.2, 0.7, 0.1],
+            [0.8, 0.1, 0.1],
+        ]
+    )
+    tta = aggregate_tta(preds)
+
+    expected = np.exp(np.log(preds).mean(axis=0))
+    expected /= expected.sum()
+    np.testing.assert_allclose(tta["probabilities"], expected, rtol=1e-6)
+    assert tta["views"] == 4
+    assert tta["agreement"] == 0.75
+    assert tta["variance"] == pytest.approx(np.var([0.7, 0.6, 0.2, 0.8]))
+
+
+def test_predict_with_tta_runs_one_batched_pass(monkeypatch):
+    from backend.routes import predict_disease_type_routes as routes
+    from backend.services import prediction_cache
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    client = app.test_client()
+
+    def forward(model_type, batch):
+        # Views disagree: half favour class 0, half class 2.
+        preds = np.full((len(batch), 4), 0.05, dtype=np.float32)
+        preds[::2, 0] = 0.85
+        preds[1::2, 2] = 0.85
+        return preds
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (120, 40, 40)).save(buffer, format="JPEG")
+    image = buffer.getvalue()
+    explanation = {"heatmap": None, "image": None, "explanation_method": None}
+    user = mock.MagicMock(is_authenticated=True, id=7)
+
+    with mock.patch.object(
+        prediction_cache, "_prediction_cache", PredictionCache(max_bytes=1 << 20)
+    ), mock.patch.object(routes, "current_user", user), mock.patch.object(
+        routes, "_initialize_model_cache"
+    ), mock.patch.object(
+        routes, "_batch_forward", side_effect=forward
+    ) as batch_forward, mock.patch.object(
+        routes, "_explain", return_value=explanation
+    ), mock.patch.object(
+        routes, "save_history"
+    ):
+        response = client.post(
+            "/predict",
+            data={"image": (io.BytesIO(image), "a.jpg"), "type": "eyes", "tta": "4"},
+            content_type="multipart/form-data",
+        )
+        invalid = client.post(
+            "/predict",
+            data={"image": (io.BytesIO(image), "a.jpg"), "type": "eyes", "tta": "99"},
+            content_type="multipart/form-data",
+        )
+
+    assert response.status_code == 200
+    data = response.get_json()
+    batch_forward.assert_called_once()
+    assert batch_forward.call_args.args[1].shape == (4, 224, 224, 3)
+    assert data["tta"] == {"views": 4, "agreement": 0.5, "variance": 0.16}
+    assert data["low_confidence"] is True
+    assert invalid.status_code == 400
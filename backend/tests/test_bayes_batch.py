@@ -0,0 +1,133 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.utils import bayes_engine
+from backend.utils.calculator import BayesCalculator, bayesian_survival
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+def _scalar_posterior(prior, sensitivity, fpr, positive):
+    specificity = 1 - fpr
+    result = BayesCalculator().calculate_with_test_result(
+        prior, sensitivity, specificity, "positive" if positive else "negative"
+    )
+    return result["posterior"]
+
+
+def test_vectorized_matches_scalar_calculator():
+    rng = np.random.default_rng(7)
+    prior, sensitivity, fpr = rng.uniform(0.01, 0.99, size=(3, 200))
+    positive = rng.random(200) < 0.5
+
+    values = bayes_engine.posterior(prior, sensitivity, fpr, positive)
+    expected = [
+        _scalar_posterior(*args) for args in zip(prior, sensitivity, fpr, positive)
+    ]
+    np.testing.assert_allclose(np.round(values, 4), expected, atol=1e-4)
+
+
+def test_posterior_broadcasts_and_flags_zero_evidence():
+    priors = np.linspace(0, 1, 5)
+    values = bayes_engine.posterior(priors, 0.9, 0.05)
+    assert values.shape == (5,)
+    assert values[0] == 0.0 and values[-1] == 1.0
+
+    assert np.isnan(bayes_engine.posterior(0.0, 0.9, 0.0))
+    assert bayes_engine.posterior(0.0, 0.9, 0.0, zero_division=0.0) == 0.0
+    with pytest.raises(ValueError):
+        bayesian_survival(0.0, 0.9, 0.0)
+
+
+def test_evaluate_frame_reports_bad_rows():
+    df = pd.DataFrame(
+        {
+            "prior_probability": ["0.1", "abc", "1.5", "0.2", "0"],
+            "specificity": ["0.95", "0.9", "0.9", "0.9", "1"],
+            "sensitivity": ["0.9", "0.9", "0.9", "0.9", "0.9"],
+            "testResult": ["positive", "positive", "negative", "maybe", "positive"],
+        }
+    )
+    out = bayes_engine.evaluate_frame(df)
+    assert out["posterior"][0] == pytest.approx(bayesian_survival(0.1, 0.9, 0.05))
+    assert out["error"].tolist() == [
+        "",
+        "non-numeric input",
+        "probabilities must be between 0 and 1",
+        "test_result must be positive or negative",
+        "zero evidence for this test result",
+    ]
+    assert out["posterior"][1:].isna().all()
+
+
+def test_missing_columns_named():
+    with pytest.raises(ValueError, match="false_positive_rate \\(or specificity\\)"):
+        bayes_engine.resolve_columns(["prior", "sensitivity"])
+
+
+def test_batch_endpoint_streams_csv(client, monkeypatch):
+    monkeypatch.setattr(bayes_engine, "BATCH_CHUNK_ROWS", 3)
+    rows = ["prior,sensitivity,false_positive_rate,test_result"]
+    rows += [
+        f"0.{i},0.9,0.05,{'positive' if i % 2 else 'negative'}" for i in range(1, 8)
+    ]
+    upload = io.BytesIO("\n".join(rows).encode())
+
+    response = client.post(
+        "/api/bayes/batch",
+        data={"file": (upload, "cohort.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.is_streamed
+
+    records = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(records) == 7  # one header despite three chunks
+    assert float(records[0]["posterior"]) == pytest.approx(
+        bayes_engine.posterior(0.1, 0.9, 0.05, positive=True)
+    )
+    assert float(records[1]["posterior"]) == pytest.approx(
+        bayes_engine.posterior(0.2, 0.9, 0.05, positive=False)
+    )
+    assert all(record["error"] == "" for record in records)
+
+
+def test_batch_endpoint_accepts_raw_csv_body(client):
+    response = client.post(
+        "/api/bayes/batch",
+        data="prior,sensitivity,specificity\n0.5,0.5,0.5\n",
+        content_type="text/csv",
+    )
+    records = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert float(records[0]["posterior"]) == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ("", "Upload a CSV file"),
+        ("prior,sensitivity\n0.1,0.9\n", "missing columns"),
+        ("prior,sensitivity,specificity\n", "no rows"),
+    ],
+)
+def test_batch_endpoint_rejects_bad_uploads(client, body, message):
+    if body:
+        data = {"file": (io.BytesIO(body.encode()), "cohort.csv")}
+    else:
+        data = {}
+    response = client.post(
+        "/api/bayes/batch", data=data, content_type="multipart/form-data"
+    )
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
@@ -0,0 +1,93 @@
+import base64
+
+import numpy as np
+import pytest
+
+from backend.utils import bayes_engine
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+def _decode(payload):
+    dtype = "<u2" if payload["bits"] == 16 else "u1"
+    values = np.frombuffer(base64.b64decode(payload["data"]), dtype=dtype)
+    n = payload["resolution"]
+    return values.reshape(n, n, n) / payload["scale"]
+
+
+def _trilinear(grid, point):
+    # Trilinear lookup a client would do; axis point i is (i / (n - 1)) ** 2.
+    n = grid.shape[0]
+    coords = np.sqrt(np.clip(point, 0, 1)) * (n - 1)
+    base = np.minimum(np.floor(coords).astype(int), n - 2)
+    frac = coords - base
+    value = 0.0
+    for corner in range(8):
+        upper = [(corner >> (2 - axis)) & 1 for axis in range(3)]
+        weight = np.prod([f if u else 1 - f for f, u in zip(frac, upper)])
+        value += weight * grid[tuple(base + upper)]
+    return value
+
+
+@pytest.mark.parametrize("test_result", ["positive", "negative"])
+def test_grid_nodes_match_exact_posterior(client, test_result):
+    response = client.get(f"/api/bayes/grid?resolution=9&test_result={test_result}")
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["axes"] == ["prior", "sensitivity", "false_positive_rate"]
+    grid = _decode(payload)
+
+    axis = bayes_engine.grid_axis(9)
+    exact = bayes_engine.posterior(
+        axis[:, None, None],
+        axis[None, :, None],
+        axis[None, None, :],
+        test_result == "positive",
+        zero_division=0.0,
+    )
+    np.testing.assert_allclose(grid, exact, atol=1 / 65535)
+
+
+def test_interpolated_values_close_to_exact(client):
+    grid = _decode(client.get("/api/bayes/grid?resolution=41").get_json())
+    for point in [(0.01, 0.99, 0.05), (0.3, 0.77, 0.21), (0.5, 0.9, 0.1)]:
+        exact = bayes_engine.posterior(*point)
+        assert _trilinear(grid, np.array(point)) == pytest.approx(exact, abs=2e-3)
+
+
+def test_grid_cached_per_resolution():
+    bayes_engine.posterior_grid.cache_clear()
+    first = bayes_engine.posterior_grid(21, True, 16)
+    assert bayes_engine.posterior_grid(21, True, 16) is first
+    bayes_engine.posterior_grid(21, False, 16)
+    info = bayes_engine.posterior_grid.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_binary_format_and_conditional_get(client):
+    response = client.get("/api/bayes/grid?resolution=5&bits=8&format=binary")
+    assert response.mimetype == "application/octet-stream"
+    assert len(response.data) == 5**3
+    assert response.headers["X-Grid-Resolution"] == "5"
+    assert response.headers["X-Grid-Scale"] == "255"
+    assert "max-age=86400" in response.headers["Cache-Control"]
+
+    etag = response.headers["ETag"]
+    again = client.get(
+        "/api/bayes/grid?resolution=5&bits=8&format=binary",
+        headers={"If-None-Match": etag},
+    )
+    assert again.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "query", ["resolution=1", "resolution=500", "bits=32", "test_result=maybe"]
+)
+def test_grid_rejects_bad_parameters(client, query):
+    assert client.get(f"/api/bayes/grid?{query}").status_code == 400
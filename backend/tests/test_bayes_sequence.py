@@ -0,0 +1,155 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from backend.utils import bayes_engine
+from backend.utils.calculator import BayesCalculator
+
+calculator = BayesCalculator()
+
+TESTS = [
+    {"name": "ELISA", "result": "positive", "sensitivity": 0.9, "specificity": 0.95},
+    {"name": "PCR", "result": "negative", "sensitivity": 0.8, "specificity": 0.9},
+    {"name": "CT", "result": "positive", "sensitivity": 0.7, "specificity": 0.85},
+]
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+def test_trajectory_matches_chained_single_test_updates():
+    result = calculator.calculate_with_test_sequence(0.1, TESTS)
+
+    posterior = 0.1
+    for test, step in zip(TESTS, result["trajectory"]):
+        posterior = calculator.calculate_with_test_result(
+            posterior, test["sensitivity"], test["specificity"], test["result"]
+        )["posterior"]
+        assert step["posterior"] == pytest.approx(posterior, abs=2e-4)
+    assert result["posterior"] == pytest.approx(posterior, abs=2e-4)
+    assert [step["test"] for step in result["trajectory"]] == ["ELISA", "PCR", "CT"]
+    assert result["order_drift"] < 1e-12
+
+
+def test_every_permutation_gives_the_same_posterior():
+    finals = {
+        calculator.calculate_with_test_sequence(0.2, list(order))["posterior"]
+        for order in itertools.permutations(TESTS)
+    }
+    assert len(finals) == 1
+
+
+@pytest.mark.parametrize("mode", ["max", "mean"])
+def test_grouped_tests_are_not_double_counted(mode):
+    results = [1.0, 1.0, 1.0]
+    sensitivity = [0.9, 0.8, 0.7]
+    specificity = [0.9, 0.9, 0.9]
+    independent = bayes_engine.sequential_posterior(
+        0.1, results, sensitivity, specificity
+    )
+    grouped = bayes_engine.sequential_posterior(
+        0.1,
+        results,
+        sensitivity,
+        specificity,
+        groups=["img", "img", None],
+        group_mode=mode,
+    )
+    llr = grouped["log_likelihood_ratios"]
+    expected_group = llr[0] if mode == "max" else (llr[0] + llr[1]) / 2
+    expected = bayes_engine._expit(bayes_engine._logit(0.1) + expected_group + llr[2])
+    assert grouped["posterior"] == pytest.approx(expected)
+    assert grouped["posterior"] < independent["posterior"]
+
+    for order in itertools.permutations(range(3)):
+        order = list(order)
+        shuffled = bayes_engine.sequential_posterior(
+            0.1,
+            [results[i] for i in order],
+            [sensitivity[i] for i in order],
+            [specificity[i] for i in order],
+            groups=[["img", "img", None][i] for i in order],
+            group_mode=mode,
+        )
+        assert shuffled["posterior"] == pytest.approx(grouped["posterior"])
+
+
+def test_vectorized_over_patients_with_missing_tests():
+    rng = np.random.default_rng(3)
+    priors = rng.uniform(0.01, 0.5, 1000)
+    results = (rng.random((1000, 4)) < 0.5).astype(float)
+    results[rng.random((1000, 4)) < 0.2] = np.nan  # not performed
+    sensitivity = np.array([0.9, 0.8, 0.75, 0.6])
+    specificity = np.array([0.95, 0.85, 0.8, 0.7])
+
+    out = bayes_engine.sequential_posterior(priors, results, sensitivity, specificity)
+    assert out["trajectory"].shape == (1000, 5)
+    np.testing.assert_allclose(out["trajectory"][:, 0], priors)
+
+    # Spot-check one patient against the single-patient path.
+    row = 17
+    one = bayes_engine.sequential_posterior(
+        priors[row], results[row], sensitivity, specificity
+    )
+    np.testing.assert_allclose(one["trajectory"], out["trajectory"][row])
+    skipped = np.isnan(results[row])
+    steps = np.diff(one["trajectory"])
+    assert np.all(steps[skipped] == 0)
+    assert bayes_engine.order_drift(priors, results, sensitivity, specificity) < 1e-12
+
+
+def test_perfect_tests_and_contradictions():
+    assert bayes_engine.sequential_posterior(0.3, [1], 0.9, 1.0)["posterior"] == 1.0
+    assert bayes_engine.sequential_posterior(0.3, [0], 1.0, 0.9)["posterior"] == 0.0
+    contradiction = bayes_engine.sequential_posterior(
+        0.3, [1, 0], [0.9, 1.0], [1.0, 0.9]
+    )
+    assert np.isnan(contradiction["posterior"])
+    # A certain prior is a fixed point, not a contradiction.
+    certain_no = bayes_engine.sequential_posterior(0.0, [1], 0.9, 1.0)
+    assert certain_no["trajectory"].tolist() == [0.0, 0.0]
+    assert (
+        bayes_engine.sequential_posterior(1.0, [0, 1], [1.0, 0.9], [0.9, 1.0])[
+            "posterior"
+        ]
+        == 1.0
+    )
+    with pytest.raises(ValueError, match="contradict"):
+        calculator.calculate_with_test_sequence(
+            0.3,
+            [
+                {"result": "positive", "sensitivity": 0.9, "specificity": 1.0},
+                {"result": "negative", "sensitivity": 1.0, "specificity": 0.9},
+            ],
+        )
+
+
+def test_sequence_endpoint(client):
+    response = client.post("/api/bayes/sequence", json={"prior": 0.1, "tests": TESTS})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["trajectory"]) == 3
+    assert body["risk_tier"] in ("Low", "Medium", "High")
+
+    bad = client.post(
+        "/api/bayes/sequence",
+        json={
+            "prior": 0.1,
+            "tests": [{"result": "maybe", "sensitivity": 0.9, "specificity": 0.9}],
+        },
+    )
+    assert bad.status_code == 400
+    assert client.post("/api/bayes/sequence", json={"prior": 0.1}).status_code == 400
+
+    grouped = dict(TESTS[0], group=["panel"])
+    response = client.post(
+        "/api/bayes/sequence", json={"prior": 0.1, "tests": [grouped]}
+    )
+    assert response.status_code == 400
+    assert "group" in response.get_json()["error"]
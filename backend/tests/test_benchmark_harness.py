@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("tensorflow")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_benchmark_harness_reports_every_stage_with_stand_in_models(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'bench.db'}")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "benchmark_image_inference.py",
+            "--sizes",
+            "96x64",
+            "--formats",
+            "jpeg,png,webp",
+            "--repeats",
+            "2",
+            "--concurrency",
+            "2",
+            "--stand-in",
+            "--json",
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    report = json.loads(result.stdout[result.stdout.index('{\n  "model_kinds"') :])
+    assert report["model_kinds"] == {"eyes": "stand-in", "skin": "stand-in"}
+    assert report["peak_rss_mb"] > 0
+
+    eyes = report["models"]["eyes"]
+    for stage in (
+        "preprocess",
+        "inference",
+        "grad-cam",
+        "predict",
+        "predict x2 threads",
+    ):
+        assert eyes[stage]["count"] > 0
+        assert eyes[stage]["p99_ms"] >= eyes[stage]["p50_ms"]
+    assert "preprocess[96x64.webp]" in eyes
+    assert "score-cam" in report["models"]["skin"]
@@ -0,0 +1,131 @@
+import json
+import time
+
+import pytest
+
+from backend.utils import gemini_helper
+
+REPLY = ["Diabetes ", "is a chronic ", "condition. ", "I am an AI, not a doctor."]
+
+
+@pytest.fixture
+def fake(gemini_stub):
+    gemini_stub.replies["gemini-2.5-flash"] = REPLY
+    return gemini_stub
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+def _events(raw):
+    events = []
+    for block in raw.split("\n\n"):
+        lines = [line for line in block.splitlines() if not line.startswith(":")]
+        if not lines:
+            continue
+        event = "message"
+        for line in lines:
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                events.append((event, json.loads(line[5:])))
+    return events
+
+
+CHAT = [
+    {"role": "model", "text": "Hi there! How can I help?"},
+    {"role": "user", "text": "What is diabetes?"},
+]
+
+
+def test_stream_forwards_chunks_then_done(client, fake):
+    response = client.post("/api/chat/stream", json={"messages": CHAT})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    events = _events(response.get_data(as_text=True))
+    assert [data["delta"] for event, data in events[:-1]] == REPLY
+    assert events[-1] == ("done", {})
+
+    path, body = fake.requests[0]
+    assert "gemini-2.5-flash:streamGenerateContent" in path
+    assert [c["role"] for c in body["contents"]] == ["model", "user"]
+    assert (
+        "Disease Prediction Application"
+        in body["systemInstruction"]["parts"][0]["text"]
+    )
+
+
+def test_first_byte_arrives_before_the_reply_is_complete(client, fake):
+    fake.chunk_delay = 0.5
+    started = time.perf_counter()
+    response = client.post("/api/chat/stream", json={"messages": CHAT}, buffered=False)
+    chunks = iter(response.response)
+
+    assert next(chunks).startswith(b":")  # headers + comment flushed at once
+    first_delta = next(chunks)
+    assert json.loads(first_delta.split(b"data: ", 1)[1])["delta"] == REPLY[0]
+    assert time.perf_counter() - started < 1.0
+
+    rest = b"".join(chunks)
+    assert time.perf_counter() - started >= 1.5
+    assert b"event: done" in rest
+    response.close()
+
+
+def test_upstream_error_becomes_error_event(client, fake):
+    fake.fail_after = 2
+    events = _events(
+        client.post("/api/chat/stream", json={"messages": CHAT}).get_data(as_text=True)
+    )
+    assert [data["delta"] for event, data in events if event == "message"] == REPLY[:2]
+    assert events[-1][0] == "error"
+    assert "trouble connecting" in events[-1][1]["response"]
+
+
+def test_bad_requests_and_missing_key(client, monkeypatch):
+    assert client.post("/api/chat/stream", json={}).status_code == 400
+    assert client.post("/api/chat/stream", json={"messages": []}).status_code == 400
+
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    response = client.post("/api/chat/stream", json={"messages": CHAT})
+    assert response.status_code == 500
+    assert response.get_json()["response"] == "Configuration Error: API key missing."
+
+
+def test_non_streaming_chat_uses_shared_client(client, fake):
+    response = client.post("/api/chat", json={"messages": CHAT})
+    assert response.status_code == 200
+    assert response.get_json()["response"] == "".join(REPLY)
+    assert ":generateContent" in fake.requests[0][0]
+
+
+def test_estimate_tokens_tracks_words_not_characters():
+    assert gemini_helper.estimate_tokens("") == 0
+    assert gemini_helper.estimate_tokens("What is the probability of diabetes?") == 9
+    assert gemini_helper.estimate_tokens("2024") == 4  # digits are single tokens
+    # Non-Latin scripts split into more pieces per character.
+    assert gemini_helper.estimate_tokens("मधुमेह") > gemini_helper.estimate_tokens(
+        "diabetes"
+    )
+
+
+def test_history_is_trimmed_by_token_budget(monkeypatch):
+    monkeypatch.setattr(gemini_helper, "token_limit", 50)
+    turn = "word " * 20  # 20 tokens, 100 characters
+    messages = [
+        {"role": "user" if i % 2 else "model", "text": f"{turn}{i}"} for i in range(6)
+    ] + [{"role": "user", "text": "latest question"}]
+
+    history = gemini_helper.process_history(messages)
+    # Two 21-token turns fit in 50; the character count (100+) would keep one.
+    assert [c.parts[0].text[-1] for c in history] == ["4", "5"]
+
+    huge = [{"role": "model", "text": "word " * 500}, {"role": "user", "text": "q"}]
+    assert len(gemini_helper.process_history(huge)) == 1  # newest turn is always kept
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+from backend.routes import disease_routes
+from backend.services import recommendation_cache
+from backend.services.prediction_cache import PredictionCache
+from backend.services.recommendation_cache import SingleFlight
+from backend.utils import gemini_helper
+
+
+@pytest.fixture
+def stub(gemini_stub, monkeypatch):
+    monkeypatch.setenv("GEMINI_HEDGE_DELAY", "5")
+    return gemini_stub
+
+
+@pytest.fixture
+def client(stub, monkeypatch):
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    # Undo the conftest mock: these tests talk to the stub server.
+    monkeypatch.setattr(
+        disease_routes,
+        "generate_recommendations",
+        gemini_helper.generate_recommendations,
+    )
+    monkeypatch.setattr(
+        recommendation_cache,
+        "_recommendation_cache",
+        PredictionCache(max_bytes=1 << 20, key_prefix="gemini_recommendation:"),
+    )
+    return app.test_client()
+
+
+def _payload(**overrides):
+    payload = {
+        "disease_name": "Diabetes",
+        "prior_probability": 0.1,
+        "posterior_probability": 0.64,
+        "test_result": "positive",
+        "language": "english",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_client_is_built_once_per_key(stub, monkeypatch):
+    first = gemini_helper.get_client()
+    assert gemini_helper.get_client() is first
+    monkeypatch.setenv("GEMINI_API_KEY", "rotated-key")
+    assert gemini_helper.get_client() is not first
+
+
+def test_primary_model_answers(stub):
+    result = gemini_helper.generate_recommendations("Diabetes", 0.1, 0.64)
+    assert result["success"] is True
+    assert result["model"] == "gemini-2.5-flash"
+    assert stub.models_called() == ["gemini-2.5-flash"]
+    prompt = stub.requests[0][1]["contents"][0]["parts"][0]["text"]
+    assert "10.00%" in prompt
+
+
+def test_hedges_to_pro_when_flash_is_slow(stub, monkeypatch):
+    monkeypatch.setenv("GEMINI_HEDGE_DELAY", "0.1")
+    stub.delay["gemini-2.5-flash"] = 1.5
+
+    started = time.perf_counter()
+    result = gemini_helper.generate_recommendations("Diabetes", 0.1, 0.64)
+    assert time.perf_counter() - started < 1.0
+    assert result["recommendations"] == "advice from gemini-2.5-pro"
+    assert stub.models_called() == ["gemini-2.5-flash", "gemini-2.5-pro"]
+
+
+def test_falls_back_when_flash_fails_or_times_out(stub, monkeypatch):
+    stub.fail.add("gemini-2.5-flash")
+    assert (
+        gemini_helper.generate_recommendations("Flu", 0.2, 0.5)["model"]
+        == "gemini-2.5-pro"
+    )
+
+    stub.fail.clear()
+    stub.delay["gemini-2.5-flash"] = 1.5
+    monkeypatch.setenv("GEMINI_FLASH_TIMEOUT", "0.2")
+    started = time.perf_counter()
+    assert (
+        gemini_helper.generate_recommendations("Flu", 0.2, 0.5)["model"]
+        == "gemini-2.5-pro"
+    )
+    assert time.perf_counter() - started < 1.0
+
+
+def test_both_models_failing_is_reported(stub):
+    stub.fail.update({"gemini-2.5-flash", "gemini-2.5-pro"})
+    result = gemini_helper.generate_recommendations("Flu", 0.2, 0.5)
+    assert result["success"] is False
+    assert "Unable to generate" in result["recommendations"]
+
+
+def test_cache_hits_do_not_spend_the_gemini_rate_limit(client, stub):
+    for _ in range(8):
+        response = client.post("/gemini-recommendations", json=_payload())
+        assert response.status_code == 200
+    assert stub.models_called() == ["gemini-2.5-flash"]
+
+    # Same key after rounding, different casing: still a hit.
+    hit = client.post(
+        "/gemini-recommendations",
+        json=_payload(disease_name="diabetes", prior_probability=0.10004),
+    ).get_json()
+    assert hit["cached"] is True
+    assert hit["prior_probability"] == 0.10004
+
+    # Four more distinct misses use up the 5/hour budget; the fifth is refused.
+    for i in range(4):
+        miss = client.post(
+            "/gemini-recommendations",
+            json=_payload(posterior_probability=0.5 + i / 100),
+        )
+        assert miss.status_code == 200
+        assert miss.get_json()["cached"] is False
+    limited = client.post("/gemini-recommendations", json=_payload(language="hindi"))
+    assert limited.status_code == 429
+    assert client.post("/gemini-recommendations", json=_payload()).status_code == 200
+
+
+def test_failures_are_not_cached(client, stub):
+    stub.fail.update({"gemini-2.5-flash", "gemini-2.5-pro"})
+    assert (
+        client.post("/gemini-recommendations", json=_payload()).get_json()["success"]
+        is False
+    )
+    stub.fail.clear()
+    response = client.post("/gemini-recommendations", json=_payload()).get_json()
+    assert response["success"] is True
+    assert response["cached"] is False
+
+
+def test_concurrent_identical_requests_share_one_upstream_call(client, stub):
+    stub.delay["gemini-2.5-flash"] = 0.3
+    barrier = threading.Barrier(6)
+    responses = []
+
+    def post():
+        barrier.wait()
+        responses.append(client.post("/gemini-recommendations", json=_payload()))
+
+    threads = [threading.Thread(target=post) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in responses] == [200] * 6
+    assert stub.models_called() == ["gemini-2.5-flash"]
+    assert {r.get_json()["recommendations"] for r in responses} == {
+        "advice from gemini-2.5-flash"
+    }
+
+
+def test_single_flight_propagates_errors_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    def failing():
+        release.wait()
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            results.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not flight.pending("k"):
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["upstream down"] * 3
+    assert not flight.pending("k")
+    assert flight.do("k", lambda: 42) == (42, False)
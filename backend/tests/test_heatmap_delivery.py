@@ -0,0 +1,132 @@
+import base64
+import io
+from unittest import mock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.services.prediction_cache import PredictionCache
+from backend.utils.gradcam import heatmap_to_uint8, render_heatmap_images
+
+
+def _result():
+    heatmap = np.linspace(0, 255, 49, dtype=np.uint8).reshape(7, 7)
+    image = np.full((32, 32, 3), 90, dtype=np.uint8)
+    return {
+        "prediction": "Cataract",
+        "confidence": 0.91,
+        "low_confidence": False,
+        "warning": None,
+        "heatmap": {"shape": [7, 7], "data": heatmap.tobytes()},
+        "image": {"shape": [32, 32, 3], "data": image.tobytes()},
+        "explanation_method": "grad-cam",
+    }
+
+
+def _png_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (120, 40, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+@pytest.fixture
+def patched_routes():
+    from backend.routes import predict_disease_type_routes as routes
+    from backend.services import prediction_cache
+
+    user = mock.MagicMock(is_authenticated=True, id=7)
+    with mock.patch.object(
+        prediction_cache, "_prediction_cache", PredictionCache(max_bytes=1 << 20)
+    ), mock.patch.object(routes, "current_user", user), mock.patch.object(
+        routes, "_initialize_model_cache"
+    ), mock.patch.object(
+        routes, "_run_prediction", return_value=_result()
+    ), mock.patch.object(
+        routes, "save_history"
+    ):
+        yield routes
+
+
+def _predict(client, heatmap_format):
+    return client.post(
+        "/predict",
+        data={
+            "image": (io.BytesIO(_png_upload()), "a.png"),
+            "type": "eyes",
+            "heatmap_format": heatmap_format,
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def test_heatmap_to_uint8_caps_resolution_and_quantises():
+    heatmap = np.random.default_rng(0).random((200, 100), dtype=np.float32)
+    quantised = heatmap_to_uint8(heatmap, max_side=64)
+    assert quantised.dtype == np.uint8
+    assert quantised.shape == (64, 32)
+
+    small = np.array([[0.0, 0.5], [1.0, 0.25]], dtype=np.float32)
+    assert heatmap_to_uint8(small).tolist() == [[0, 128], [255, 64]]
+
+
+def test_render_accepts_uint8_and_float_heatmaps():
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    heatmap = np.linspace(0, 1, 16, dtype=np.float32).reshape(4, 4)
+    overlay_f, coloured_f = render_heatmap_images(heatmap, image)
+    overlay_u, coloured_u = render_heatmap_images(heatmap_to_uint8(heatmap), image)
+    assert overlay_f.shape == coloured_f.shape == (16, 16, 3)
+    assert np.abs(coloured_f.astype(int) - coloured_u.astype(int)).max() <= 4
+
+
+def test_predict_png_format_keeps_inline_data_uris(client, patched_routes):
+    data = _predict(client, "png").get_json()
+    assert data["gradcam_overlay"].startswith("data:image/png;base64,")
+    assert data["gradcam_heatmap"].startswith("data:image/png;base64,")
+    assert "gradcam_raw" not in data
+
+
+def test_predict_raw_format_returns_uint8_grid_without_rendering(
+    client, patched_routes
+):
+    with mock.patch.object(patched_routes, "render_heatmap_images") as render:
+        data = _predict(client, "raw").get_json()
+
+    render.assert_not_called()
+    raw = data["gradcam_raw"]
+    assert raw["shape"] == [7, 7] and raw["dtype"] == "uint8"
+    grid = np.frombuffer(base64.b64decode(raw["data"]), dtype=np.uint8)
+    assert grid.reshape(raw["shape"])[6, 6] == 255
+    assert data["gradcam_overlay"] is None
+
+
+def test_predict_url_format_serves_cacheable_images(client, patched_routes):
+    data = _predict(client, "url").get_json()
+    url = data["gradcam_overlay_url"]
+    assert data["gradcam_heatmap_url"].endswith("/heatmap")
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == "image/webp"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert Image.open(io.BytesIO(response.data)).size == (32, 32)
+
+    revalidated = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+    png = client.get(url + "?format=png")
+    assert png.mimetype == "image/png"
+
+
+def test_heatmap_endpoint_rejects_unknown_keys_and_formats(client, patched_routes):
+    assert client.get("/predict/heatmap/deadbeef/overlay").status_code == 404
+    assert client.get("/predict/heatmap/deadbeef/other").status_code == 400
+    assert _predict(client, "svg").status_code == 400
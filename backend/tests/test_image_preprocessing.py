@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.image_preprocessing import (
+    IMAGENET_BGR_MEAN,
+    decode_image,
+    load_resnet50_input,
+    resnet50_preprocess,
+)
+
+
+def _jpeg_bytes(width, height, exif_orientation=None):
+    img = Image.new("RGB", (width, height), (200, 30, 30))
+    # Mark the left half so orientation changes are observable.
+    img.paste((30, 30, 200), (0, 0, width // 2, height))
+    buffer = io.BytesIO()
+    if exif_orientation is not None:
+        exif = Image.Exif()
+        exif[0x0112] = exif_orientation
+        img.save(buffer, format="JPEG", exif=exif)
+    else:
+        img.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_resnet50_preprocess_matches_caffe_normalisation():
+    rgb = np.random.default_rng(0).integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    expected = rgb[..., ::-1].astype(np.float32) - IMAGENET_BGR_MEAN
+
+    np.testing.assert_allclose(resnet50_preprocess(rgb), expected)
+
+
+def test_resnet50_preprocess_writes_into_supplied_buffer():
+    rgb = np.full((4, 4, 3), 128, dtype=np.uint8)
+    out = np.zeros((1, 4, 4, 3), dtype=np.float32)
+
+    result = resnet50_preprocess(rgb, out)
+
+    assert result is out
+    np.testing.assert_allclose(out[0, 0, 0], 128 - IMAGENET_BGR_MEAN)
+
+
+def test_decode_large_jpeg_returns_target_size():
+    img = decode_image(io.BytesIO(_jpeg_bytes(2000, 1500)), (224, 224))
+    assert img.size == (224, 224)
+    assert img.mode == "RGB"
+
+
+def test_decode_applies_exif_orientation():
+    # Orientation 3 = rotated 180°, so the blue half ends up on the right.
+    img = decode_image(io.BytesIO(_jpeg_bytes(400, 200, exif_orientation=3)), (64, 64))
+    pixels = np.asarray(img)
+    assert pixels[32, 5, 0] > pixels[32, 5, 2]  # left is red
+    assert pixels[32, 58, 2] > pixels[32, 58, 0]  # right is blue
+
+
+def test_decode_png_and_load_resnet50_input():
+    buffer = io.BytesIO()
+    Image.new("RGBA", (600, 300), (10, 20, 30, 255)).save(buffer, format="PNG")
+    buffer.seek(0)
+
+    batch, rgb = load_resnet50_input(buffer, (224, 224))
+
+    assert batch.shape == (1, 224, 224, 3)
+    assert batch.dtype == np.float32
+    assert rgb.shape == (224, 224, 3)
+    np.testing.assert_allclose(
+        batch[0, 100, 100], np.array([30, 20, 10]) - IMAGENET_BGR_MEAN
+    )
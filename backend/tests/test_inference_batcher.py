@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend.services.inference_batcher import MicroBatcher
+
+
+def _double(batch):
+    return batch * 2
+
+
+def test_passthrough_when_batching_disabled():
+    batcher = MicroBatcher(run_batch=_double, max_batch_size=1)
+    out = batcher.submit(np.array([1.0, 2.0]))
+    np.testing.assert_array_equal(out, [2.0, 4.0])
+
+    stats = batcher.get_stats()
+    assert stats["enabled"] is False
+    assert stats["batches"] == 1
+    assert stats["batch_fill_ratio"] == 1.0
+
+
+def test_concurrent_submits_are_batched_and_scattered_in_order():
+    batch_sizes = []
+
+    def run_batch(batch):
+        batch_sizes.append(batch.shape[0])
+        return batch * 10
+
+    batcher = MicroBatcher(run_batch=run_batch, max_batch_size=4, max_latency_ms=200)
+    results = {}
+    barrier = threading.Barrier(4)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.submit(np.array([float(i)]))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    try:
+        assert {i: float(v[0]) for i, v in results.items()} == {
+            0: 0.0,
+            1: 10.0,
+            2: 20.0,
+            3: 30.0,
+        }
+        assert max(batch_sizes) > 1
+        stats = batcher.get_stats()
+        assert stats["items"] == 4
+        assert 0 < stats["batch_fill_ratio"] <= 1
+        assert stats["queue_depth"] == 0
+    finally:
+        batcher.stop()
+
+
+def test_batch_errors_propagate_to_callers():
+    def run_batch(batch):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(run_batch=run_batch, max_batch_size=4, max_latency_ms=1)
+    try:
+        with pytest.raises(RuntimeError, match="model exploded"):
+            batcher.submit(np.zeros(3), timeout=5)
+        assert batcher.get_stats()["errors"] == 1
+    finally:
+        batcher.stop()
+
+
+def test_submit_after_stop_restarts_workers():
+    batcher = MicroBatcher(run_batch=_double, max_batch_size=4, max_latency_ms=1)
+    try:
+        np.testing.assert_array_equal(batcher.submit(np.ones(2), timeout=5), [2.0, 2.0])
+        old_threads = list(batcher._worker_threads)
+        batcher.stop()
+
+        np.testing.assert_array_equal(batcher.submit(np.ones(2), timeout=5), [2.0, 2.0])
+        assert batcher._worker_threads and batcher._worker_threads != old_threads
+        for thread in old_threads:
+            thread.join(timeout=2)
+            assert not thread.is_alive()
+    finally:
+        batcher.stop()
+
+
+def test_stop_fails_inputs_no_worker_picked_up():
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_batch(batch):
+        started.set()
+        release.wait(5)
+        return batch
+
+    batcher = MicroBatcher(
+        run_batch=run_batch, max_batch_size=1 << 10, max_latency_ms=0
+    )
+    errors = []
+
+    def submit():
+        try:
+            batcher.submit(np.zeros(1), timeout=5)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    first = threading.Thread(target=submit)
+    first.start()
+    started.wait(5)  # the only worker is busy with the first input
+    second = threading.Thread(target=submit)
+    second.start()
+    while batcher.get_stats()["queue_depth"] == 0:
+        pass
+    batcher.stop()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert errors == ["MicroBatcher[model] stopped"]
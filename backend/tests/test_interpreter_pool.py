@@ -0,0 +1,92 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from backend.services.interpreter_pool import InterpreterPool
+
+
+def _counting_factory():
+    counter = itertools.count()
+    return lambda: {"id": next(counter)}
+
+
+def test_pool_creates_lazily_and_reuses_interpreters():
+    pool = InterpreterPool(factory=_counting_factory(), size=2)
+
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        pass
+
+    assert first is second
+    stats = pool.get_stats()
+    assert stats["created"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 0
+
+
+def test_pool_never_hands_out_the_same_interpreter_twice():
+    pool = InterpreterPool(factory=_counting_factory(), size=3)
+    in_use = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            with pool.checkout() as item:
+                with lock:
+                    if item["id"] in in_use:
+                        overlaps.append(item["id"])
+                    in_use.add(item["id"])
+                time.sleep(0.001)
+                with lock:
+                    in_use.discard(item["id"])
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert overlaps == []
+    stats = pool.get_stats()
+    assert stats["created"] <= 3
+    assert stats["checkouts"] == 120
+
+
+def test_exhausted_pool_records_waits_and_times_out():
+    pool = InterpreterPool(factory=_counting_factory(), size=1)
+
+    with pool.checkout():
+        with pytest.raises(TimeoutError):
+            with pool.checkout(timeout=0.01):
+                pass
+
+    assert pool.get_stats()["timeouts"] == 1
+
+    release = threading.Event()
+
+    def holder():
+        with pool.checkout():
+            release.wait(1)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    time.sleep(0.02)
+    threading.Timer(0.05, release.set).start()
+    with pool.checkout(timeout=2):
+        pass
+    t.join()
+
+    stats = pool.get_stats()
+    assert stats["waits"] == 1
+    assert stats["max_wait_ms"] > 0
+
+
+def test_prefill_builds_the_requested_number_of_interpreters():
+    pool = InterpreterPool(factory=_counting_factory(), size=4)
+    assert pool.prefill(2) == 2
+    assert pool.get_stats()["idle"] == 2
+    assert pool.prefill() == 4
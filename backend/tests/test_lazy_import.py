@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from backend.services import model_preload
+from backend.utils import lazy_import
+from backend.utils.lazy_import import LazyModule, format_import_report, timed_import
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_lazy_module_imports_on_first_attribute_access(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_module.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe_module", raising=False)
+
+    probe = LazyModule("lazy_probe_module")
+    assert not probe.is_loaded
+    assert "lazy_probe_module" not in sys.modules
+
+    assert probe.VALUE == 42
+    assert probe.is_loaded
+    assert "lazy_probe_module (lazy)" in lazy_import.IMPORT_TIMES
+
+
+def test_timed_import_records_cost_and_report_sorts_slowest_first():
+    with timed_import("probe"):
+        import json  # noqa: F401
+
+    assert "probe" in lazy_import.IMPORT_TIMES
+    report = format_import_report(
+        {
+            "fast": {"seconds": 0.001, "modules": 1},
+            "slow": {"seconds": 1.5, "modules": 300},
+        }
+    )
+    assert report.index("slow") < report.index("fast")
+
+
+def test_create_app_does_not_import_tensorflow():
+    env = dict(os.environ, SECRET_KEY="lazy-import-test", FLASK_ENV="development")
+    code = (
+        "import sys\n"
+        "from backend import create_app\n"
+        "app = create_app()\n"
+        "assert any(r.rule == '/predict' for r in app.url_map.iter_rules())\n"
+        "assert 'tensorflow' not in sys.modules, 'tensorflow imported at startup'\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+def test_preload_skips_image_models_when_image_routes_disabled(monkeypatch):
+    monkeypatch.setenv("IMAGE_ROUTES_ENABLED", "0")
+    with mock.patch(
+        "backend.routes.predict_disease_type_routes._initialize_model_cache"
+    ) as init_cache:
+        timings = model_preload.preload_models(freeze=False)
+
+    init_cache.assert_not_called()
+    assert set(timings) == {"symptom_model"}
@@ -0,0 +1,134 @@
+import json
+import logging
+import logging.handlers
+import os
+
+from backend.middleware.logger import StructuredLogger
+
+
+def _read_json_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_records_written_by_listener_thread(tmp_path):
+    log = StructuredLogger("test_logger_files", log_dir=str(tmp_path))
+    log.info("hello", user_id=7)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.logger.exception("failed")
+    log.close()
+
+    app_lines = _read_json_lines(tmp_path / "app.log")
+    assert app_lines[0]["message"] == "hello"
+    assert app_lines[0]["user_id"] == 7
+    errors = _read_json_lines(tmp_path / "error.log")
+    assert len(errors) == 1
+    assert "ValueError: boom" in errors[0]["exception"]
+    # Nothing runs on the calling thread but the queue handler.
+    assert [type(h).__name__ for h in log.logger.handlers] == ["DroppingQueueHandler"]
+
+
+def test_size_based_rotation(tmp_path):
+    log = StructuredLogger(
+        "test_logger_rotation", log_dir=str(tmp_path), max_bytes=2000, backup_count=2
+    )
+    for i in range(100):
+        log.debug("padding " * 10, index=i)
+    log.close()
+
+    assert os.path.exists(tmp_path / "app.log.1")
+    assert os.path.exists(tmp_path / "app.log.2")
+    assert not os.path.exists(tmp_path / "app.log.3")
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    log = StructuredLogger("test_logger_drops", log_dir=str(tmp_path), queue_size=5)
+    log.close()  # no consumer: the queue fills up
+
+    for _ in range(8):
+        log.info("queued")
+    log.logger.log(logging.ERROR, "also dropped")
+
+    stats = log.get_stats()
+    assert stats["queued"] == 5
+    assert stats["dropped"] == {"INFO": 3, "ERROR": 1}
+
+
+def test_api_requests_sampled_but_errors_kept(tmp_path):
+    log = StructuredLogger(
+        "test_logger_sampling", log_dir=str(tmp_path), api_sample_rate=10
+    )
+    for _ in range(100):
+        log.log_api_request("/api/bayes", "POST", 200, 0.01)
+    for _ in range(5):
+        log.log_api_request("/api/bayes", "POST", 500, 0.01)
+    log.close()
+
+    lines = _read_json_lines(tmp_path / "api.log")
+    ok = [line for line in lines if line["status_code"] == 200]
+    assert len(ok) == 10
+    assert all(line["sample_rate"] == 10 for line in ok)
+    assert sum(line["status_code"] == 500 for line in lines) == 5
+    assert log.get_stats()["api_sampled_out"] == 90
+
+
+def test_per_process_files_are_reopened_after_fork(tmp_path, monkeypatch):
+    monkeypatch.delenv("LOG_WORKER_SLOT", raising=False)
+    log = StructuredLogger(
+        "test_logger_per_process", log_dir=str(tmp_path), per_process=True
+    )
+    log.info("master")
+    log.close()
+    assert os.path.exists(tmp_path / "app.log")
+
+    # Simulate the child side of a fork; gunicorn.conf.py set the slot.
+    parent_queue = log.queue
+    monkeypatch.setenv("LOG_WORKER_SLOT", "0")
+    log._after_fork()
+    assert log.queue is not parent_queue
+    assert log.queue_handler.queue is log.queue
+    log.info("worker")
+    log.close()
+
+    worker_lines = _read_json_lines(tmp_path / "app.worker-0.log")
+    assert [line["message"] for line in worker_lines] == ["worker"]
+    assert [line["message"] for line in _read_json_lines(tmp_path / "app.log")] == [
+        "master"
+    ]
+
+    # A replacement worker in the same slot appends to the same files.
+    log._after_fork()
+    log.info("replacement")
+    log.close()
+    worker_lines = _read_json_lines(tmp_path / "app.worker-0.log")
+    assert [line["message"] for line in worker_lines] == ["worker", "replacement"]
+    assert sorted(os.listdir(tmp_path)) == [
+        "api.log",
+        "api.worker-0.log",
+        "app.log",
+        "app.worker-0.log",
+    ]
+
+
+def test_external_rotation_reopens_moved_files(tmp_path):
+    log = StructuredLogger(
+        "test_logger_external",
+        log_dir=str(tmp_path),
+        rotation="external",
+        per_process=True,  # ignored: one shared file, rotated by logrotate
+    )
+    assert all(
+        isinstance(h, logging.handlers.WatchedFileHandler) for h in log.handlers[1:]
+    )
+    log.info("before")
+    log.close()
+    os.rename(tmp_path / "app.log", tmp_path / "app.log.1")
+
+    log._start_listener()
+    log.info("after")
+    log.close()
+    assert [line["message"] for line in _read_json_lines(tmp_path / "app.log")] == [
+        "after"
+    ]
@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+from backend.services import metrics
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.STORE.reset()
+    metrics.set_enabled(True, server_timing=True)
+    yield metrics.STORE
+    metrics.set_enabled(False, server_timing=False)
+    metrics.configure_multiprocess(None)
+    metrics.STORE.reset()
+
+
+def _phase_app():
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @metrics.timed("model")
+    def score():
+        with metrics.phase("model"):  # nested: counted once
+            return 0.42
+
+    @app.route("/score/<int:item>")
+    def score_route(item):
+        with metrics.phase("preprocess"):
+            pass
+        return jsonify({"item": item, "score": score()})
+
+    return app
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.STORE.reset()
+    assert not metrics.is_enabled()
+
+    @metrics.timed("model")
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    with metrics.phase("bayes"):
+        pass
+    response = _phase_app().test_client().get("/score/1")
+    assert "Server-Timing" not in response.headers
+    assert metrics.STORE.snapshot() == []
+
+
+def test_phases_recorded_per_route_with_server_timing(enabled_metrics):
+    client = _phase_app().test_client()
+    response = client.get("/score/7")
+    client.get("/score/8")
+
+    timing = response.headers["Server-Timing"]
+    for name in ("preprocess", "model", "serialize", "total"):
+        assert f"{name};dur=" in timing
+
+    text = metrics.collect()
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert (
+        'http_request_duration_seconds_count{endpoint="/score/<int:item>",'
+        'method="GET",status="200"} 2'
+    ) in text
+    assert (
+        'request_phase_duration_seconds_count{endpoint="/score/<int:item>",'
+        'phase="model"} 2'
+    ) in text
+    assert 'le="+Inf"' in text
+
+
+def test_render_is_cumulative_and_escaped():
+    store = metrics.HistogramStore(buckets=(0.1, 1.0))
+    store.observe("demo", (("endpoint", 'a"b'),), 0.05)
+    store.observe("demo", (("endpoint", 'a"b'),), 0.5)
+    store.observe("demo", (("endpoint", 'a"b'),), 5.0)
+
+    text = metrics.render_prometheus(
+        metrics.merge_snapshots([store.snapshot()]), store.buckets
+    )
+    assert 'demo_bucket{endpoint="a\\"b",le="0.1"} 1' in text
+    assert 'demo_bucket{endpoint="a\\"b",le="1.0"} 2' in text
+    assert 'demo_bucket{endpoint="a\\"b",le="+Inf"} 3' in text
+    assert 'demo_count{endpoint="a\\"b"} 3' in text
+
+
+def test_scrape_merges_other_worker_snapshots(enabled_metrics, tmp_path):
+    metrics.configure_multiprocess(str(tmp_path), interval=3600)
+    labels = [["endpoint", "/score/<int:item>"], ["phase", "model"]]
+    other = [
+        {
+            "name": metrics.PHASE_METRIC,
+            "labels": labels,
+            "counts": [3] + [0] * len(metrics.BUCKETS),
+            "sum": 0.003,
+        }
+    ]
+    with open(tmp_path / "metrics_999999.json", "w") as f:
+        json.dump(other, f)
+
+    _phase_app().test_client().get("/score/1")
+    text = metrics.collect()
+    assert (
+        'request_phase_duration_seconds_count{endpoint="/score/<int:item>",'
+        'phase="model"} 4'
+    ) in text
+
+    metrics._exporter.flush()
+    assert os.path.exists(tmp_path / f"metrics_{os.getpid()}.json")
+
+
+def test_metrics_endpoint(enabled_metrics, monkeypatch):
+    from run import app
+
+    client = app.test_client()
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    authorized = client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+    )
+    assert authorized.status_code == 200
+
+    metrics.set_enabled(False)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_exited_worker_snapshots_are_folded_and_cleared(tmp_path):
+    entry = {
+        "name": metrics.PHASE_METRIC,
+        "labels": [["endpoint", "/x"], ["phase", "model"]],
+        "counts": [2] + [0] * len(metrics.BUCKETS),
+        "sum": 0.002,
+    }
+    for pid in (101, 102):
+        with open(tmp_path / f"metrics_{pid}.json", "w") as f:
+            json.dump([entry], f)
+
+    metrics.retire_snapshot(str(tmp_path), 101)
+    metrics.retire_snapshot(str(tmp_path), 102)
+    metrics.retire_snapshot(str(tmp_path), 103)  # never wrote a snapshot
+    assert sorted(os.listdir(tmp_path)) == [metrics.RETIRED_SNAPSHOT]
+    with open(tmp_path / metrics.RETIRED_SNAPSHOT) as f:
+        (retired,) = json.load(f)
+    assert retired["counts"][0] == 4
+    assert retired["sum"] == pytest.approx(0.004)
+
+    metrics.clear_snapshots(str(tmp_path))
+    assert os.listdir(tmp_path) == []
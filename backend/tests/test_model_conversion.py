@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from backend.services.model_conversion import (
+    benchmark_latency,
+    compare_predictions,
+    convert_keras_to_tflite,
+    keras_predictor,
+    synthetic_samples,
+    tflite_predictor,
+)
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(32, 32, 3)),
+            tf.keras.layers.Conv2D(8, 3, activation="relu"),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(4, activation="softmax"),
+        ]
+    )
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return synthetic_samples(6, img_size=(32, 32))
+
+
+@pytest.mark.parametrize("quantization", ["dynamic", "int8"])
+def test_converted_model_matches_keras(tmp_path, keras_model, samples, quantization):
+    output = str(tmp_path / f"model_{quantization}.tflite")
+    summary = convert_keras_to_tflite(
+        keras_model, output, quantization=quantization, representative_images=samples
+    )
+    assert summary["quantization"] == quantization
+
+    report = compare_predictions(
+        keras_predictor(keras_model),
+        tflite_predictor(output),
+        samples,
+        batch_size=4,
+        class_names=["a", "b", "c", "d"],
+    )
+    assert report["samples"] == len(samples)
+    assert report["mean_abs_diff"] < 0.05
+    assert set(report) >= {"top1_agreement", "max_abs_diff", "disagreements"}
+
+
+def test_int8_requires_representative_images(tmp_path, keras_model):
+    with pytest.raises(ValueError):
+        convert_keras_to_tflite(keras_model, str(tmp_path / "m.tflite"), "int8")
+    with pytest.raises(ValueError):
+        convert_keras_to_tflite(keras_model, str(tmp_path / "m.tflite"), "int4")
+
+
+def test_benchmark_latency_reports_each_batch_size(samples):
+    report = benchmark_latency(
+        lambda batch: np.zeros((len(batch), 4)), samples, batch_sizes=(1, 8), runs=3
+    )
+    assert set(report) == {1, 8}
+    assert report[8]["p95_ms"] >= report[8]["p50_ms"] >= 0
@@ -0,0 +1,37 @@
+import os
+from unittest import mock
+
+import pytest
+
+from backend.services import model_preload
+
+
+def test_read_memory_usage_reports_rss():
+    usage = model_preload.read_memory_usage()
+    assert usage["rss_mb"] is not None
+    assert usage["rss_mb"] > 0
+
+
+def test_preload_models_initialises_image_cache_and_symptom_model():
+    with mock.patch(
+        "backend.routes.predict_disease_type_routes._initialize_model_cache"
+    ) as init_cache:
+        timings = model_preload.preload_models(freeze=False)
+
+    init_cache.assert_called_once()
+    assert set(timings) == {"symptom_model", "image_models"}
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_rate_limiter_cleanup_thread_restarts_after_fork():
+    from backend.middleware.security import InMemoryBackend
+
+    backend = InMemoryBackend(cleanup_interval=10)
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if backend._cleanup_thread.is_alive() else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        backend.stop()
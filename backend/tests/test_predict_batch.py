@@ -0,0 +1,126 @@
+import io
+from unittest import mock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.services.prediction_cache import PredictionCache
+
+
+def _image(color, fmt="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+@pytest.fixture
+def routes():
+    from backend.routes import predict_disease_type_routes as routes
+    from backend.services import prediction_cache
+
+    def forward(model_type, batch):
+        # Class 1 wins for every image, with a confidence above the threshold.
+        num_classes = len(routes.MODEL_CONFIG[model_type]["class_names"])
+        preds = np.full((len(batch), num_classes), 0.01, dtype=np.float32)
+        preds[:, 1] = 0.9
+        return preds
+
+    user = mock.MagicMock(is_authenticated=True, id=7)
+    with mock.patch.object(
+        prediction_cache, "_prediction_cache", PredictionCache(max_bytes=1 << 20)
+    ), mock.patch.object(routes, "current_user", user), mock.patch.object(
+        routes, "_initialize_model_cache"
+    ), mock.patch.object(
+        routes, "_batch_forward", side_effect=forward
+    ), mock.patch.object(
+        routes, "save_history"
+    ):
+        yield routes
+
+
+def _post(client, files, **form):
+    return client.post(
+        "/predict/batch",
+        data={"images": [(io.BytesIO(data), name) for name, data in files], **form},
+        content_type="multipart/form-data",
+    )
+
+
+def test_batch_returns_results_in_order_with_one_forward_pass_per_type(client, routes):
+    files = [
+        ("a.jpg", _image((200, 10, 10))),
+        ("b.txt", b"definitely not an image"),
+        ("c.png", _image((10, 200, 10), "PNG")),
+        ("d.webp", _image((10, 10, 200), "WEBP")),
+    ]
+    response = _post(client, files, types=["eyes", "eyes", "skin", "eyes"])
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [item["filename"] for item in data["results"]] == [
+        "a.jpg",
+        "b.txt",
+        "c.png",
+        "d.webp",
+    ]
+    assert "error" in data["results"][1]
+    assert data["failed"] == 1
+    assert data["results"][0]["prediction"] == "Diabetic Retinopathy"
+    assert data["results"][2]["type"] == "skin"
+
+    batch_shapes = {
+        call.args[0]: call.args[1].shape
+        for call in routes._batch_forward.call_args_list
+    }
+    assert batch_shapes == {"eyes": (2, 224, 224, 3), "skin": (1, 224, 224, 3)}
+
+    routes.save_history.assert_called_once()
+    history = routes.save_history.call_args.kwargs
+    assert history["prediction_type"] == "image_batch"
+    assert len(history["results"]["predictions"]) == 3
+
+
+def test_batch_heatmaps_use_the_decoded_images(client, routes):
+    explanation = {"heatmap": None, "image": None, "explanation_method": "grad-cam"}
+    with mock.patch.object(routes, "_explain", return_value=explanation) as explain:
+        response = _post(
+            client,
+            [("a.jpg", _image((200, 10, 10))), ("b.jpg", _image((90, 10, 10)))],
+            type="eyes",
+            heatmaps="1",
+        )
+
+    assert response.status_code == 200
+    assert explain.call_count == 2
+    assert explain.call_args.kwargs["preprocessed"][1].shape == (224, 224, 3)
+    for call in explain.call_args_list:
+        assert "a.jpg" not in call.args and "b.jpg" not in call.args
+        assert call.kwargs.get("img_path") is None
+    assert response.get_json()["results"][0]["explanation_method"] == "grad-cam"
+    assert routes.save_history.call_args.kwargs["prediction_type"] == "eyes"
+
+
+def test_batch_rejects_oversized_batches_and_bad_types(client, routes):
+    too_many = [
+        (f"{i}.jpg", _image((i, 0, 0)))
+        for i in range(routes.PREDICT_BATCH_MAX_IMAGES + 1)
+    ]
+    assert _post(client, too_many, type="eyes").status_code == 400
+    assert _post(client, [("a.jpg", _image((1, 2, 3)))], type="ears").status_code == 400
+    assert (
+        _post(
+            client, [("a.jpg", _image((1, 2, 3)))], types=["eyes", "skin"]
+        ).status_code
+        == 400
+    )
+    routes._batch_forward.assert_not_called()
+    routes.save_history.assert_not_called()
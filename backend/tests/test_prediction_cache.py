@@ -0,0 +1,112 @@
+import io
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+from backend.services.prediction_cache import (
+    PredictionCache,
+    estimate_size,
+    make_cache_key,
+)
+
+
+def _result(overlay_size=0):
+    return {
+        "prediction": "Cataract",
+        "confidence": 0.91,
+        "low_confidence": False,
+        "warning": None,
+        "heatmap": None,
+        "image": {"shape": [overlay_size], "data": b"x" * overlay_size},
+        "explanation_method": "grad-cam",
+    }
+
+
+def test_cache_key_depends_on_bytes_type_and_version():
+    base = make_cache_key(b"image", "eyes", "v1")
+    assert base == make_cache_key(b"image", "eyes", "v1")
+    assert base != make_cache_key(b"image2", "eyes", "v1")
+    assert base != make_cache_key(b"image", "skin", "v1")
+    assert base != make_cache_key(b"image", "eyes", "v2")
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    entry_size = estimate_size(_result(10_000))
+    cache = PredictionCache(max_bytes=entry_size * 2 + 100)
+
+    cache.set("a", _result(10_000))
+    cache.set("b", _result(10_000))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.set("c", _result(10_000))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_cache_skips_entries_larger_than_the_budget():
+    cache = PredictionCache(max_bytes=1_000)
+    cache.set("big", _result(50_000))
+    assert cache.get("big") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_disabled_cache_never_stores():
+    cache = PredictionCache(max_bytes=0)
+    cache.set("a", _result())
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+def _png_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (120, 40, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_predict_serves_repeat_uploads_from_cache(client):
+    from backend.routes import predict_disease_type_routes as routes
+    from backend.services import prediction_cache
+
+    cache = PredictionCache(max_bytes=1024 * 1024)
+    user = mock.MagicMock(is_authenticated=True, id=7)
+
+    with mock.patch.object(
+        prediction_cache, "_prediction_cache", cache
+    ), mock.patch.object(routes, "current_user", user), mock.patch.object(
+        routes, "_initialize_model_cache"
+    ), mock.patch.object(
+        routes, "_run_prediction", return_value=_result(100)
+    ) as run_prediction, mock.patch.object(
+        routes, "save_history"
+    ) as save_history:
+        image = _png_upload()
+        first = client.post(
+            "/predict",
+            data={"image": (io.BytesIO(image), "a.png"), "type": "eyes"},
+            content_type="multipart/form-data",
+        )
+        second = client.post(
+            "/predict",
+            data={"image": (io.BytesIO(image), "b.png"), "type": "eyes"},
+            content_type="multipart/form-data",
+        )
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.get_json()["cached"] is False
+    assert second.get_json()["cached"] is True
+    assert second.get_json()["prediction"] == "Cataract"
+    assert run_prediction.call_count == 1
+    assert save_history.call_count == 2
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from backend.services import preset_repository
+from backend.services.preset_repository import PresetRepository
+
+
+def _write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "hospital_data.csv"
+    _write(
+        path,
+        "disease,prior_probability,sensitivity,specificity\n"
+        "Heart Disease,0.4,0.7,0.9\n"
+        "Diabetes,0.3,0.8,0.6\n",
+        1_000_000,
+    )
+    return path
+
+
+def test_lookup_is_normalized_and_parsed_once(csv_path, monkeypatch):
+    repo = PresetRepository(csv_path=str(csv_path))
+    reads = []
+    original = preset_repository.read_csv_presets
+    monkeypatch.setattr(
+        preset_repository,
+        "read_csv_presets",
+        lambda path: reads.append(path) or original(path),
+    )
+
+    assert repo.get("  heart   DISEASE ")["prior"] == 0.4
+    assert repo.get("diabetes")["false_positive"] == pytest.approx(0.4)
+    assert repo.get("Flu") is None
+    assert "Diabetes" in repo
+    assert repo.names() == ["Heart Disease", "Diabetes"]
+    assert len(reads) == 1
+
+
+def test_reloads_when_file_changes(csv_path):
+    repo = PresetRepository(csv_path=str(csv_path))
+    assert repo.get("Flu") is None
+
+    _write(
+        csv_path,
+        "Disease,Prevalence,Sensitivity,FalsePositive\nFlu,0.1,0.9,0.05\n",
+        1_000_100,
+    )
+    assert repo.get("flu") == {
+        "disease": "Flu",
+        "prior": 0.1,
+        "sensitivity": 0.9,
+        "false_positive": 0.05,
+    }
+    assert repo.get("Diabetes") is None
+
+
+def test_keeps_last_table_when_reload_fails(csv_path, caplog):
+    repo = PresetRepository(csv_path=str(csv_path))
+    assert repo.get("Diabetes") is not None
+
+    _write(csv_path, "disease,sensitivity\nDiabetes,0.8\n", 1_000_200)
+    assert repo.get("Diabetes")["prior"] == 0.3
+    assert "Keeping previous disease presets" in caplog.text
+
+    os.remove(csv_path)
+    assert repo.get("Diabetes")["prior"] == 0.3
+
+
+def test_missing_file_before_first_load_raises(tmp_path):
+    repo = PresetRepository(csv_path=str(tmp_path / "missing.csv"))
+    with pytest.raises(FileNotFoundError):
+        repo.get("Diabetes")
+
+
+def test_call_sites_share_the_repository(csv_path, monkeypatch):
+    from backend.routes import disease_routes
+    from backend.utils import validators
+
+    repo = PresetRepository(csv_path=str(csv_path))
+    monkeypatch.setattr(disease_routes, "presets", repo)
+    monkeypatch.setattr(validators, "presets", repo)
+
+    assert disease_routes.load_diseases() == ["Heart Disease", "Diabetes"]
+    schema = validators.BayesInputSchema()
+    payload = {"prior": 0.3, "sensitivity": 0.8, "false_positive_rate": 0.1}
+    assert schema.validate({"disease": "Diabetes", **payload}) == {}
+    assert "disease" in schema.validate({"disease": "Flu", **payload})
+
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    response = app.test_client().post("/preset", json={"disease": "heart disease"})
+    assert response.status_code == 200
+    assert response.get_json()["prior"] == 0.4
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+
+import pytest
+
+from backend.services import profiler
+
+
+@pytest.fixture
+def enabled_profiler(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILER_TOKEN", "admin-secret")
+    monkeypatch.setenv("PROFILER_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client():
+    from run import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app.test_client()
+
+
+ADMIN = {"Authorization": "Bearer admin-secret"}
+
+
+def _parked(ready, release):
+    ready.set()
+    release.wait(10)
+
+
+def test_sampler_records_each_thread_stack():
+    ready, release = threading.Event(), threading.Event()
+    worker = threading.Thread(
+        target=_parked, args=(ready, release), name="parked-worker"
+    )
+    worker.start()
+    ready.wait(5)
+    try:
+        sampler = profiler.SamplingProfiler(interval=0.002)
+        for _ in range(4):
+            sampler.sample_once(skip_thread=threading.get_ident())
+    finally:
+        release.set()
+        worker.join()
+
+    assert sampler.samples == 4
+    parked = [
+        (stack, count)
+        for stack, count in sampler.stacks.items()
+        if stack[0] == "thread:parked-worker"
+    ]
+    # The worker sat in the same frame the whole time: one stack, every sample.
+    assert len(parked) == 1
+    stack, count = parked[0]
+    assert count == 4
+    assert any("_parked" in label for label in stack)
+
+    collapsed = sampler.to_collapsed()
+    assert f"{';'.join(stack)} {count}" in collapsed.splitlines()
+    # The sampling thread never records itself.
+    assert "sample_once" not in collapsed
+
+    document = sampler.to_speedscope("demo")
+    frames = document["shared"]["frames"]
+    profile = next(
+        p for p in document["profiles"] if p["name"] == "thread:parked-worker"
+    )
+    assert profile["type"] == "sampled"
+    assert [[frames[i]["name"] for i in s] for s in profile["samples"]] == [
+        list(stack[1:])
+    ]
+    assert profile["weights"] == [pytest.approx(count * 0.002)]
+
+
+def test_profiler_disabled_by_default(client, monkeypatch):
+    monkeypatch.delenv("PROFILER_TOKEN", raising=False)
+    assert client.post("/api/profiler/sample", headers=ADMIN).status_code == 404
+    response = client.get("/health", headers={profiler.PROFILE_HEADER: "1:abc"})
+    assert profiler.PROFILE_ID_HEADER not in response.headers
+
+
+def test_sample_endpoint_requires_admin_token(client, enabled_profiler):
+    response = client.post("/api/profiler/sample")
+    assert response.status_code == 401
+    response = client.post(
+        "/api/profiler/sample", headers={"Authorization": "Bearer wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_sample_endpoint_runs_in_background(client, enabled_profiler):
+    response = client.post(
+        "/api/profiler/sample",
+        json={"seconds": 0.2, "interval_ms": 2, "format": "speedscope"},
+        headers=ADMIN,
+    )
+    assert response.status_code == 202
+    profile_id = response.get_json()["profile_id"]
+    result_url = response.get_json()["result_url"]
+
+    # Only one run per worker at a time.
+    busy = client.post("/api/profiler/sample", json={"seconds": 0.1}, headers=ADMIN)
+    assert busy.status_code == 409
+
+    deadline = time.time() + 5
+    result = client.get(result_url, headers=ADMIN)
+    while result.status_code == 202 and time.time() < deadline:
+        time.sleep(0.05)
+        result = client.get(result_url, headers=ADMIN)
+    assert result.status_code == 200
+    document = json.loads(result.data)
+    assert document["name"] == profile_id
+    assert document["profiles"]
+
+
+def test_sample_endpoint_wait_returns_collapsed_file(client, enabled_profiler):
+    response = client.post(
+        "/api/profiler/sample?seconds=0.1&interval_ms=2&wait=1", headers=ADMIN
+    )
+    assert response.status_code == 200
+    lines = response.data.decode().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+@pytest.mark.parametrize(
+    "params", ["seconds=0", "seconds=3600", "interval_ms=0.1", "format=svg"]
+)
+def test_sample_endpoint_rejects_bad_parameters(client, enabled_profiler, params):
+    response = client.post(f"/api/profiler/sample?{params}", headers=ADMIN)
+    assert response.status_code == 400
+
+
+def test_signed_header_profiles_one_request(client, enabled_profiler):
+    assert client.get("/health").headers.get(profiler.PROFILE_ID_HEADER) is None
+
+    header = profiler.sign_request("GET", "/health")
+    response = client.get("/health", headers={profiler.PROFILE_HEADER: header})
+    assert response.status_code == 200
+    profile_id = response.headers[profiler.PROFILE_ID_HEADER]
+    assert (enabled_profiler / f"{profile_id}.prof").exists()
+
+    report = client.get(f"/api/profiler/results/{profile_id}", headers=ADMIN)
+    assert report.status_code == 200
+    assert "function calls" in report.data.decode()
+    raw = client.get(f"/api/profiler/results/{profile_id}?format=raw", headers=ADMIN)
+    assert raw.status_code == 200 and raw.data
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        lambda: profiler.sign_request("GET", "/other"),  # signed for another path
+        lambda: profiler.sign_request("POST", "/health"),
+        lambda: profiler.sign_request("GET", "/health", time.time() - 600),  # expired
+        lambda: "not-a-signature",
+    ],
+)
+def test_bad_signatures_are_ignored(client, enabled_profiler, header):
+    response = client.get("/health", headers={profiler.PROFILE_HEADER: header()})
+    assert response.status_code == 200
+    assert profiler.PROFILE_ID_HEADER not in response.headers
+
+
+def test_result_ids_are_validated(client, enabled_profiler):
+    response = client.get("/api/profiler/results/..%2F..%2Fetc%2Fpasswd", headers=ADMIN)
+    assert response.status_code == 404
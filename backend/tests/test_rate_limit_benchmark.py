@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_rate_limit_benchmark_reports_each_backend():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "benchmark_rate_limit_backends.py",
+            "--identifiers",
+            "500",
+            "--checks",
+            "2000",
+            "--threads",
+            "2",
+            "--backends",
+            "in_memory,sqlite",
+            "--json",
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    report = json.loads(result.stdout[result.stdout.index('{\n  "checks"') :])
+    assert set(report["backends"]) == {"in_memory", "sqlite"}
+    for stats in report["backends"].values():
+        assert stats["checks"] == 2000
+        assert stats["checks_per_sec"] > 0
+        assert 0 < stats["buckets"] <= 500 * 5 + 5
+    # Same workload and algorithm, so the backends agree on every decision.
+    shares = {stats["allowed_share"] for stats in report["backends"].values()}
+    assert len(shares) == 1
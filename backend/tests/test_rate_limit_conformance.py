@@ -0,0 +1,123 @@
+"""
+Behaviour every rate limit backend must share.
+
+The Redis backend runs only when RATE_LIMIT_TEST_REDIS_URL points at a
+disposable Redis database (its rate_limit:* keys are deleted).
+"""
+
+import os
+from unittest import mock
+
+import pytest
+
+from backend.middleware.security import (
+    InMemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    redis,
+)
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture(params=["in_memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "in_memory":
+        instance = InMemoryBackend(cleanup_interval=3600)
+    elif request.param == "sqlite":
+        instance = SQLiteBackend(
+            db_path=str(tmp_path / "conformance.db"), cleanup_interval=3600
+        )
+    else:
+        redis_url = os.getenv("RATE_LIMIT_TEST_REDIS_URL")
+        if redis is None or not redis_url:
+            pytest.skip("set RATE_LIMIT_TEST_REDIS_URL to run against Redis")
+        instance = RedisBackend(redis_url=redis_url)
+        instance.clear()
+    try:
+        yield instance
+    finally:
+        if hasattr(instance, "clear"):
+            instance.clear()
+        instance.stop()
+
+
+def _check(backend, identifier, endpoint_type, max_requests, window, at=NOW):
+    with mock.patch("time.time", return_value=at):
+        return backend.check_rate_limit(identifier, endpoint_type, max_requests, window)
+
+
+def test_burst_up_to_limit_then_block(backend):
+    results = [_check(backend, "ip_a", "report", 3, 60) for _ in range(4)]
+    assert results[:3] == [(True, 0, 2), (True, 0, 1), (True, 0, 0)]
+    allowed, retry_after, remaining = results[3]
+    assert allowed is False
+    assert remaining == 0
+    assert 1 <= retry_after <= 21
+
+
+def test_endpoint_types_have_separate_buckets(backend):
+    for _ in range(5):
+        _check(backend, "ip_a", "default", 5, 60)
+    assert _check(backend, "ip_a", "default", 5, 60)[0] is False
+    assert _check(backend, "ip_a", "gemini", 5, 3600) == (True, 0, 4)
+
+
+def test_identifiers_have_separate_buckets(backend):
+    assert _check(backend, "ip_a", "prediction", 1, 60) == (True, 0, 0)
+    assert _check(backend, "ip_a", "prediction", 1, 60)[0] is False
+    assert _check(backend, "ip_b", "prediction", 1, 60) == (True, 0, 0)
+
+
+def test_bucket_refills_at_window_over_limit(backend):
+    for _ in range(4):
+        _check(backend, "ip_a", "ml_analysis", 4, 60)
+    assert _check(backend, "ip_a", "ml_analysis", 4, 60, at=NOW + 14)[0] is False
+    assert _check(backend, "ip_a", "ml_analysis", 4, 60, at=NOW + 15) == (True, 0, 0)
+    assert _check(backend, "ip_a", "ml_analysis", 4, 60, at=NOW + 61) == (True, 0, 2)
+
+
+def test_rejected_requests_are_not_counted(backend):
+    _check(backend, "ip_a", "report", 1, 60)
+    for _ in range(10):
+        assert _check(backend, "ip_a", "report", 1, 60, at=NOW + 30)[0] is False
+    assert _check(backend, "ip_a", "report", 1, 60, at=NOW + 60) == (True, 0, 0)
+
+
+def test_zero_limit_always_blocks(backend):
+    allowed, retry_after, remaining = _check(backend, "ip_a", "default", 0, 60)
+    assert (allowed, remaining) == (False, 0)
+    assert retry_after > 0
+
+
+def test_stats_count_identifiers_and_buckets(backend):
+    for identifier in ("ip_a", "ip_b"):
+        for endpoint_type in ("default", "prediction"):
+            _check(backend, identifier, endpoint_type, 10, 60)
+    stats = backend.get_stats()
+    assert stats["total_identifiers"] == 2
+    assert stats["total_buckets"] == 4
+
+
+def test_prune_drops_only_refilled_buckets(backend):
+    if isinstance(backend, RedisBackend):
+        pytest.skip("Redis keys expire on their own")
+    _check(backend, "ip_a", "default", 10, 60)
+    _check(backend, "ip_b", "gemini", 5, 3600)
+    with mock.patch("time.time", return_value=NOW + 120):
+        backend.prune_stale_entries()
+    assert backend.get_stats()["total_buckets"] == 1
+    assert _check(backend, "ip_b", "gemini", 5, 3600, at=NOW + 120) == (True, 0, 3)
+
+
+def test_redis_ignores_pre_gcra_zset_keys(backend):
+    if not isinstance(backend, RedisBackend):
+        pytest.skip("Redis key layout only")
+    # What a worker from before the GCRA change leaves behind mid-deploy.
+    legacy_key = "rate_limit:ip_a:default"
+    backend.redis_client.zadd(legacy_key, {str(NOW): NOW})
+    try:
+        assert _check(backend, "ip_a", "default", 3, 60) == (True, 0, 2)
+        assert backend.redis_client.type(legacy_key) == "zset"
+    finally:
+        backend.redis_client.delete(legacy_key)
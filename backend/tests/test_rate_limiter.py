@@ -105,14 +105,58 @@ def test_in_memory_backend_cleanup():
         backend.check_rate_limit(identifier, "default", 5, 60)
 
         # Verify it was added
-        assert identifier in backend._requests
+        assert identifier in backend
 
         # Mock time forward beyond max_window (300s)
         with mock.patch("time.time", return_value=time.time() + 301):
             backend.prune_stale_entries()
 
         # Verify it has been cleaned up completely (deleted from dict)
-        assert identifier not in backend._requests
+        assert identifier not in backend
+    finally:
+        backend.stop()
+
+
+def test_in_memory_backend_gcra_refill():
+    """After a burst, one request is let through per window / limit seconds."""
+    backend = InMemoryBackend(cleanup_interval=10)
+    try:
+        now = 1_000_000.0
+        with mock.patch("time.time", return_value=now):
+            for _ in range(5):
+                assert backend.check_rate_limit("gcra_ip", "gemini", 5, 3600)[0]
+            allowed, retry_after, remaining = backend.check_rate_limit(
+                "gcra_ip", "gemini", 5, 3600
+            )
+            assert allowed is False
+            assert remaining == 0
+            # One slot frees up after 3600 / 5 seconds.
+            assert 700 <= retry_after <= 721
+
+        with mock.patch("time.time", return_value=now + 720):
+            allowed, _, remaining = backend.check_rate_limit(
+                "gcra_ip", "gemini", 5, 3600
+            )
+            assert allowed is True
+            assert remaining == 0
+            assert backend.check_rate_limit("gcra_ip", "gemini", 5, 3600)[0] is False
+    finally:
+        backend.stop()
+
+
+def test_in_memory_backend_memory_bounded_by_active_identifiers():
+    """Refilled buckets are dropped, whatever the identifier cardinality."""
+    backend = InMemoryBackend(cleanup_interval=10, shards=4)
+    try:
+        for i in range(1000):
+            backend.check_rate_limit(f"scraper_{i}", "default", 100, 60)
+        stats = backend.get_stats()
+        assert stats["total_identifiers"] == 1000
+        assert stats["shards"] == 4
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            backend.prune_stale_entries()
+        assert backend.get_stats()["total_identifiers"] == 0
     finally:
         backend.stop()
 
@@ -182,14 +226,97 @@ def test_sqlite_backend_cleanup(tmp_path):
         backend.stop()
 
 
+def test_sqlite_backend_reuses_thread_connection(tmp_path):
+    """Each thread opens one connection with the pragmas applied once."""
+    backend = SQLiteBackend(db_path=str(tmp_path / "rl_conn.db"), cleanup_interval=10)
+    try:
+        conn = backend._get_connection()
+        for _ in range(5):
+            backend.check_rate_limit("conn_ip", "default", 100, 60)
+        assert backend._get_connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # NORMAL == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+        other = []
+        worker = threading.Thread(
+            target=lambda: other.append(backend._get_connection())
+        )
+        worker.start()
+        worker.join()
+        assert other[0] is not conn
+    finally:
+        backend.stop()
+
+
+def test_sqlite_backend_refilled_rows_left_for_cleanup(tmp_path):
+    """Checks never delete rows; only pruning drops refilled buckets."""
+    backend = SQLiteBackend(
+        db_path=str(tmp_path / "rl_expired.db"), cleanup_interval=10
+    )
+    try:
+        now = time.time()
+        with mock.patch("time.time", return_value=now - 120):
+            backend.check_rate_limit("old_ip", "report", 1, 60)
+        backend.check_rate_limit("new_ip", "report", 1, 60)
+        assert backend.get_stats()["total_buckets"] == 2
+
+        backend.prune_stale_entries()
+        assert backend.get_stats() == {"total_identifiers": 1, "total_buckets": 1}
+    finally:
+        backend.stop()
+
+
+def test_sqlite_backend_replaces_pre_gcra_table(tmp_path):
+    """An old timestamp-log table is dropped and recreated on startup."""
+    db_file = tmp_path / "rl_legacy.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE rate_limits (identifier TEXT, endpoint_type TEXT, timestamp REAL)"
+    )
+    conn.execute("INSERT INTO rate_limits VALUES ('legacy_ip', 'default', 1.0)")
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteBackend(db_path=str(db_file), cleanup_interval=10)
+    try:
+        assert backend.get_stats()["total_buckets"] == 0
+        assert backend.check_rate_limit("legacy_ip", "default", 2, 60) == (True, 0, 1)
+    finally:
+        backend.stop()
+
+
+def test_sqlite_backend_concurrent_checks_are_atomic(tmp_path):
+    """Concurrent threads never admit more than the limit."""
+    backend = SQLiteBackend(db_path=str(tmp_path / "rl_atomic.db"), cleanup_interval=10)
+    allowed = []
+    try:
+
+        def hammer():
+            for _ in range(20):
+                ok, _, _ = backend.check_rate_limit("burst_ip", "prediction", 50, 60)
+                allowed.append(ok)
+
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sum(allowed) == 50
+        assert len(allowed) == 160
+    finally:
+        backend.stop()
+
+
 def test_redis_backend_lua_mock():
     """Test RedisBackend using mock Redis client executing Lua script."""
     mock_redis = mock.MagicMock()
     mock_script = mock.MagicMock()
 
     # We mock self._lua_script to return a mock rate limit evaluation:
-    # allowed=1 (True), retry_after=0, remaining=5
-    mock_script.return_value = (1, 0, 5)
+    # allowed=1 (True), retry_after=0, remaining=5, granted=1
+    mock_script.return_value = (1, 0, 5, 1)
     mock_redis.register_script.return_value = mock_script
 
     # Mock the redis module inside security
@@ -213,9 +340,10 @@ def test_redis_backend_lua_mock():
         mock_script.assert_called_once()
         call_kwargs = mock_script.call_args[1]
         assert "keys" in call_kwargs
-        assert call_kwargs["keys"] == ["rate_limit:dummy_ip:default"]
+        assert call_kwargs["keys"][0] == "rate_limit:gcra:dummy_ip:default"
         assert call_kwargs["args"][1] == 60  # window
         assert call_kwargs["args"][2] == 10  # max_requests
+        assert call_kwargs["args"][3] == 1  # no lease by default
 
 
 @mock.patch.dict(os.environ, {"RATE_LIMIT_BACKEND": "in_memory"})
@@ -260,3 +388,89 @@ def test_rate_limiter_load_redis_fallback():
         # Should print warning and fall back to InMemoryBackend
         assert isinstance(limiter.backend, InMemoryBackend)
         limiter.backend.stop()
+
+
+def _mock_redis_backend(script_result, **kwargs):
+    mock_redis = mock.MagicMock()
+    mock_script = mock.MagicMock(return_value=script_result)
+    mock_redis.register_script.return_value = mock_script
+    mock_redis_module = mock.MagicMock()
+    mock_redis_module.from_url.return_value = mock_redis
+    with mock.patch("backend.middleware.security.redis", mock_redis_module):
+        backend = RedisBackend(redis_url="redis://dummy:6379/0", **kwargs)
+    return backend, mock_script, mock_redis_module
+
+
+def test_redis_backend_serves_leased_tokens_locally():
+    """A lease of N tokens costs one script call for N checks."""
+    backend, script, _ = _mock_redis_backend((1, 0, 80, 10), lease_size=10)
+
+    results = [
+        backend.check_rate_limit("hot_ip", "default", 100, 60) for _ in range(10)
+    ]
+    assert script.call_count == 1
+    assert script.call_args[1]["args"][3] == 10
+    assert all(allowed for allowed, _, _ in results)
+    assert [remaining for _, _, remaining in results] == list(range(89, 79, -1))
+
+    backend.check_rate_limit("hot_ip", "default", 100, 60)
+    assert script.call_count == 2
+
+
+def test_redis_backend_lease_capped_for_small_limits_and_expires():
+    backend, script, _ = _mock_redis_backend((1, 0, 3, 1), lease_size=10)
+    for _ in range(3):
+        backend.check_rate_limit("ip", "gemini", 5, 3600)
+    # A tenth of 5 rounds down to no lease at all.
+    assert script.call_count == 3
+    assert script.call_args[1]["args"][3] == 1
+
+    backend, script, _ = _mock_redis_backend(
+        (1, 0, 80, 10), lease_size=10, lease_ttl=0.5
+    )
+    now = time.time()
+    with mock.patch("time.time", return_value=now):
+        backend.check_rate_limit("ip", "default", 100, 60)
+    with mock.patch("time.time", return_value=now + 1):
+        backend.check_rate_limit("ip", "default", 100, 60)
+    assert script.call_count == 2
+
+
+def test_redis_backend_stats_avoid_keyspace_scan():
+    backend, _, _ = _mock_redis_backend((1, 0, 5, 1))
+    pipe = backend.redis_client.pipeline.return_value
+    pipe.execute.return_value = [12, 30, "250", None]
+
+    stats = backend.get_stats()
+
+    assert stats["total_identifiers"] == 12
+    assert stats["total_buckets"] == 30
+    assert stats["allowed"] == 250
+    assert stats["rejected"] == 0
+    backend.redis_client.keys.assert_not_called()
+    assert pipe.pfcount.call_count == 2
+
+
+@mock.patch.dict(
+    os.environ,
+    {
+        "RATE_LIMIT_BACKEND": "redis",
+        "REDIS_URL": "redis://cache:6379/2",
+        "REDIS_MAX_CONNECTIONS": "64",
+        "REDIS_SOCKET_TIMEOUT": "0.25",
+        "RATE_LIMIT_LEASE_SIZE": "8",
+    },
+)
+def test_rate_limiter_redis_pool_settings_from_env():
+    mock_redis = mock.MagicMock()
+    with mock.patch("backend.middleware.security.redis", mock_redis):
+        limiter = RateLimiter()
+
+    assert isinstance(limiter.backend, RedisBackend)
+    assert limiter.backend.lease_size == 8
+    mock_redis.from_url.assert_called_once_with(
+        "redis://cache:6379/2",
+        decode_responses=True,
+        max_connections=64,
+        socket_timeout=0.25,
+    )
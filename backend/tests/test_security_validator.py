@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from backend.middleware.security import SecurityValidator
+
+validator = SecurityValidator()
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "<script>alert(1)</script>",
+        "< SCRIPT src=//evil>",
+        "<iframe src=x>",
+        "javascript:alert(1)",
+        '<img src=x onerror="alert(1)">',
+        "onload = run()",
+    ],
+)
+def test_detects_xss(payload):
+    is_valid, error = validator.validate_input(payload, "symptom")
+    assert is_valid is False
+    assert error == "Potential XSS attack detected in symptom"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "1 UNION ALL SELECT password",
+        "select * from users",
+        "INSERT INTO history VALUES (1)",
+        "x'; DROP TABLE user; --",
+        "delete from prediction_history",
+    ],
+)
+def test_detects_sql_injection(payload):
+    is_valid, error = validator.validate_input(payload, "disease")
+    assert is_valid is False
+    assert error == "Potential SQL injection detected in disease"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "headache",
+        "fever since monday",
+        "pain on the left side",
+        "union\nselect",  # keyword pairs only count on the same line
+        "select a\nfrom b",
+        "onion",
+        "a < b",
+    ],
+)
+def test_allows_benign_input(payload):
+    assert validator.validate_input(payload) == (True, None)
+
+
+def test_xss_reported_before_sql():
+    payload = "select * from t <script>"
+    assert "XSS" in validator.validate_input(payload)[1]
+
+
+def test_rejects_input_over_length_cap():
+    payload = "a" * (SecurityValidator.MAX_INPUT_LENGTH + 1)
+    is_valid, error = validator.validate_input(payload, "notes")
+    assert is_valid is False
+    assert error == "Input too long in notes"
+
+
+@pytest.mark.parametrize(
+    "unit", ["<script>x ", "<iframe ", "on", "UNION ", "SELECT ", "DROP "]
+)
+def test_adversarial_10kb_payloads_scan_quickly(unit):
+    payload = (unit * 10240)[:10240]
+    started = time.perf_counter()
+    validator.validate_input(payload)
+    # The old per-pattern loop took 30-200 ms on these; a linear scan
+    # stays around a millisecond.
+    assert time.perf_counter() - started < 0.025
@@ -116,3 +116,21 @@ def test_validation_passes_when_valid(monkeypatch):
 
     # Should pass without raising any exception
     validate_startup_config(app)
+
+
+@pytest.mark.parametrize("flask_env", ["production", "development"])
+def test_unknown_eye_model_format_rejected(monkeypatch, flask_env):
+    """A misspelled EYE_MODEL_FORMAT must not silently fall back to Keras"""
+    monkeypatch.setenv("FLASK_ENV", flask_env)
+    monkeypatch.setenv("SECRET_KEY", "a" * 32)
+    monkeypatch.setenv("GEMINI_API_KEY", "test_gemini_key_123")
+    monkeypatch.setenv("EYE_MODEL_FORMAT", "tflte")
+
+    with pytest.raises(
+        ValueError, match="EYE_MODEL_FORMAT must be one of keras, tflite"
+    ):
+        validate_startup_config(MagicMock())
+
+    monkeypatch.setenv("EYE_MODEL_FORMAT", "TFLite")
+    monkeypatch.setenv("FLASK_ENV", "development")
+    validate_startup_config(MagicMock())
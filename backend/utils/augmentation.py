@@ -0,0 +1,96 @@
+"""
+Test-time augmentation (TTA) for the image classifiers.
+
+A single phone photo is one noisy view of the lesion or fundus.  With TTA
+``/predict`` scores K cheap variants of the same image (flips, ±10°
+rotations, a 90% centre crop) and combines them:
+
+  • the views are built from the already resized 224×224 RGB image, so the
+    upload is decoded once;
+  • all K views go through the model as one (K, H, W, 3) batch, so the cost
+    stays close to a single forward pass rather than K sequential calls;
+  • the class probabilities are averaged in log space (i.e. the logits,
+    up to a per-view constant), then renormalised;
+  • the fraction of views that agree with the final class, and the spread
+    of that class's probability across views, are reported as an extra
+    uncertainty signal next to the confidence score.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from backend.utils.image_preprocessing import resnet50_preprocess
+
+MAX_TTA_VIEWS = 8
+CROP_FRACTION = 0.9
+ROTATION_DEGREES = 10.0
+
+
+def _rotate(rgb: np.ndarray, degrees: float) -> np.ndarray:
+    h, w = rgb.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), degrees, 1.0)
+    return cv2.warpAffine(
+        rgb, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT_101
+    )
+
+
+def _center_crop(rgb: np.ndarray, fraction: float = CROP_FRACTION) -> np.ndarray:
+    h, w = rgb.shape[:2]
+    ch, cw = int(round(h * fraction)), int(round(w * fraction))
+    top, left = (h - ch) // 2, (w - cw) // 2
+    crop = rgb[top : top + ch, left : left + cw]
+    return cv2.resize(crop, (w, h), interpolation=cv2.INTER_LINEAR)
+
+
+# Ordered so that any prefix is a sensible set of views; K views = first K.
+AUGMENTATIONS: List[Callable[[np.ndarray], np.ndarray]] = [
+    lambda rgb: rgb,
+    lambda rgb: rgb[:, ::-1],
+    lambda rgb: _rotate(rgb, ROTATION_DEGREES),
+    lambda rgb: _rotate(rgb, -ROTATION_DEGREES),
+    _center_crop,
+    lambda rgb: _rotate(rgb[:, ::-1], ROTATION_DEGREES),
+    lambda rgb: _rotate(rgb[:, ::-1], -ROTATION_DEGREES),
+    lambda rgb: rgb[::-1],
+]
+
+
+def build_tta_batch(rgb: np.ndarray, views: int) -> np.ndarray:
+    """
+    Return a (views, H, W, 3) float32 ResNet50 input batch of augmented views.
+
+    ``rgb`` is the resized uint8 image from ``load_resnet50_input``; view 0
+    is the unaugmented image.
+    """
+    views = max(1, min(int(views), MAX_TTA_VIEWS))
+    batch = np.empty((views,) + rgb.shape, dtype=np.float32)
+    for i, augment in enumerate(AUGMENTATIONS[:views]):
+        resnet50_preprocess(np.ascontiguousarray(augment(rgb)), out=batch[i])
+    return batch
+
+
+def aggregate_tta(preds: np.ndarray, eps: float = 1e-7) -> Dict:
+    """
+    Combine per-view class probabilities (views, classes).
+
+    Returns the log-space average as ``probabilities`` plus ``agreement``
+    (share of views whose top class matches the final one) and
+    ``variance`` (variance of the final class's probability across views).
+    """
+    preds = np.asarray(preds, dtype=np.float64)
+    mean_logits = np.log(np.clip(preds, eps, 1.0)).mean(axis=0)
+    mean_logits -= mean_logits.max()
+    probabilities = np.exp(mean_logits)
+    probabilities /= probabilities.sum()
+
+    top = int(np.argmax(probabilities))
+    return {
+        "probabilities": probabilities.astype(np.float32),
+        "views": int(len(preds)),
+        "agreement": float((preds.argmax(axis=1) == top).mean()),
+        "variance": float(preds[:, top].var()),
+    }
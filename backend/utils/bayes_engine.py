@@ -0,0 +1,357 @@
+"""
+Vectorized Bayes' theorem over arrays of test scenarios.
+
+Every calculator path (the CSV helpers in ``backend/src/calculator.py`` and
+``backend/utils/calculator.py``, and ``POST /api/bayes/batch``) computes
+posteriors here, one numpy expression per batch instead of one Python call
+per row:
+
+    P(D | +) = sens * prior / (sens * prior + fpr * (1 - prior))
+    P(D | -) = (1 - sens) * prior / ((1 - sens) * prior + (1 - fpr) * (1 - prior))
+
+``sequential_posterior`` applies several test results at once by adding
+their log likelihood ratios, for many patients in one pass.
+
+pandas is only needed for the CSV helpers and is imported on first use.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterator, Optional
+
+import numpy as np
+
+from backend.utils.lazy_import import LazyModule
+
+pd = LazyModule("pandas")
+
+# Accepted spellings of each input column, first match wins.  Columns used by
+# hospital_data.csv, the /disease form, the old utils CSV format and
+# backend/src all map onto the same four inputs.
+COLUMN_ALIASES = {
+    "prior": ("prior", "prior_probability", "prevalence", "pD"),
+    "sensitivity": ("sensitivity",),
+    "false_positive_rate": ("false_positive_rate", "falsePositive", "false_positive"),
+    "specificity": ("specificity",),
+    "test_result": ("test_result", "testResult"),
+}
+
+BATCH_CHUNK_ROWS = 5000
+
+
+def posterior(
+    prior, sensitivity, false_positive_rate, positive=True, zero_division=np.nan
+):
+    """
+    Posterior probability of disease for arrays (or scalars) of inputs.
+
+    ``positive`` is a bool or bool array: True for a positive test result.
+    Inputs broadcast against each other.  Where the evidence is zero (e.g.
+    prior 0 and a perfect test) the result is ``zero_division``.
+    """
+    prior = np.asarray(prior, dtype=np.float64)
+    sensitivity = np.asarray(sensitivity, dtype=np.float64)
+    false_positive_rate = np.asarray(false_positive_rate, dtype=np.float64)
+    positive = np.asarray(positive, dtype=bool)
+
+    hit = np.where(positive, sensitivity, 1.0 - sensitivity)
+    false_alarm = np.where(positive, false_positive_rate, 1.0 - false_positive_rate)
+    numerator = hit * prior
+    denominator = numerator + false_alarm * (1.0 - prior)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    return np.where(denominator == 0, zero_division, result)
+
+
+def _find_column(columns, canonical: str) -> Optional[str]:
+    lookup = {str(c).strip().lower(): c for c in columns}
+    for alias in COLUMN_ALIASES[canonical]:
+        if alias.lower() in lookup:
+            return lookup[alias.lower()]
+    return None
+
+
+def resolve_columns(columns) -> dict:
+    """
+    Map the canonical inputs to the columns of a CSV header.
+
+    Needs prior and sensitivity plus one of false_positive_rate and
+    specificity; test_result is optional (positive when absent).
+    Raises ValueError naming what is missing.
+    """
+    found = {name: _find_column(columns, name) for name in COLUMN_ALIASES}
+    missing = [name for name in ("prior", "sensitivity") if found[name] is None]
+    if found["false_positive_rate"] is None and found["specificity"] is None:
+        missing.append("false_positive_rate (or specificity)")
+    if missing:
+        raise ValueError(
+            f"CSV is missing columns: {', '.join(missing)}; found {list(columns)}"
+        )
+    return found
+
+
+def evaluate_frame(df, columns: Optional[dict] = None):
+    """
+    Add ``posterior`` and ``error`` columns to a DataFrame of scenarios.
+
+    Rows with non-numeric or out-of-range inputs, an unknown test result or
+    zero evidence get an empty posterior and a message in ``error``; the
+    other rows are computed together in one vectorized pass.
+    """
+    columns = columns or resolve_columns(df.columns)
+    out = df.copy()
+
+    def numeric(name):
+        return pd.to_numeric(df[columns[name]], errors="coerce").to_numpy(np.float64)
+
+    prior = numeric("prior")
+    sensitivity = numeric("sensitivity")
+    if columns["false_positive_rate"] is not None:
+        false_positive_rate = numeric("false_positive_rate")
+    else:
+        false_positive_rate = 1.0 - numeric("specificity")
+
+    if columns["test_result"] is not None:
+        results = (
+            df[columns["test_result"]]
+            .fillna("positive")
+            .astype(str)
+            .str.strip()
+            .str.lower()
+        )
+        positive = (results == "positive").to_numpy()
+        bad_result = ~results.isin(["positive", "negative"]).to_numpy()
+    else:
+        positive = np.ones(len(df), dtype=bool)
+        bad_result = np.zeros(len(df), dtype=bool)
+
+    inputs = np.vstack([prior, sensitivity, false_positive_rate])
+    non_numeric = np.isnan(inputs).any(axis=0)
+    out_of_range = ~non_numeric & ((inputs < 0) | (inputs > 1)).any(axis=0)
+
+    values = posterior(prior, sensitivity, false_positive_rate, positive)
+    invalid = non_numeric | out_of_range | bad_result
+    values[invalid] = np.nan
+
+    error = np.full(len(df), "", dtype=object)
+    error[np.isnan(values)] = "zero evidence for this test result"
+    error[bad_result] = "test_result must be positive or negative"
+    error[out_of_range] = "probabilities must be between 0 and 1"
+    error[non_numeric] = "non-numeric input"
+
+    out["posterior"] = values
+    out["error"] = error
+    return out
+
+
+def iter_csv_results(source, chunk_rows: int = BATCH_CHUNK_ROWS) -> Iterator:
+    """
+    Read scenarios from a CSV file or stream and yield evaluated chunks.
+
+    The header is checked before the first chunk is yielded, so a bad file
+    raises ValueError before any output has been produced.
+    """
+    reader = pd.read_csv(source, chunksize=chunk_rows, dtype=str, skipinitialspace=True)
+    columns = None
+    for chunk in reader:
+        if columns is None:
+            columns = resolve_columns(chunk.columns)
+        yield evaluate_frame(chunk, columns)
+
+
+# ---------------------------------------------------------------------------
+# Sequential updating over several tests
+# ---------------------------------------------------------------------------
+
+GROUP_MODES = ("max", "mean")
+
+
+def log_likelihood_ratios(results, sensitivity, specificity):
+    """
+    log LR of each test result: log(sens / (1 - spec)) for a positive,
+    log((1 - sens) / spec) for a negative, 0 where the result is NaN
+    (test not performed).  A perfect test gives +/-inf.
+    """
+    results = np.asarray(results, dtype=np.float64)
+    sensitivity = np.asarray(sensitivity, dtype=np.float64)
+    specificity = np.asarray(specificity, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        positive = np.log(sensitivity) - np.log1p(-specificity)
+        negative = np.log1p(-sensitivity) - np.log(specificity)
+    llr = np.where(results >= 0.5, positive, negative)
+    return np.where(np.isnan(results), 0.0, llr)
+
+
+def _logit(p):
+    p = np.asarray(p, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        return np.log(p) - np.log1p(-p)
+
+
+def _expit(x):
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-x))
+
+
+def sequential_posterior(
+    prior, results, sensitivity, specificity, groups=None, group_mode="max"
+):
+    """
+    Update a prior with a sequence of test results in log-odds space.
+
+    Shapes: ``prior`` is (patients,) or a scalar; ``results`` is
+    (patients, tests) with 1 = positive, 0 = negative and NaN = not done
+    (a 1-D array is one patient).  ``sensitivity`` and ``specificity``
+    broadcast against ``results``, e.g. one value per test.
+
+    Tests are assumed conditionally independent given disease status, so
+    their log likelihood ratios add.  Tests that share a label in
+    ``groups`` (one label per test, None = independent) are treated as
+    measuring the same thing: the group contributes only its strongest
+    log LR ("max", sign kept) or the mean of its log LRs ("mean").
+
+    Returns a dict of arrays: ``posterior`` (patients,), ``trajectory``
+    (patients, tests + 1) with the prior in column 0 and the posterior
+    after each test in the others, and ``log_likelihood_ratios``
+    (patients, tests).  Certain results that contradict each other (a
+    perfect positive and a perfect negative) give NaN.  A prior of exactly
+    0 or 1 is already certain and is returned unchanged at every step.
+    """
+    if group_mode not in GROUP_MODES:
+        raise ValueError(f"group_mode must be one of {GROUP_MODES}")
+
+    results = np.asarray(results, dtype=np.float64)
+    single = results.ndim == 1
+    results = np.atleast_2d(results)
+    llr = np.broadcast_to(
+        log_likelihood_ratios(results, sensitivity, specificity), results.shape
+    )
+    patients, n_tests = results.shape
+    prior_logit = np.broadcast_to(_logit(prior), (patients,)).astype(np.float64)
+
+    if groups is None:
+        groups = [None] * n_tests
+    if len(groups) != n_tests:
+        raise ValueError(f"groups has {len(groups)} labels for {n_tests} tests")
+
+    log_odds = np.empty((patients, n_tests + 1))
+    log_odds[:, 0] = prior_logit
+
+    independent = np.zeros(patients)
+    strongest, totals, counts = {}, {}, {}
+    with np.errstate(invalid="ignore"):
+        for t, label in enumerate(groups):
+            step = llr[:, t]
+            if label is None:
+                independent = independent + step
+            elif group_mode == "max":
+                best = strongest.get(label, np.zeros(patients))
+                # Ties (equal magnitude) take the larger value, so the
+                # result does not depend on which test came first.
+                strongest[label] = np.where(
+                    np.abs(step) == np.abs(best),
+                    np.maximum(step, best),
+                    np.where(np.abs(step) > np.abs(best), step, best),
+                )
+            else:
+                done = ~np.isnan(results[:, t])
+                totals[label] = totals.get(label, 0.0) + step
+                counts[label] = counts.get(label, 0) + done
+
+            grouped = sum(strongest.values(), np.zeros(patients))
+            for key, total in totals.items():
+                grouped = grouped + np.where(
+                    counts[key] > 0, total / np.maximum(counts[key], 1), 0.0
+                )
+            log_odds[:, t + 1] = prior_logit + independent + grouped
+
+    # No evidence moves a certain prior; without this a perfect test would
+    # give -inf + inf and read as contradicting tests.
+    certain = np.isinf(prior_logit)
+    log_odds[certain] = prior_logit[certain, None]
+
+    trajectory = _expit(log_odds)
+    if single:
+        return {
+            "posterior": trajectory[0, -1],
+            "trajectory": trajectory[0],
+            "log_likelihood_ratios": np.array(llr[0]),
+        }
+    return {
+        "posterior": trajectory[:, -1],
+        "trajectory": trajectory,
+        "log_likelihood_ratios": np.array(llr),
+    }
+
+
+def order_drift(
+    prior, results, sensitivity, specificity, groups=None, group_mode="max"
+):
+    """
+    Largest change in the final posterior between the given test order and
+    the reversed order: two O(n) passes instead of n! permutations.  The
+    update is a sum (per group a max or mean), so this is 0 up to rounding.
+    """
+    results = np.atleast_2d(np.asarray(results, dtype=np.float64))
+    sensitivity = np.broadcast_to(
+        np.asarray(sensitivity, dtype=np.float64), results.shape
+    )
+    specificity = np.broadcast_to(
+        np.asarray(specificity, dtype=np.float64), results.shape
+    )
+    forward = sequential_posterior(
+        prior, results, sensitivity, specificity, groups, group_mode
+    )["posterior"]
+    backward = sequential_posterior(
+        prior,
+        results[:, ::-1],
+        sensitivity[:, ::-1],
+        specificity[:, ::-1],
+        None if groups is None else list(groups)[::-1],
+        group_mode,
+    )["posterior"]
+    with np.errstate(invalid="ignore"):
+        return float(np.nanmax(np.abs(forward - backward), initial=0.0))
+
+
+# ---------------------------------------------------------------------------
+# Precomputed posterior surface
+# ---------------------------------------------------------------------------
+
+GRID_AXES = ("prior", "sensitivity", "false_positive_rate")
+GRID_DTYPES = {8: np.uint8, 16: np.uint16}
+
+
+def grid_axis(resolution: int):
+    """Grid points of one axis: (i / (resolution - 1)) ** 2."""
+    return np.linspace(0.0, 1.0, resolution) ** 2
+
+
+@lru_cache(maxsize=32)
+def posterior_grid(resolution: int, positive: bool = True, bits: int = 16) -> bytes:
+    """
+    Posterior over a resolution^3 grid of (prior, sensitivity, fpr),
+    quantized to unsigned ``bits``-bit integers (posterior * (2**bits - 1),
+    rounded) in C order with prior varying slowest.  Zero-evidence cells
+    are 0.  Returned as little-endian bytes and cached per
+    (resolution, test result, bits).
+
+    Each axis is ``grid_axis(resolution)``: quadratically spaced, because
+    the posterior changes fastest at small priors and false-positive rates
+    (at 41 points this halves the interpolation error of an even grid).
+    """
+    if bits not in GRID_DTYPES:
+        raise ValueError(f"bits must be one of {tuple(GRID_DTYPES)}")
+    axis = grid_axis(resolution)
+    values = posterior(
+        axis[:, None, None],
+        axis[None, :, None],
+        axis[None, None, :],
+        positive,
+        zero_division=0.0,
+    )
+    scale = (1 << bits) - 1
+    quantized = np.rint(values * scale).astype(GRID_DTYPES[bits])
+    return quantized.astype(quantized.dtype.newbyteorder("<")).tobytes()
@@ -1,7 +1,9 @@
-import csv
 import itertools
 import math
 
+from backend.services.metrics import timed
+from backend.utils import bayes_engine
+
 
 def clamp_probability(
     value: float, min_val: float = 0.0, max_val: float = 1.0
@@ -14,6 +16,7 @@ def clamp_probability(
     return max(min_val, min(max_val, value))
 
 
+@timed("bayes")
 def bayesian_survival(prevalence, sensitivity, false_positive):
     """
     Calculate posterior probability using Bayes' Theorem.
@@ -33,28 +36,29 @@ def bayesian_survival(prevalence, sensitivity, false_positive):
         if not (0.0 <= value <= 1.0):
             raise ValueError(f"{name} must be between 0 and 1. Got {value}")
 
-    p_pos = (sensitivity * prevalence) + (false_positive * (1 - prevalence))
-    if p_pos == 0:
+    posterior = float(bayes_engine.posterior(prevalence, sensitivity, false_positive))
+    if math.isnan(posterior):
         raise ValueError("Invalid inputs caused division by zero")
-
-    posterior = (sensitivity * prevalence) / p_pos
     return posterior
 
 
 def load_data(filepath):
     """
     Load hospital data from CSV and calculate posterior probabilities.
+
+    All rows are computed in one vectorized pass; the first invalid row
+    raises ValueError, as the per-row calculation did.
     """
-    results = []
-    with open(filepath, mode="r", encoding="utf-8") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            prevalence = float(row["Prevalence"])
-            sensitivity = float(row["Sensitivity"])
-            false_positive = float(row["FalsePositive"])
-            posterior = bayesian_survival(prevalence, sensitivity, false_positive)
-            row["Posterior"] = round(posterior, 4)
-            results.append(row)
+    df = bayes_engine.pd.read_csv(filepath, dtype=str, keep_default_na=False)
+    computed = bayes_engine.evaluate_frame(df)
+    failed = computed["error"] != ""
+    if failed.any():
+        row = int(failed.to_numpy().argmax())
+        raise ValueError(f"Row {row + 1}: {computed['error'].iloc[row]}")
+
+    results = df.to_dict(orient="records")
+    for row, posterior in zip(results, computed["posterior"].round(4).tolist()):
+        row["Posterior"] = posterior
     return results
 
 
@@ -87,18 +91,24 @@ class BayesCalculator:
     def __init__(self):
         pass
 
+    @staticmethod
+    def _risk_tier(posterior: float) -> str:
+        if posterior < 0.35:
+            return "Low"
+        if posterior < 0.70:
+            return "Medium"
+        return "High"
+
     def _compute_posterior_value(
         self, prior: float, likelihood: float, false_positive_rate: float = 0.05
     ) -> float:
         """Compute the raw posterior value without rounding, clamped to [0, 1]."""
-        complement_prior = 1.0 - prior
-        numerator = likelihood * prior
-        denominator = numerator + (false_positive_rate * complement_prior)
-        if math.isclose(denominator, 0.0):
-            return 0.0
-        posterior = numerator / denominator
-        return clamp_probability(posterior)
+        posterior = bayes_engine.posterior(
+            prior, likelihood, false_positive_rate, zero_division=0.0
+        )
+        return clamp_probability(float(posterior))
 
+    @timed("bayes")
     def calculate_posterior(
         self, prior: float, likelihood: float, false_positive_rate: float = 0.05
     ) -> dict:
@@ -123,12 +133,7 @@ class BayesCalculator:
             prior, likelihood, false_positive_rate
         )
 
-        if posterior < 0.35:
-            risk_category = "Low"
-        elif 0.35 <= posterior < 0.70:
-            risk_category = "Medium"
-        else:
-            risk_category = "High"
+        risk_category = self._risk_tier(posterior)
 
         return {
             # Legacy fields (Keeps existing frontend components working perfectly)
@@ -249,27 +254,18 @@ class BayesCalculator:
 
         false_positive_rate = 1.0 - specificity
 
-        if str(test_result).lower() == "positive":
-            numerator = sensitivity * prior
-            denominator = numerator + (false_positive_rate * (1.0 - prior))
-        else:
-            numerator = (1.0 - sensitivity) * prior
-            denominator = numerator + (specificity * (1.0 - prior))
-
-        if math.isclose(denominator, 0.0):
-            posterior = 0.0
-        else:
-            posterior = numerator / denominator
+        posterior = bayes_engine.posterior(
+            prior,
+            sensitivity,
+            false_positive_rate,
+            positive=str(test_result).lower() == "positive",
+            zero_division=0.0,
+        )
 
         # Clamp posterior to valid [0, 1] range
-        posterior = clamp_probability(posterior)
+        posterior = clamp_probability(float(posterior))
 
-        if posterior < 0.35:
-            risk_category = "Low"
-        elif 0.35 <= posterior < 0.70:
-            risk_category = "Medium"
-        else:
-            risk_category = "High"
+        risk_category = self._risk_tier(posterior)
 
         return {
             # Legacy fields (Keeps existing frontend components working perfectly)
@@ -286,6 +282,70 @@ class BayesCalculator:
             "shift_magnitude": round(posterior - prior, 4),
         }
 
+    @timed("bayes")
+    def calculate_with_test_sequence(
+        self, prior: float, tests: list, group_mode: str = "max"
+    ) -> dict:
+        """
+        Update a prior with several test results in one log-odds pass.
+
+        Each test is a dict with "result" ("positive"/"negative"),
+        "sensitivity" and "specificity", plus optional "name" and "group".
+        Tests sharing a group are not independent; see
+        bayes_engine.sequential_posterior for how they are combined.
+        The result does not depend on the order of the tests.
+        """
+        try:
+            prior = clamp_probability(float(prior))
+            results, sensitivity, specificity, groups = [], [], [], []
+            for test in tests:
+                result = str(test.get("result", "positive")).lower()
+                if result not in ("positive", "negative"):
+                    raise ValueError("Each test result must be positive or negative")
+                results.append(1.0 if result == "positive" else 0.0)
+                sensitivity.append(clamp_probability(float(test["sensitivity"])))
+                specificity.append(clamp_probability(float(test["specificity"])))
+                group = test.get("group")
+                if group is not None and not isinstance(group, str):
+                    raise ValueError("Each test group must be a string or null")
+                groups.append(group)
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError(
+                "Each test needs numeric sensitivity and specificity values"
+            )
+
+        outcome = bayes_engine.sequential_posterior(
+            prior, results, sensitivity, specificity, groups, group_mode
+        )
+        posterior = float(outcome["posterior"])
+        if math.isnan(posterior):
+            raise ValueError("Tests with certain results contradict each other")
+
+        trajectory = [
+            {
+                "test": test.get("name") or f"test_{i + 1}",
+                "result": "positive" if results[i] else "negative",
+                "log_likelihood_ratio": round(
+                    float(outcome["log_likelihood_ratios"][i]), 4
+                ),
+                "posterior": round(float(outcome["trajectory"][i + 1]), 4),
+            }
+            for i, test in enumerate(tests)
+        ]
+        return {
+            "prior": round(prior, 4),
+            "posterior": round(posterior, 4),
+            "trajectory": trajectory,
+            "tests_applied": len(tests),
+            "prior_probability": round(prior, 4),
+            "posterior_probability": round(posterior, 4),
+            "risk_tier": self._risk_tier(posterior),
+            "shift_magnitude": round(posterior - prior, 4),
+            "order_drift": bayes_engine.order_drift(
+                prior, results, sensitivity, specificity, groups, group_mode
+            ),
+        }
+
 
 if __name__ == "__main__":
     pass
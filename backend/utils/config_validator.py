@@ -47,7 +47,18 @@ def validate_startup_config(app):
             print("   fail at runtime with a Configuration Error.")
             print("=======================================================\n")
 
-    # 4. Check Machine Learning Model Files
+    # 4. Check the eye model serving format.  A typo would otherwise fall
+    # back to Keras without notice, so it is rejected in every mode.
+    from backend.services.model_conversion import EYE_MODEL_FORMATS
+
+    eye_model_format = os.getenv("EYE_MODEL_FORMAT", "keras").lower()
+    if eye_model_format not in EYE_MODEL_FORMATS:
+        raise ValueError(
+            f"\n[ERROR] CRITICAL ERROR: EYE_MODEL_FORMAT must be one of "
+            f"{', '.join(EYE_MODEL_FORMATS)}; got '{os.getenv('EYE_MODEL_FORMAT')}'.\n"
+        )
+
+    # 5. Check Machine Learning Model Files
     backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     models_to_check = {
         "eyes": {
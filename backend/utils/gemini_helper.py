@@ -1,8 +1,23 @@
 """
 Gemini API helper for generating recommendations based on disease probability results.
+
+One ``genai.Client`` is built per API key and reused, so requests share its
+connection pool instead of paying a new TLS handshake each time.
+Recommendations go to ``gemini-2.5-flash`` first.  If it has not answered
+within ``GEMINI_HEDGE_DELAY`` seconds (or fails), the same prompt is also
+sent to ``gemini-2.5-pro``, and whichever succeeds first wins.  Each model
+call has its own HTTP timeout.
+
+Chat turns use the same client.  ``stream_chat_response`` yields the reply
+as it is generated, for the ``/api/chat/stream`` server-sent events
+endpoint.
 """
 
 import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Optional
 from google.genai import types
 import logging
@@ -12,71 +27,144 @@ client = None
 token_limit = 2000
 logger = logging.getLogger(__name__)
 
+PRIMARY_MODEL = "gemini-2.5-flash"
+FALLBACK_MODEL = "gemini-2.5-pro"
+
+# Bump whenever the recommendation prompt changes so cached answers to the
+# old prompt are not served for the new one.
+RECOMMENDATION_PROMPT_VERSION = 1
+
+_client_key = None
+_client_lock = threading.Lock()
+_executor = None
+
+
+def get_client():
+    """Return the shared Gemini client, creating it on first use."""
+    global client, _client_key
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+    # The SDK reads GOOGLE_GEMINI_BASE_URL when the client is built.
+    key = (api_key, os.getenv("GOOGLE_GEMINI_BASE_URL"))
+    if client is not None and _client_key == key:
+        return client
+
+    with _client_lock:
+        if client is None or _client_key != key:
+            from google import genai
+
+            client = genai.Client(api_key=api_key)
+            _client_key = key
+    return client
+
 
 def configure_gemini():
     """Configure Gemini API with the API key from environment variables."""
-    global client
     try:
-        from google import genai
+        return get_client()
     except ImportError:
         import warnings
 
         warnings.warn(
             "google-genai package not properly installed. Gemini features disabled."
         )
-        return
 
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable is not set")
-    # Initialize the new SDK client instance
-    client = genai.Client(api_key=api_key)
 
+def _model_timeout(model_name: str) -> float:
+    """Per-model HTTP timeout in seconds (pro is slower than flash)."""
+    if model_name == FALLBACK_MODEL:
+        return float(os.getenv("GEMINI_PRO_TIMEOUT", "30"))
+    return float(os.getenv("GEMINI_FLASH_TIMEOUT", "15"))
 
-def generate_recommendations(
-    disease_name: Optional[str],
-    prior_probability: float,
-    posterior_probability: float,
-    test_result: str = "positive",
-    language: str = "english",
-) -> dict:
-    """
-    Generate AI-powered recommendations using Gemini API based on disease probability results.
 
-    Args:
-        disease_name: Name of the disease (optional, can be None for custom input)
-        prior_probability: Prior probability of disease (before test)
-        posterior_probability: Posterior probability of disease (after test)
-        test_result: The test result ("positive" or "negative")
-        language: Language for the response (english, hindi, gujarati, tamil)
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("GEMINI_MAX_WORKERS", "8")),
+                    thread_name_prefix="gemini",
+                )
+    return _executor
 
-    Returns:
-        dict: Contains 'success', 'recommendations', and optional 'error' keys
-    """
-    try:
-        configure_gemini()
 
-        # Try newer models first, fall back to older ones if needed
-        model_names = ["gemini-2.5-flash", "gemini-2.5-pro"]
+def _generate(gemini_client, model_name: str, prompt: str) -> str:
+    timeout_ms = int(_model_timeout(model_name) * 1000)
+    response = gemini_client.models.generate_content(
+        model=model_name,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=timeout_ms)
+        ),
+    )
+    return response.text
 
-        # Construct the prompt
-        disease_context = (
-            f"the disease '{disease_name}'" if disease_name else "a disease"
-        )
 
-        # Language mapping for prompt instructions
-        language_instructions = {
-            "english": "Respond in English.",
-            "hindi": "Respond in Hindi (हिंदी में जवाब दें). Use Devanagari script.",
-            "gujarati": "Respond in Gujarati (ગુજરાતીમાં જવાબ આપો). Use Gujarati script.",
-            "tamil": "Respond in Tamil (தமிழில் பதிலளிக்கவும்). Use Tamil script.",
-        }
+def generate_hedged(prompt: str) -> tuple:
+    """
+    Send ``prompt`` to the primary model and hedge with the fallback.
 
-        language_instruction = language_instructions.get(
-            language.lower(), language_instructions["english"]
-        )
+    Returns:
+        tuple: (model_name, text) from the first model that succeeded.
+        Raises the last model error if both fail.
+    """
+    gemini_client = get_client()
+    executor = _get_executor()
+    hedge_delay = float(os.getenv("GEMINI_HEDGE_DELAY", "4"))
 
-        prompt = f"""
+    primary = executor.submit(_generate, gemini_client, PRIMARY_MODEL, prompt)
+    try:
+        return PRIMARY_MODEL, primary.result(timeout=hedge_delay)
+    except FutureTimeoutError:
+        logger.info(
+            f"Model {PRIMARY_MODEL} slower than {hedge_delay}s, hedging with {FALLBACK_MODEL}"
+        )
+    except Exception as e:
+        logger.warning(f"Model {PRIMARY_MODEL} failed: {e}. Trying {FALLBACK_MODEL}...")
+
+    fallback = executor.submit(_generate, gemini_client, FALLBACK_MODEL, prompt)
+    models = {primary: PRIMARY_MODEL, fallback: FALLBACK_MODEL}
+    pending = {f for f in models if not (f.done() and f.exception() is not None)}
+    last_exception = primary.exception() if primary.done() else None
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()  # no-op once running; its timeout bounds it
+                return models[future], future.result()
+            last_exception = future.exception()
+            logger.warning(f"Model {models[future]} failed: {last_exception}")
+    raise last_exception
+
+
+def build_recommendation_prompt(
+    disease_name: Optional[str],
+    prior_probability: float,
+    posterior_probability: float,
+    test_result: str = "positive",
+    language: str = "english",
+) -> str:
+    """Prompt for :func:`generate_recommendations` (see RECOMMENDATION_PROMPT_VERSION)."""
+    disease_context = f"the disease '{disease_name}'" if disease_name else "a disease"
+
+    # Language mapping for prompt instructions
+    language_instructions = {
+        "english": "Respond in English.",
+        "hindi": "Respond in Hindi (हिंदी में जवाब दें). Use Devanagari script.",
+        "gujarati": "Respond in Gujarati (ગુજરાતીમાં જવાબ આપો). Use Gujarati script.",
+        "tamil": "Respond in Tamil (தமிழில் பதிலளிக்கவும்). Use Tamil script.",
+    }
+
+    language_instruction = language_instructions.get(
+        language.lower(), language_instructions["english"]
+    )
+
+    return f"""
 You are a medical informatics assistant helping to interpret diagnostic test results.
  
 IMPORTANT: {language_instruction}
@@ -102,31 +190,43 @@ Structure your response in the following format:
 Keep your response concise (under 200 words), professional, educational, and emphasize that this is a probabilistic tool, not a definitive diagnosis. The recommendations should be general guidance that would apply to most cases.
 """
 
-        # Attempt each model in order; move to next if one fails
-        last_exception = None
-        result = None
 
-        for model_name in model_names:
-            try:
-                response = client.models.generate_content(
-                    model=model_name, contents=prompt
-                )
-                result = {
-                    "success": True,
-                    "recommendations": response.text,
-                    "prior_probability": prior_probability,
-                    "posterior_probability": posterior_probability,
-                }
-                break
-            except Exception as e:
-                logger.warning(f"Model {model_name} failed: {e}. Trying next model...")
-                last_exception = e
-                continue
+def generate_recommendations(
+    disease_name: Optional[str],
+    prior_probability: float,
+    posterior_probability: float,
+    test_result: str = "positive",
+    language: str = "english",
+) -> dict:
+    """
+    Generate AI-powered recommendations using Gemini API based on disease probability results.
 
-        if result is None:
-            raise last_exception
+    Args:
+        disease_name: Name of the disease (optional, can be None for custom input)
+        prior_probability: Prior probability of disease (before test)
+        posterior_probability: Posterior probability of disease (after test)
+        test_result: The test result ("positive" or "negative")
+        language: Language for the response (english, hindi, gujarati, tamil)
 
-        return result
+    Returns:
+        dict: Contains 'success', 'recommendations', and optional 'error' keys
+    """
+    try:
+        prompt = build_recommendation_prompt(
+            disease_name,
+            prior_probability,
+            posterior_probability,
+            test_result,
+            language,
+        )
+        model_name, text = generate_hedged(prompt)
+        return {
+            "success": True,
+            "recommendations": text,
+            "model": model_name,
+            "prior_probability": prior_probability,
+            "posterior_probability": posterior_probability,
+        }
 
     except ValueError as ve:
         return {
@@ -142,15 +242,69 @@ Keep your response concise (under 200 words), professional, educational, and emp
         }
 
 
+# Word-ish pieces for estimate_tokens: ASCII letter runs, single digits,
+# runs of other letters (Devanagari, Gujarati, Tamil, ...) and symbols.
+_TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d|[^\W\d_A-Za-z]+|\S")
+_local_tokenizer = None
+
+
+def _get_local_tokenizer():
+    """Gemini's own SentencePiece tokenizer, if enabled and installed."""
+    global _local_tokenizer
+    if _local_tokenizer is None:
+        _local_tokenizer = False
+        if os.getenv("GEMINI_LOCAL_TOKENIZER", "0") == "1":
+            try:
+                from google.genai.local_tokenizer import LocalTokenizer
+
+                _local_tokenizer = LocalTokenizer(model_name=CHAT_MODEL)
+            except Exception as e:  # sentencepiece missing, download failed
+                logger.warning(f"Local tokenizer unavailable, estimating instead: {e}")
+    return _local_tokenizer or None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Number of Gemini tokens in ``text``.
+
+    Uses the SDK's local tokenizer when ``GEMINI_LOCAL_TOKENIZER=1`` (needs
+    ``sentencepiece`` and downloads the vocabulary once).  Otherwise it
+    approximates SentencePiece: about one token per six ASCII letters of a
+    word, one per digit or symbol, and one per two characters of other
+    scripts, which split into much shorter pieces.
+    """
+    tokenizer = _get_local_tokenizer()
+    if tokenizer is not None:
+        try:
+            return tokenizer.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning(f"Local tokenizer failed: {e}")
+
+    tokens = 0
+    for piece in _TOKEN_PIECE_RE.findall(text):
+        if piece.isascii():
+            tokens += -(-len(piece) // 6)
+        else:
+            tokens += -(-len(piece) // 2)
+    return tokens
+
+
 def process_history(messages):
+    """
+    Convert earlier chat turns (all but the last message) to ``Content``.
+
+    Keeps the most recent turns that fit in ``token_limit`` tokens; the
+    newest turn is always kept.
+    """
     try:
-        tokens = 0  # Considering 1 word ~ 1 token
+        tokens = 0
 
         formatted_history = []
         for turn in messages[-2::-1]:
-            if formatted_history and tokens + len(turn["text"]) >= token_limit:
+            turn_tokens = estimate_tokens(turn["text"])
+            if formatted_history and tokens + turn_tokens >= token_limit:
                 break
-            tokens += len(turn["text"])
+            tokens += turn_tokens
             formatted_history.append(
                 types.Content(
                     role=turn["role"],  # Must be 'user' or 'model'
@@ -163,22 +317,10 @@ def process_history(messages):
         return []
 
 
-def generate_chat_response(messages: str, history: list = None) -> dict:
-    """
-    Generate a chat response using Gemini API, restricted to medical/health domain.
-
-    Args:
-        message: The user's query
-        history: Optional list of previous chat messages for context
-
-    Returns:
-        dict: Contains 'success', 'response', and optional 'error' keys
-    """
-    try:
-        configure_gemini()
+CHAT_MODEL = "gemini-2.5-flash"
 
-        # System instruction to restrict domain
-        system_instruction = """
+# System instruction to restrict domain
+CHAT_SYSTEM_INSTRUCTION = """
         You are a helpful AI assistant for a Disease Prediction Application.
  
         YOUR ROLE:
@@ -194,17 +336,57 @@ def generate_chat_response(messages: str, history: list = None) -> dict:
         4. Keep answers concise (under 150 words) unless detailed explanation is requested.
         5. Be empathetic and professional.
         """
-        formatted_history = process_history(messages=messages)
 
-        # Use the modern chats utility instance configuration passing system instruction
-        chat = client.chats.create(
-            model="gemini-2.5-flash",
-            config=types.GenerateContentConfig(system_instruction=system_instruction),
-            history=formatted_history,
+
+def _chat_request(messages) -> dict:
+    """Keyword arguments for a chat turn: trimmed history plus the new message."""
+    contents = process_history(messages=messages)
+    contents.append(
+        types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=messages[-1].get("text"))],
         )
-        message = messages[-1].get("text")
+    )
+    return {
+        "model": CHAT_MODEL,
+        "contents": contents,
+        "config": types.GenerateContentConfig(
+            system_instruction=CHAT_SYSTEM_INSTRUCTION,
+            http_options=types.HttpOptions(
+                timeout=int(_model_timeout(CHAT_MODEL) * 1000)
+            ),
+        ),
+    }
+
+
+def stream_chat_response(messages):
+    """
+    Yield the reply to ``messages[-1]`` in chunks as Gemini produces them.
+
+    Uses the shared client. Raises ValueError when no API key is configured;
+    errors from Gemini propagate to the consumer.
+    """
+    gemini_client = get_client()
+    for chunk in gemini_client.models.generate_content_stream(
+        **_chat_request(messages)
+    ):
+        if chunk.text:
+            yield chunk.text
+
+
+def generate_chat_response(messages: list, history: list = None) -> dict:
+    """
+    Generate a chat response using Gemini API, restricted to medical/health domain.
+
+    Args:
+        messages: Chat turns ({"role", "text"}), the last one being the user's query
+        history: Unused; history is taken from ``messages``
 
-        response = chat.send_message(message)
+    Returns:
+        dict: Contains 'success', 'response', and optional 'error' keys
+    """
+    try:
+        response = get_client().models.generate_content(**_chat_request(messages))
 
         return {"success": True, "response": response.text}
 
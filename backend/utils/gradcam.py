@@ -45,6 +45,14 @@ result = predict_with_gradcam(
 
 Both return values are base64-encoded PNG strings ready to embed in a JSON
 response:  "data:image/png;base64,<string>"
+
+────────────────────────────────────────────────────────────────────────────
+Raw heatmaps (no colormap / blend / PNG encoding)
+────────────────────────────────────────────────────────────────────────────
+compute_gradcam_heatmap / compute_tflite_scorecam_heatmap return the float
+heatmap and the resized input image.  heatmap_to_uint8 turns the heatmap into
+a compact low-resolution grid for clients that colourise it themselves, and
+render_heatmap_images / encode_image produce the overlay on demand.
 """
 
 from __future__ import annotations
@@ -52,21 +60,21 @@ from __future__ import annotations
 import base64
 import io
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import cv2
 import numpy as np
 from PIL import Image
 
-try:
-    import tensorflow as tf
+from backend.services.metrics import timed
+from backend.utils.image_preprocessing import load_resnet50_input
+from backend.utils.lazy_import import LazyModule
+
+if TYPE_CHECKING:
     from tensorflow.keras.models import Model
 
-    _TF_AVAILABLE = True
-except (ImportError, ModuleNotFoundError):
-    tf = None  # type: ignore[assignment]
-    Model = object  # type: ignore[assignment,misc]
-    _TF_AVAILABLE = False
+# TensorFlow is imported on the first heatmap, not when the app starts.
+tf = LazyModule("tensorflow")
 
 logger = logging.getLogger(__name__)
 
@@ -113,22 +121,17 @@ def _preprocess_image(
     img_path: str, target_size: tuple[int, int]
 ) -> tuple[np.ndarray, np.ndarray]:
     """
-    Load, resize, and preprocess an image using ResNet50's preprocess_input
-    (ImageNet mean subtraction) — identical to what predict_disease_type_routes.py
-    does, so the heatmap is computed on the exact same tensor the model saw.
+    Load, resize, and preprocess an image with ResNet50 preprocessing
+    (ImageNet mean subtraction) through the same decode path as
+    predict_disease_type_routes.py, so the heatmap is computed on the exact
+    same tensor the model saw.
 
     Returns
     -------
     img_array   : float32 array of shape (1, H, W, 3), ResNet50-normalised
     original_img: uint8 array of shape (H, W, 3) for overlay blending
     """
-    img = Image.open(img_path).convert("RGB").resize((target_size[1], target_size[0]))
-    original_img = np.array(img, dtype=np.uint8)  # (H, W, 3)
-
-    img_array = np.array(img, dtype=np.float32)
-    img_array = np.expand_dims(img_array, axis=0)  # (1, H, W, 3)
-    img_array = tf.keras.applications.resnet50.preprocess_input(img_array)
-    return img_array, original_img
+    return load_resnet50_input(img_path, (target_size[1], target_size[0]))
 
 
 def _compute_gradcam_heatmap(
@@ -157,7 +160,7 @@ def _compute_gradcam_heatmap(
     heatmap : float32 array of shape (h, w), values in [0, 1]
     """
     # Sub-model: inputs → [conv_output, predictions]
-    grad_model = Model(
+    grad_model = tf.keras.models.Model(
         inputs=model.inputs,
         outputs=[
             model.get_layer(last_conv_layer_name).output,
@@ -231,11 +234,61 @@ def _array_to_base64_png(arr: np.ndarray) -> str:
     """
     Encode a uint8 RGB numpy array as a base64 PNG data URI.
     """
+    encoded = base64.b64encode(encode_image(arr, "PNG")).decode("utf-8")
+    return f"data:image/png;base64,{encoded}"
+
+
+def encode_image(arr: np.ndarray, fmt: str = "PNG") -> bytes:
+    """Encode a uint8 RGB array as PNG or WebP bytes."""
     pil_img = Image.fromarray(arr)
     buffer = io.BytesIO()
-    pil_img.save(buffer, format="PNG")
-    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
-    return f"data:image/png;base64,{encoded}"
+    if fmt.upper() == "WEBP":
+        pil_img.save(buffer, format="WEBP", quality=85, method=4)
+    else:
+        pil_img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# Upper bound on each side of the grid returned by heatmap_to_uint8.  Grad-CAM
+# on ResNet50 produces 7×7 maps, so this only ever shrinks unusual backbones.
+RAW_HEATMAP_MAX_SIDE = 64
+
+
+def heatmap_to_uint8(
+    heatmap: np.ndarray, max_side: int = RAW_HEATMAP_MAX_SIDE
+) -> np.ndarray:
+    """
+    Quantise a [0, 1] heatmap to uint8 at (at most) ``max_side`` resolution.
+
+    This is the compact form sent to clients that upsample, colourise and
+    blend the heatmap themselves.
+    """
+    h, w = heatmap.shape[:2]
+    if max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        heatmap = cv2.resize(heatmap, size, interpolation=cv2.INTER_AREA)
+    return np.uint8(np.clip(heatmap, 0.0, 1.0) * 255 + 0.5)
+
+
+def render_heatmap_images(
+    heatmap: np.ndarray,
+    original_img: np.ndarray,
+    heatmap_alpha: float = 0.45,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Colourise ``heatmap`` at the size of ``original_img`` and blend it on top.
+
+    ``heatmap`` may be float in [0, 1] or the uint8 grid from
+    ``heatmap_to_uint8``.  Returns ``(overlay, coloured_heatmap)`` as uint8
+    RGB arrays.
+    """
+    if heatmap.dtype == np.uint8:
+        heatmap = heatmap.astype(np.float32) / 255.0
+    h, w = original_img.shape[:2]
+    coloured_heatmap = _heatmap_to_colormap(heatmap, target_hw=(h, w))
+    overlay = _blend_overlay(original_img, coloured_heatmap, alpha=heatmap_alpha)
+    return overlay, coloured_heatmap
 
 
 # ---------------------------------------------------------------------------
@@ -370,6 +423,7 @@ def _tflite_infer_with_feature(
     return feature_map, predictions
 
 
+@timed("explain")
 def _compute_scorecam_heatmap(
     interpreter: "tf.lite.Interpreter",
     img_array: np.ndarray,
@@ -443,6 +497,49 @@ def _compute_scorecam_heatmap(
     return cam_accumulator.astype(np.float32)
 
 
+def compute_tflite_scorecam_heatmap(
+    tflite_path: str,
+    img_path: str,
+    class_index: int,
+    target_size: tuple[int, int] = (224, 224),
+    feature_tensor_index: Optional[int] = None,
+    max_channels: int = MAX_SCORECAM_CHANNELS,
+    preprocessed: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Score-CAM without rendering.
+
+    Pass ``preprocessed=(img_array, original_img)`` from
+    ``load_resnet50_input`` to skip decoding ``img_path`` again.
+
+    Returns
+    -------
+    heatmap      : float32 array (h_feat, w_feat), values in [0, 1].
+    original_img : uint8 array (H, W, 3) the heatmap belongs to.
+    """
+    interpreter = _get_tflite_interpreter(tflite_path)
+
+    if feature_tensor_index is None:
+        feature_tensor_index = _find_tflite_feature_tensor(interpreter)
+
+    if preprocessed is None:
+        preprocessed = _preprocess_image(img_path, target_size)
+    img_array, original_img = preprocessed
+
+    heatmap = _compute_scorecam_heatmap(
+        interpreter, img_array, class_index, feature_tensor_index, max_channels
+    )
+
+    logger.info(
+        "Score-CAM generated | tensor_idx=%d | class_index=%d | img=%s",
+        feature_tensor_index,
+        class_index,
+        img_path,
+    )
+
+    return heatmap, original_img
+
+
 def generate_tflite_scorecam_overlay(
     tflite_path: str,
     img_path: str,
@@ -471,37 +568,69 @@ def generate_tflite_scorecam_overlay(
     overlay_b64  : base64 PNG — original image with heatmap blended on top.
     heatmap_b64  : base64 PNG — raw coloured heatmap.
     """
-    interpreter = _get_tflite_interpreter(tflite_path)
+    heatmap, original_img = compute_tflite_scorecam_heatmap(
+        tflite_path,
+        img_path,
+        class_index,
+        target_size=target_size,
+        feature_tensor_index=feature_tensor_index,
+        max_channels=max_channels,
+    )
 
-    if feature_tensor_index is None:
-        feature_tensor_index = _find_tflite_feature_tensor(interpreter)
+    overlay, coloured_heatmap = render_heatmap_images(
+        heatmap, original_img, heatmap_alpha=heatmap_alpha
+    )
 
-    img_array, original_img = _preprocess_image(img_path, target_size)
+    return _array_to_base64_png(overlay), _array_to_base64_png(coloured_heatmap)
 
-    heatmap = _compute_scorecam_heatmap(
-        interpreter, img_array, class_index, feature_tensor_index, max_channels
-    )
 
-    h, w = original_img.shape[:2]
-    coloured_heatmap = _heatmap_to_colormap(heatmap, target_hw=(h, w))
-    overlay = _blend_overlay(original_img, coloured_heatmap, alpha=heatmap_alpha)
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
 
-    overlay_b64 = _array_to_base64_png(overlay)
-    heatmap_b64 = _array_to_base64_png(coloured_heatmap)
+@timed("explain")
+def compute_gradcam_heatmap(
+    model: Model,
+    img_path: str,
+    class_index: int,
+    target_size: tuple[int, int] = (224, 224),
+    last_conv_layer_name: Optional[str] = None,
+    preprocessed: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Grad-CAM without rendering.
+
+    Pass ``preprocessed=(img_array, original_img)`` from
+    ``load_resnet50_input`` to skip decoding ``img_path`` again.
+
+    Returns
+    -------
+    heatmap      : float32 array (h, w) at conv-layer resolution, in [0, 1].
+    original_img : uint8 array (H, W, 3) the heatmap belongs to.
+    """
+    # 1. Resolve which conv layer to hook
+    if last_conv_layer_name is None:
+        last_conv_layer_name = _find_last_conv_layer(model)
+
+    # 2. Load + preprocess
+    if preprocessed is None:
+        preprocessed = _preprocess_image(img_path, target_size)
+    img_array, original_img = preprocessed
+
+    # 3. Compute raw heatmap
+    heatmap = _compute_gradcam_heatmap(
+        model, img_array, class_index, last_conv_layer_name
+    )
 
     logger.info(
-        "Score-CAM generated | tensor_idx=%d | class_index=%d | img=%s",
-        feature_tensor_index,
+        "Grad-CAM generated | layer=%s | class_index=%d | img=%s",
+        last_conv_layer_name,
         class_index,
         img_path,
     )
 
-    return overlay_b64, heatmap_b64
-
-
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
+    return heatmap, original_img
 
 
 def generate_gradcam_overlay(
@@ -537,37 +666,22 @@ def generate_gradcam_overlay(
     Exception    : propagates any image-loading or TF errors so the caller
                    can wrap in try/except and return a graceful API error.
     """
-    # 1. Resolve which conv layer to hook
-    if last_conv_layer_name is None:
-        last_conv_layer_name = _find_last_conv_layer(model)
-
-    # 2. Load + preprocess
-    img_array, original_img = _preprocess_image(img_path, target_size)
-
-    # 3. Compute raw heatmap
-    heatmap = _compute_gradcam_heatmap(
-        model, img_array, class_index, last_conv_layer_name
+    # 1-3. Resolve the conv layer, preprocess and compute the raw heatmap
+    heatmap, original_img = compute_gradcam_heatmap(
+        model,
+        img_path,
+        class_index,
+        target_size=target_size,
+        last_conv_layer_name=last_conv_layer_name,
     )
 
-    # 4. Colourise + resize to original image dimensions
-    h, w = original_img.shape[:2]
-    coloured_heatmap = _heatmap_to_colormap(heatmap, target_hw=(h, w))
-
-    # 5. Blend over original
-    overlay = _blend_overlay(original_img, coloured_heatmap, alpha=heatmap_alpha)
-
-    # 6. Encode both as base64 PNG data URIs
-    overlay_b64 = _array_to_base64_png(overlay)
-    heatmap_b64 = _array_to_base64_png(coloured_heatmap)
-
-    logger.info(
-        "Grad-CAM generated | layer=%s | class_index=%d | img=%s",
-        last_conv_layer_name,
-        class_index,
-        img_path,
+    # 4-5. Colourise at the image size and blend over the original
+    overlay, coloured_heatmap = render_heatmap_images(
+        heatmap, original_img, heatmap_alpha=heatmap_alpha
     )
 
-    return overlay_b64, heatmap_b64
+    # 6. Encode both as base64 PNG data URIs
+    return _array_to_base64_png(overlay), _array_to_base64_png(coloured_heatmap)
 
 
 # ---------------------------------------------------------------------------
@@ -1,6 +1,8 @@
 import json
 import os
 
+from backend.services.metrics import timed
+
 # =========================
 # HISTORY FILE PATH
 # =========================
@@ -35,6 +37,7 @@ def load_history():
 # =========================
 # SAVE NEW ENTRY
 # =========================
+@timed("history")
 def save_history(entry):
 
     history = load_history()
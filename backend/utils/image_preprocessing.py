@@ -0,0 +1,98 @@
+"""
+Image decoding and ResNet50 preprocessing shared by the image-prediction
+route and the Grad-CAM / Score-CAM explainers.
+
+Phone photos of fundus and skin lesions are commonly 12 MP.  Decoding them
+at full resolution only to throw away 99% of the pixels in ``resize`` is the
+dominant cost of ``/predict`` before the model even runs, so:
+
+  • JPEGs are decoded with ``Image.draft``, which lets libjpeg downscale by
+    1/2, 1/4 or 1/8 in the DCT domain while decoding.
+  • Other formats are resized with ``reducing_gap`` so Pillow first shrinks
+    by an integer factor with a cheap box filter before the final resample.
+  • EXIF orientation is applied so rotated phone photos reach the model
+    upright.
+  • ResNet50 "caffe" preprocessing (RGB→BGR, ImageNet mean subtraction) is
+    done in place with NumPy into a float32 buffer the caller may reuse,
+    instead of going through ``tf.keras.applications.resnet50.preprocess_input``.
+
+Both helpers are pure NumPy/Pillow, so importing this module does not pull
+in TensorFlow.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# ImageNet channel means in BGR order, as used by
+# tf.keras.applications.resnet50.preprocess_input (mode="caffe").
+IMAGENET_BGR_MEAN = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+# Resize filter used for every model input.  Matches Pillow's default for
+# Image.resize, which is what the models were previously fed.
+RESAMPLE = Image.BICUBIC
+
+# Let Pillow reduce by an integer factor first when the source is at least
+# this many times larger than the target.  3.0 is visually indistinguishable
+# from a full-quality resample.
+REDUCING_GAP = 3.0
+
+
+def decode_image(source, size: Tuple[int, int]) -> Image.Image:
+    """
+    Open ``source`` (path or file object) and return an RGB image of ``size``.
+
+    ``size`` is a PIL (width, height) tuple.
+    """
+    img = Image.open(source)
+
+    if img.format == "JPEG":
+        # draft() picks the largest DCT scale that still yields at least the
+        # requested size.  EXIF rotation may swap the axes afterwards, so ask
+        # for the larger side in both dimensions.
+        side = max(size)
+        img.draft("RGB", (side, side))
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+
+    return img.resize(size, resample=RESAMPLE, reducing_gap=REDUCING_GAP)
+
+
+def resnet50_preprocess(
+    rgb: np.ndarray, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Apply ResNet50 preprocessing to an (H, W, 3) uint8 RGB array.
+
+    Writes into ``out`` (float32, shape (H, W, 3) or (1, H, W, 3)) when
+    given, otherwise allocates one.  Equivalent to
+    ``tf.keras.applications.resnet50.preprocess_input(rgb.astype("float32"))``.
+    """
+    if out is None:
+        out = np.empty(rgb.shape, dtype=np.float32)
+
+    # RGB -> BGR and uint8 -> float32 in one copy, then subtract in place.
+    np.copyto(out.reshape(rgb.shape), rgb[..., ::-1], casting="unsafe")
+    out -= IMAGENET_BGR_MEAN
+    return out
+
+
+def load_resnet50_input(
+    source, size: Tuple[int, int], out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode ``source`` and return ``(batch, rgb)``.
+
+    ``batch`` is the (1, H, W, 3) float32 model input (``out`` if supplied);
+    ``rgb`` is the resized uint8 image, used for heatmap overlays.
+    """
+    rgb = np.asarray(decode_image(source, size), dtype=np.uint8)
+    if out is None:
+        out = np.empty((1,) + rgb.shape, dtype=np.float32)
+    resnet50_preprocess(rgb, out)
+    return out, rgb
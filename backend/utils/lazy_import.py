@@ -0,0 +1,102 @@
+"""
+Deferred imports and import-cost accounting.
+
+``import tensorflow`` takes seconds and a few hundred MB of RSS.  Only the
+image-prediction blueprint and the Grad-CAM helpers need it, so they bind
+``tf = LazyModule("tensorflow")`` and the real import happens on the first
+attribute access, i.e. on the first image request (or in
+``preload_models`` under gunicorn).  Workers that only serve symptom
+prediction, the calculator or history never pay for it.
+
+``timed_import`` records how long a block of imports took and how many
+modules it loaded; ``create_app`` wraps each blueprint import in it and
+prints the table when ``STARTUP_IMPORT_REPORT=1``.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, List, Optional
+
+# label -> {"seconds": float, "modules": int}, in the order recorded.
+IMPORT_TIMES: Dict[str, Dict[str, float]] = {}
+
+
+def record_import(label: str, seconds: float, modules: int):
+    IMPORT_TIMES[label] = {"seconds": round(seconds, 4), "modules": modules}
+
+
+@contextmanager
+def timed_import(label: str):
+    """Time the imports in the ``with`` block under ``label``."""
+    loaded_before = len(sys.modules)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_import(
+            label,
+            time.perf_counter() - started,
+            len(sys.modules) - loaded_before,
+        )
+
+
+class LazyModule(ModuleType):
+    """Module proxy that imports ``name`` on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None and self.__name__ in sys.modules:
+                    # Already imported elsewhere; keep the original timing.
+                    module = sys.modules[self.__name__]
+                    self.__dict__["_lazy_module"] = module
+                elif module is None:
+                    label = f"{self.__name__} (lazy)"
+                    with timed_import(label):
+                        module = importlib.import_module(self.__name__)
+                    print(
+                        f"[LAZY_IMPORT] {self.__name__} imported in "
+                        f"{IMPORT_TIMES[label]['seconds']:.2f}s"
+                    )
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def format_import_report(times: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """Render recorded import costs, slowest first."""
+    times = IMPORT_TIMES if times is None else times
+    if not times:
+        return "[STARTUP] No imports recorded"
+    width = max(len(label) for label in times)
+    lines = [
+        f"[STARTUP] Import cost ({sum(t['seconds'] for t in times.values()):.2f}s total)"
+    ]
+    for label, stats in sorted(times.items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(
+            f"  {label:<{width}}  {stats['seconds'] * 1000:8.1f} ms  "
+            f"{stats['modules']:5d} modules"
+        )
+    return "\n".join(lines)
@@ -4,41 +4,41 @@ Centralized input validation for Disease Prediction API routes.
 Uses marshmallow for schema enforcement.
 """
 
-import os
-import csv
 import logging
 from functools import wraps
 
 from flask import request, jsonify
 from marshmallow import Schema, fields, validate, ValidationError
 
+from backend.services.preset_repository import presets
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Load known disease names from hospital_data.csv at startup
+# Known disease names come from the shared preset table (hospital_data.csv),
+# so an edited file is picked up without a restart.
 # ---------------------------------------------------------------------------
 
 def _load_known_diseases() -> list[str]:
-    """Read disease names from hospital_data.csv. Returns empty list on failure."""
-    csv_path = os.path.join(os.path.dirname(__file__), "..", "..", "hospital_data.csv")
-    csv_path = os.path.normpath(csv_path)
-    diseases = []
+    """Current disease names from the preset table. Returns empty list on failure."""
     try:
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Adjust the column name if your CSV uses a different header
-                name = row.get("disease") or row.get("Disease") or row.get("name")
-                if name and name.strip() not in diseases:
-                    diseases.append(name.strip())
+        return presets.names()
     except FileNotFoundError:
         logger.warning("hospital_data.csv not found — disease name validation will be skipped.")
     except Exception as exc:
         logger.warning("Could not load disease names for validation: %s", exc)
-    return diseases
+    return []
+
 
+def _validate_known_disease(value: str) -> None:
+    """Accept any preset disease; fall back to a length check when there are none."""
+    known = _load_known_diseases()
+    if known:
+        if value not in presets:
+            raise ValidationError(f"Must be one of: {', '.join(known)}.")
+    elif not 1 <= len(value) <= 100:
+        raise ValidationError("Length must be between 1 and 100.")
 
-KNOWN_DISEASES: list[str] = _load_known_diseases()
 
 # Supported AI output languages
 SUPPORTED_LANGUAGES: list[str] = ["en", "hi", "gu", "ta"]
@@ -52,7 +52,7 @@ class BayesInputSchema(Schema):
     """Validates input for the Bayesian calculator endpoint."""
     disease = fields.Str(
         required=True,
-        validate=validate.OneOf(KNOWN_DISEASES) if KNOWN_DISEASES else validate.Length(min=1, max=100),
+        validate=_validate_known_disease,
         error_messages={"required": "disease is required."},
     )
     prior = fields.Float(
@@ -0,0 +1,431 @@
+"""
+Benchmark and load-test harness for the image-prediction pipeline.
+
+    python benchmark_image_inference.py
+    python benchmark_image_inference.py --sizes 640x480,4000x3000 --formats jpeg,webp \
+        --repeats 20 --concurrency 8 --json
+
+Synthetic fundus-like images are generated in every requested size and
+format and pushed through each stage separately:
+
+    preprocess       preprocess_image (decode, resize, ResNet normalisation)
+    inference        run_keras_inference / run_tflite_inference
+    explanation      generate_gradcam_overlay / generate_tflite_scorecam_overlay
+
+and end to end through POST /predict with the Flask test client (prediction
+cache disabled, so every request runs the full pipeline), plus a concurrent
+load phase.  Each stage reports latency percentiles and images/sec; the
+process's peak RSS is reported after each phase.
+
+Model files that are missing (e.g. a fresh clone without the weights) are
+replaced by small stand-in models with the same input shape and classes;
+pass --resnet-stand-in for ResNet50-sized stand-ins, or --stand-in to use
+stand-ins even when the real files exist.
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+# Keep benchmark users and history out of the development database.
+_WORKDIR = tempfile.mkdtemp(prefix="image_bench_")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_WORKDIR, "bench.db"))
+os.environ.setdefault("SECRET_KEY", "image-benchmark-only")
+os.environ.setdefault("FLASK_ENV", "development")
+
+FORMATS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+
+def synthetic_image(width, height, fmt, seed=0):
+    """Encode a fundus-like test image: dark background, bright disc, noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.ogrid[:height, :width]
+    cy, cx = height / 2, width / 2
+    radius = min(width, height) * 0.45
+    dist = np.sqrt((x - cx) ** 2 + (y - cy) ** 2) / radius
+
+    base = np.clip(1.0 - dist, 0.0, 1.0)[..., np.newaxis]
+    colour = np.array([200, 90, 40], dtype=np.float32)
+    # Coarse noise upsampled, so compressed sizes resemble real photos
+    # rather than white noise (which would defeat PNG entirely).
+    coarse = rng.normal(0, 18, size=(max(1, height // 16), max(1, width // 16), 3))
+    noise = np.asarray(
+        Image.fromarray(np.uint8(np.clip(coarse + 128, 0, 255))).resize(
+            (width, height), Image.BILINEAR
+        ),
+        dtype=np.float32,
+    ) - 128
+    pixels = np.uint8(np.clip(base * colour + noise * base + 10, 0, 255))
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=FORMATS[fmt], quality=90)
+    return buffer.getvalue()
+
+
+def build_image_set(sizes, formats):
+    images = []
+    for i, (width, height) in enumerate(sizes):
+        for fmt in formats:
+            data = synthetic_image(width, height, fmt, seed=i)
+            images.append(
+                {"label": f"{width}x{height}.{fmt}", "bytes": data, "format": fmt}
+            )
+    return images
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+
+
+def _stand_in_keras_model(img_size, num_classes, resnet):
+    import tensorflow as tf
+
+    width, height = img_size
+    if resnet:
+        return tf.keras.applications.ResNet50(
+            weights=None, input_shape=(height, width, 3), classes=num_classes
+        )
+    # Functional rather than Sequential: Grad-CAM needs model.inputs/outputs,
+    # which a reloaded Sequential model does not define until it is called.
+    inputs = tf.keras.Input(shape=(height, width, 3))
+    x = tf.keras.layers.Conv2D(16, 7, strides=4, activation="relu")(inputs)
+    x = tf.keras.layers.Conv2D(32, 3, strides=2, activation="relu")(x)
+    x = tf.keras.layers.Conv2D(64, 3, strides=2, activation="relu")(x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def prepare_models(routes, force_stand_in=False, resnet=False):
+    """
+    Point MODEL_CONFIG at real model files, or at stand-ins where missing.
+
+    Returns model_type -> "real" | "stand-in".
+    """
+    from backend.services.model_conversion import convert_keras_to_tflite
+
+    kinds = {}
+    for model_type, config in routes.MODEL_CONFIG.items():
+        keras_path = config.get("keras_path") if config["format"] != "keras" else None
+        needed = [config["path"]] + ([keras_path] if keras_path else [])
+        if not force_stand_in and all(os.path.exists(p) for p in needed):
+            kinds[model_type] = "real"
+            continue
+
+        model = _stand_in_keras_model(
+            config["img_size"], len(config["class_names"]), resnet
+        )
+        stand_in_keras = os.path.join(_WORKDIR, f"{model_type}.keras")
+        model.save(stand_in_keras)
+        if config["format"] == "keras":
+            config["path"] = stand_in_keras
+        else:
+            config["path"] = os.path.join(_WORKDIR, f"{model_type}.tflite")
+            convert_keras_to_tflite(model, config["path"], quantization="none")
+        if "keras_path" in config:
+            config["keras_path"] = stand_in_keras
+        kinds[model_type] = "stand-in"
+
+    # Drop anything loaded from the old paths.
+    routes.KERAS_MODEL_CACHE.clear()
+    routes.TFLITE_MODEL_CACHE.clear()
+    routes.INFERENCE_BATCHERS.clear()
+    routes.CACHE_INITIALIZED = False
+    return kinds
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def summarize(timings_ms, images=None, wall_seconds=None):
+    """Latency percentiles and throughput for a list of per-call timings."""
+    arr = np.asarray(timings_ms, dtype=np.float64)
+    images = len(arr) if images is None else images
+    wall = arr.sum() / 1000 if wall_seconds is None else wall_seconds
+    return {
+        "count": int(len(arr)),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p90_ms": round(float(np.percentile(arr, 90)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+        "mean_ms": round(float(arr.mean()), 2),
+        "images_per_sec": round(images / wall, 2) if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _timed(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_stages(routes, model_type, images, repeats):
+    """Time preprocessing, inference and the explanation for ``model_type``."""
+    from backend.utils.gradcam import (
+        generate_gradcam_overlay,
+        generate_tflite_scorecam_overlay,
+    )
+
+    config = routes.MODEL_CONFIG[model_type]
+    uses_gradcam = config["format"] == "keras" or config.get("keras_path")
+    run_inference = (
+        routes.run_keras_inference
+        if config["format"] == "keras"
+        else routes.run_tflite_inference
+    )
+
+    # Warm up model loading, the batcher threads and TF's kernels.
+    warm = routes.preprocess_image(io.BytesIO(images[0]["bytes"]), model_type)
+    run_inference(model_type, warm)
+
+    results = {}
+    preprocess = []
+    for image in images:
+        data = image["bytes"]
+        timings = _timed(
+            lambda: routes.preprocess_image(io.BytesIO(data), model_type), repeats
+        )
+        results[f"preprocess[{image['label']}]"] = summarize(timings)
+        preprocess.extend(timings)
+
+    img_array = routes.preprocess_image(io.BytesIO(images[0]["bytes"]), model_type)
+    inference = _timed(lambda: run_inference(model_type, img_array), repeats)
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg", dir=_WORKDIR, delete=False) as tmp:
+        tmp.write(images[0]["bytes"])
+    if uses_gradcam:
+        keras_model = routes.load_keras_model(model_type)
+        explain = lambda: generate_gradcam_overlay(  # noqa: E731
+            model=keras_model,
+            img_path=tmp.name,
+            class_index=0,
+            target_size=config["img_size"],
+        )
+    else:
+        explain = lambda: generate_tflite_scorecam_overlay(  # noqa: E731
+            tflite_path=config["path"],
+            img_path=tmp.name,
+            class_index=0,
+            target_size=config["img_size"],
+        )
+    explain()
+    explanation = _timed(explain, max(1, repeats // 2))
+    os.unlink(tmp.name)
+
+    results["preprocess"] = summarize(preprocess)
+    results["inference"] = summarize(inference)
+    results["grad-cam" if uses_gradcam else "score-cam"] = summarize(explanation)
+    return results
+
+
+def _logged_in_client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    return client
+
+
+def _post_predict(client, image, model_type):
+    response = client.post(
+        "/predict",
+        data={
+            "image": (io.BytesIO(image["bytes"]), image["label"]),
+            "type": model_type,
+        },
+        content_type="multipart/form-data",
+    )
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"/predict returned {response.status_code} for {image['label']}: "
+            f"{response.get_data(as_text=True)[:200]}"
+        )
+
+
+def bench_endpoint(app, user_id, model_type, images, repeats, concurrency):
+    """Sequential and concurrent POST /predict timings for ``model_type``."""
+    from backend.routes import predict_disease_type_routes as routes
+
+    uploadable = [i for i in images if len(i["bytes"]) <= routes._MAX_UPLOAD_BYTES]
+    skipped = [i["label"] for i in images if i not in uploadable]
+
+    client = _logged_in_client(app, user_id)
+    _post_predict(client, uploadable[0], model_type)
+
+    results = {}
+    sequential = []
+    for image in uploadable:
+        timings = _timed(lambda: _post_predict(client, image, model_type), repeats)
+        results[f"predict[{image['label']}]"] = summarize(timings)
+        sequential.extend(timings)
+    results["predict"] = summarize(sequential)
+
+    if concurrency > 1:
+        lock = threading.Lock()
+        concurrent_timings = []
+        total = max(concurrency * repeats, len(uploadable))
+
+        def worker(index):
+            worker_client = _logged_in_client(app, user_id)
+            image = uploadable[index % len(uploadable)]
+            started = time.perf_counter()
+            _post_predict(worker_client, image, model_type)
+            with lock:
+                concurrent_timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(total)))
+        wall = time.perf_counter() - started
+        results[f"predict x{concurrency} threads"] = summarize(
+            concurrent_timings, images=total, wall_seconds=wall
+        )
+
+    if skipped:
+        results["skipped_over_upload_limit"] = skipped
+    return results
+
+
+def setup_app():
+    """Create the app with a throwaway user and no rate limit or result cache."""
+    from backend import create_app, db
+    from backend.middleware.security import rate_limiter
+    from backend.models.user import User
+    from backend.services import prediction_cache
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    rate_limiter._limits["prediction"] = {"requests": 10**9, "window": 60}
+    prediction_cache._prediction_cache = prediction_cache.PredictionCache(max_bytes=0)
+
+    with app.app_context():
+        user = User(
+            username="benchmark",
+            email="benchmark@example.com",
+            password_hash="x" * 60,
+        )
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    return app, user_id
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def format_results(report):
+    lines = []
+    for model_type, section in report["models"].items():
+        lines.append(f"\n== {model_type} ({report['model_kinds'][model_type]}) ==")
+        lines.append(
+            f"  {'stage':<34} {'p50':>9} {'p90':>9} {'p99':>9} {'img/s':>9} {'peakRSS':>9}"
+        )
+        for stage, stats in section.items():
+            if not isinstance(stats, dict):
+                lines.append(f"  {stage}: {stats}")
+                continue
+            lines.append(
+                f"  {stage:<34} {stats['p50_ms']:>7.1f}ms {stats['p90_ms']:>7.1f}ms "
+                f"{stats['p99_ms']:>7.1f}ms {stats['images_per_sec']:>9.1f} "
+                f"{stats['peak_rss_mb']:>7.1f}MB"
+            )
+    lines.append(f"\nPeak RSS: {report['peak_rss_mb']} MB")
+    return "\n".join(lines)
+
+
+def _parse_sizes(value):
+    sizes = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="640x480,1600x1200,4000x3000")
+    parser.add_argument("--formats", default="jpeg,png,webp")
+    parser.add_argument("--models", help="Comma-separated model types (default: all)")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--stand-in", action="store_true", help="Always use stand-in models")
+    parser.add_argument(
+        "--resnet-stand-in",
+        action="store_true",
+        help="Use ResNet50-sized stand-ins (slower, realistic compute)",
+    )
+    parser.add_argument("--skip-endpoint", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.formats.split(",")]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        parser.error(f"Unknown formats: {unknown}. Use {list(FORMATS)}")
+
+    from backend.routes import predict_disease_type_routes as routes
+
+    model_types = (
+        [m.strip() for m in args.models.split(",")]
+        if args.models
+        else list(routes.MODEL_CONFIG)
+    )
+    images = build_image_set(_parse_sizes(args.sizes), formats)
+    kinds = prepare_models(routes, force_stand_in=args.stand_in, resnet=args.resnet_stand_in)
+
+    app = user_id = None
+    if not args.skip_endpoint:
+        app, user_id = setup_app()
+
+    report = {"model_kinds": kinds, "models": {}}
+    for model_type in model_types:
+        section = bench_stages(routes, model_type, images, args.repeats)
+        if app is not None:
+            section.update(
+                bench_endpoint(
+                    app, user_id, model_type, images, args.repeats, args.concurrency
+                )
+            )
+        report["models"][model_type] = section
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_results(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark the rate limit backends at high identifier cardinality.
+
+    python benchmark_rate_limit_backends.py
+    python benchmark_rate_limit_backends.py --identifiers 1000000 --checks 500000 \
+        --threads 8 --backends in_memory,sqlite,redis --redis-url redis://localhost:6379/15
+
+Each backend gets the same workload: checks spread uniformly over
+--identifiers hashed client identifiers and the RateLimiter endpoint types,
+with --hot-fraction of them coming from a single scraping client, issued
+from --threads threads.  Reports checks/sec, per-check latency
+percentiles, the number of live buckets and how long one prune pass takes.
+
+The Redis backend deletes its rate_limit:* keys before and after the run,
+so point --redis-url at a disposable database.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from backend.middleware.security import (
+    InMemoryBackend,
+    RateLimiter,
+    RedisBackend,
+    SQLiteBackend,
+)
+
+BACKENDS = ("in_memory", "sqlite", "redis")
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def build_workload(identifiers, checks, hot_fraction, seed=0):
+    """(identifier, endpoint_type, max_requests, window) tuples, shuffled."""
+    rng = random.Random(seed)
+    limits = RateLimiter.LIMITS
+    endpoint_types = list(limits)
+    hot = hashlib.sha256(b"scraper").hexdigest()
+    workload = []
+    for _ in range(checks):
+        if rng.random() < hot_fraction:
+            identifier = hot
+        else:
+            identifier = hashlib.sha256(
+                str(rng.randrange(identifiers)).encode()
+            ).hexdigest()
+        endpoint_type = rng.choice(endpoint_types)
+        limit = limits[endpoint_type]
+        workload.append((identifier, endpoint_type, limit["requests"], limit["window"]))
+    return workload
+
+
+def make_backend(name, workdir, redis_url):
+    if name == "in_memory":
+        return InMemoryBackend(cleanup_interval=3600)
+    if name == "sqlite":
+        return SQLiteBackend(
+            db_path=os.path.join(workdir, "rate_limit_bench.db"), cleanup_interval=3600
+        )
+    backend = RedisBackend(redis_url=redis_url)
+    backend.clear()
+    return backend
+
+
+def bench_backend(backend, workload, threads):
+    chunks = [workload[i::threads] for i in range(threads)]
+    timings = [[] for _ in range(threads)]
+    allowed = [0] * threads
+
+    def worker(index):
+        check = backend.check_rate_limit
+        out = timings[index]
+        for args in chunks[index]:
+            started = time.perf_counter()
+            ok = check(*args)[0]
+            out.append(time.perf_counter() - started)
+            allowed[index] += ok
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    arr = np.concatenate([np.asarray(t) for t in timings]) * 1e6
+    stats = backend.get_stats()
+    started = time.perf_counter()
+    backend.prune_stale_entries()
+    prune_ms = (time.perf_counter() - started) * 1000
+    return {
+        "checks": int(len(arr)),
+        "checks_per_sec": round(len(arr) / wall, 1),
+        "p50_us": round(float(np.percentile(arr, 50)), 1),
+        "p90_us": round(float(np.percentile(arr, 90)), 1),
+        "p99_us": round(float(np.percentile(arr, 99)), 1),
+        "allowed_share": round(sum(allowed) / len(arr), 4),
+        "buckets": stats["total_buckets"],
+        "identifiers": stats["total_identifiers"],
+        "prune_ms": round(prune_ms, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def format_results(report):
+    lines = [
+        f"{report['checks']} checks over {report['identifiers']} identifiers, "
+        f"{report['threads']} threads, hot fraction {report['hot_fraction']}",
+        f"  {'backend':<10} {'checks/s':>10} {'p50':>9} {'p90':>9} {'p99':>9} "
+        f"{'buckets':>9} {'prune':>9} {'peakRSS':>9}",
+    ]
+    for name, stats in report["backends"].items():
+        lines.append(
+            f"  {name:<10} {stats['checks_per_sec']:>10.0f} {stats['p50_us']:>7.1f}us "
+            f"{stats['p90_us']:>7.1f}us {stats['p99_us']:>7.1f}us {stats['buckets']:>9} "
+            f"{stats['prune_ms']:>7.1f}ms {stats['peak_rss_mb']:>7.1f}MB"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", default="in_memory,sqlite")
+    parser.add_argument("--identifiers", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--hot-fraction", type=float, default=0.05)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    names = [b.strip() for b in args.backends.split(",")]
+    unknown = [b for b in names if b not in BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backends: {unknown}. Use {list(BACKENDS)}")
+
+    workload = build_workload(args.identifiers, args.checks, args.hot_fraction)
+    workdir = tempfile.mkdtemp(prefix="rate_limit_bench_")
+    report = {
+        "checks": args.checks,
+        "identifiers": args.identifiers,
+        "threads": args.threads,
+        "hot_fraction": args.hot_fraction,
+        "backends": {},
+    }
+    for name in names:
+        backend = make_backend(name, workdir, args.redis_url)
+        try:
+            report["backends"][name] = bench_backend(backend, workload, args.threads)
+        finally:
+            if isinstance(backend, RedisBackend):
+                backend.clear()
+            backend.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_results(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark SecurityValidator.validate_input on adversarial payloads.
+
+    python benchmark_security_validator.py
+    python benchmark_security_validator.py --size 10240 --repeats 20 --json
+
+Each payload is --size characters long and built to make the previous
+per-pattern ``re.search`` loop backtrack (unclosed tags, repeated SQL
+keywords with no partner, long on... words with no "=").  The same payloads
+run through the previous implementation ("legacy") and the current one;
+the report shows the median and worst-case latency of each.
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+from backend.middleware.security import SecurityValidator
+
+# The pattern lists SecurityValidator used before the combined scanner.
+LEGACY_XSS_PATTERNS = [
+    r"<script[^>]*>.*?</script>",
+    r"javascript:",
+    r"on\w+\s*=",
+    r"<iframe[^>]*>",
+]
+LEGACY_SQL_PATTERNS = [
+    r"(\bUNION\b.*\bSELECT\b)",
+    r"(\bSELECT\b.*\bFROM\b)",
+    r"(\bINSERT\b.*\bINTO\b)",
+    r"(\bDROP\b.*\bTABLE\b)",
+    r"(\bDELETE\b.*\bFROM\b)",
+]
+
+
+def legacy_validate_input(data, field_name="input"):
+    data_str = str(data)
+    for pattern in LEGACY_XSS_PATTERNS:
+        if re.search(pattern, data_str, re.IGNORECASE):
+            return False, f"Potential XSS attack detected in {field_name}"
+    for pattern in LEGACY_SQL_PATTERNS:
+        if re.search(pattern, data_str, re.IGNORECASE):
+            return False, f"Potential SQL injection detected in {field_name}"
+    return True, None
+
+
+def build_payloads(size):
+    def fill(unit):
+        return (unit * (size // len(unit) + 1))[:size]
+
+    return {
+        "benign text": fill("fever, mild headache and fatigue since monday; "),
+        "unclosed <script": fill("<script "),
+        "unclosed <script>": fill("<script>x "),
+        "unclosed <iframe": fill("<iframe "),
+        "on-word, no =": fill("on"),
+        "long on-word, no =": "on" + "a" * (size - 2),
+        "UNION, no SELECT": fill("UNION "),
+        "SELECT, no FROM": fill("SELECT "),
+        "DROP, no TABLE": fill("DROP "),
+        "mixed keywords": fill("union select' or 1=1 -- "),
+    }
+
+
+def time_calls(fn, payload, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def format_results(report):
+    lines = [
+        f"validate_input on {report['size']}-character payloads "
+        f"({report['repeats']} runs each)",
+        f"  {'payload':<22} {'legacy med':>11} {'legacy max':>11} "
+        f"{'current med':>12} {'current max':>12}",
+    ]
+    for name, row in report["payloads"].items():
+        lines.append(
+            f"  {name:<22} {row['legacy']['median_ms']:>9.3f}ms "
+            f"{row['legacy']['max_ms']:>9.3f}ms {row['current']['median_ms']:>10.3f}ms "
+            f"{row['current']['max_ms']:>10.3f}ms"
+        )
+    lines.append(
+        f"Worst case: legacy {report['worst_ms']['legacy']:.3f} ms, "
+        f"current {report['worst_ms']['current']:.3f} ms"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=10 * 1024)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    validator = SecurityValidator()
+    if args.size > validator.MAX_INPUT_LENGTH:
+        parser.error(
+            f"--size above MAX_INPUT_LENGTH ({validator.MAX_INPUT_LENGTH}) "
+            "is rejected before scanning"
+        )
+
+    report = {"size": args.size, "repeats": args.repeats, "payloads": {}}
+    for name, payload in build_payloads(args.size).items():
+        legacy = legacy_validate_input(payload)
+        current = validator.validate_input(payload)
+        report["payloads"][name] = {
+            "legacy": time_calls(legacy_validate_input, payload, args.repeats),
+            "current": time_calls(validator.validate_input, payload, args.repeats),
+            "legacy_valid": legacy[0],
+            "current_valid": current[0],
+        }
+    report["worst_ms"] = {
+        impl: max(row[impl]["max_ms"] for row in report["payloads"].values())
+        for impl in ("legacy", "current")
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_results(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
@@ -0,0 +1,117 @@
+"""
+Convert the eye-disease Keras model to TFLite and check it before serving.
+
+    python convert_eye_model.py --quantization dynamic --samples path/to/fundus_images
+    python convert_eye_model.py --quantization int8 --samples path/to/fundus_images
+
+Prints an accuracy-parity report against the Keras model and a latency
+report for both formats.  To serve the result, set
+
+    EYE_MODEL_FORMAT=tflite
+    EYE_TFLITE_PATH=<output path>   # defaults to the path printed below
+
+Grad-CAM keeps using the Keras model, so leave the .keras file in place.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+from backend.services.model_conversion import (
+    QUANTIZATION_MODES,
+    benchmark_latency,
+    compare_predictions,
+    convert_keras_to_tflite,
+    format_report,
+    keras_predictor,
+    load_sample_images,
+    synthetic_samples,
+    tflite_predictor,
+)
+from backend.routes.predict_disease_type_routes import (
+    EYE_KERAS_PATH,
+    EYE_TFLITE_PATH,
+    MODEL_CONFIG,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--keras-path", default=EYE_KERAS_PATH)
+    parser.add_argument("--output", default=EYE_TFLITE_PATH)
+    parser.add_argument(
+        "--quantization", choices=QUANTIZATION_MODES, default="dynamic"
+    )
+    parser.add_argument(
+        "--samples",
+        help="Directory of eye images for int8 calibration and the parity check",
+    )
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--min-agreement",
+        type=float,
+        default=0.98,
+        help="Exit non-zero if top-1 agreement falls below this",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    config = MODEL_CONFIG["eyes"]
+    if args.samples:
+        images = load_sample_images(args.samples, config["img_size"], limit=args.limit)
+    else:
+        print("⚠️  No --samples given: using random images (smoke test only).")
+        images = synthetic_samples(16, config["img_size"])
+
+    conversion = convert_keras_to_tflite(
+        args.keras_path,
+        args.output,
+        quantization=args.quantization,
+        representative_images=images,
+    )
+
+    keras_predict = keras_predictor(args.keras_path)
+    tflite_predict = tflite_predictor(args.output)
+
+    parity = compare_predictions(
+        keras_predict, tflite_predict, images, class_names=config["class_names"]
+    )
+    latency = {
+        "keras": benchmark_latency(keras_predict, images, runs=args.runs),
+        f"tflite-{args.quantization}": benchmark_latency(
+            tflite_predict, images, runs=args.runs
+        ),
+    }
+
+    if args.json:
+        print(
+            json.dumps(
+                {"conversion": conversion, "parity": parity, "latency": latency},
+                indent=2,
+            )
+        )
+    else:
+        print(
+            f"Wrote {conversion['path']} ({conversion['size_mb']} MB, "
+            f"{args.quantization})"
+        )
+        print(format_report("keras", latency["keras"]))
+        name = f"tflite-{args.quantization}"
+        print(format_report(name, latency[name], parity))
+
+    if parity["top1_agreement"] < args.min_agreement:
+        print(
+            f"❌ FAIL: top-1 agreement {parity['top1_agreement']:.2%} "
+            f"is below {args.min_agreement:.2%}"
+        )
+        return 1
+    print("✅ SUCCESS: converted model matches the Keras model.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
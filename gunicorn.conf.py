@@ -0,0 +1,84 @@
+"""
+Gunicorn configuration, picked up automatically when gunicorn is started
+from the repository root (start.sh, Dockerfile).
+
+With GUNICORN_PRELOAD enabled (the default) the app and all models are
+loaded once in the master process and shared copy-on-write by the workers;
+see backend/services/model_preload.py.  Set GUNICORN_PRELOAD=0 to fall back
+to loading everything inside each worker, e.g. when using --reload.
+
+Command-line flags such as --workers or --bind still override the values
+here.
+"""
+
+import itertools
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+# Workers must not rotate a shared log file; see backend/middleware/logger.py.
+if os.getenv("LOG_ROTATION", "size").lower() != "external":
+    os.environ.setdefault("LOG_PER_PROCESS", "1")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+
+def on_starting(server):
+    """Clear the previous run's per-worker metric snapshots (METRICS_DIR)."""
+    from backend.services.metrics import clear_snapshots
+
+    clear_snapshots(os.getenv("METRICS_DIR"))
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker forks."""
+    from backend.services.metrics import clear_snapshots
+
+    # Anything written while the app was preloading belongs to no worker.
+    clear_snapshots(os.getenv("METRICS_DIR"))
+
+    if preload_app:
+        from backend.services.model_preload import preload_models
+
+        preload_models()
+
+
+def child_exit(server, worker):
+    """Keep an exited worker's metric counts without keeping its file."""
+    from backend.services.metrics import retire_snapshot
+
+    retire_snapshot(os.getenv("METRICS_DIR"), worker.pid)
+
+
+def pre_fork(server, worker):
+    """
+    Give the new worker the lowest log slot no live worker holds, so its
+    per-process log files replace those of the worker it succeeds.
+    """
+    taken = {getattr(w, "log_slot", None) for w in server.WORKERS.values()}
+    worker.log_slot = next(slot for slot in itertools.count() if slot not in taken)
+    # Inherited by the child; read by StructuredLogger after the fork.
+    os.environ["LOG_WORKER_SLOT"] = str(worker.log_slot)
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master."""
+    if not preload_app:
+        return
+
+    from backend import db
+    from run import app
+
+    # Sockets opened by the master (db.create_all at startup) must not be
+    # shared between workers; close=False leaves the parent's connections
+    # alone and just gives this worker a fresh pool.
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Load models per worker when not preloaded, then report memory."""
+    from backend.services.model_preload import preload_models, report_worker_memory
+
+    if not preload_app:
+        preload_models(freeze=False)
+    report_worker_memory(worker.age)
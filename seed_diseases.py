@@ -1,4 +1,3 @@
-import pandas as pd
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -6,24 +5,25 @@ load_dotenv()
 
 from backend import create_app, db
 from backend.models.disease import Disease
+from backend.services.preset_repository import DEFAULT_CSV_PATH, read_csv_presets
 
 app = create_app()
 
 
 def seed():
-    df = pd.read_csv("hospital_data.csv")
+    rows = read_csv_presets(DEFAULT_CSV_PATH)
 
     with app.app_context():
         # Ensure tables are created in the ACTIVE database (MySQL)
         db.drop_all()
         db.create_all()
 
-        for _, row in df.iterrows():
+        for row in rows:
             disease = Disease(
-                disease=row["Disease"],
-                prevalence=row["Prevalence"],
-                sensitivity=row["Sensitivity"],
-                false_positive=row["FalsePositive"],
+                disease=row["disease"],
+                prevalence=row["prior"],
+                sensitivity=row["sensitivity"],
+                false_positive=row["false_positive"],
             )
             db.session.add(disease)
 
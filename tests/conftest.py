@@ -27,8 +27,8 @@ def clear_test_isolation_state():
         from backend.middleware.security import rate_limiter
         if hasattr(rate_limiter, "backend"):
             backend = rate_limiter.backend
-            if hasattr(backend, "_requests"):
-                backend._requests.clear()
+            if hasattr(backend, "clear"):
+                backend.clear()
             elif hasattr(backend, "db_path"):
                 import sqlite3
                 conn = sqlite3.connect(backend.db_path)